@@ -0,0 +1,82 @@
+"""
+Measure how long the event loop stalls while a large file is loaded, by
+calling `load` on the loop and by awaiting `aload`, with each backend.
+
+    python -m benchmarks.async_latency --records 1000000
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+import typing as t
+import click
+from missouri import backends, json
+
+
+async def measure(
+    load: t.Callable[[], t.Awaitable[t.Any]],
+) -> t.Tuple[float, int, float]:
+    """
+    Return the time taken by `load`, how many times a 5 ms ticker ran
+    meanwhile, and the longest gap between ticks.
+    """
+    gaps: t.List[float] = []
+    loading = True
+
+    async def tick() -> None:
+        last = time.perf_counter()
+        while loading:
+            await asyncio.sleep(0.005)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    ticker = asyncio.create_task(tick())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await load()
+    elapsed = time.perf_counter() - start
+    loading = False
+    await ticker
+    return elapsed, len(gaps), max(gaps)
+
+
+@click.command()
+@click.option("--records", default=1000000, show_default=True)
+def main(records: int) -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "records.json")
+        json.dump(
+            {
+                "records": [
+                    {"id": i, "tags": ["a", "b"], "meta": {"x": i / 7}}
+                    for i in range(records)
+                ]
+            },
+            path,
+        )
+        click.echo(f"{os.path.getsize(path) / (1 << 20):.0f} MB")
+
+        for backend in ("simplejson", "json", "orjson"):
+            try:
+                backends.get_backend(backend)
+            except ImportError:
+                continue
+
+            async def blocking() -> t.Any:
+                return json.load(path, backend=backend)
+
+            for name, load in (
+                ("load", blocking),
+                ("aload", lambda: json.aload(path, backend=backend)),
+            ):
+                elapsed, ticks, max_gap = asyncio.run(measure(load))
+                click.echo(
+                    f"{backend:>10} {name:>5}: {elapsed:6.3f} s, {ticks:4} ticks, "
+                    f"longest stall {max_gap * 1000:6.1f} ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Compare the time to dump and load a large document with each backend.
+
+    python -m benchmarks.backends --records 200000
+"""
+
+import importlib.util
+import timeit
+import click
+from missouri import json
+
+
+@click.command()
+@click.option("--records", default=200_000, show_default=True)
+def main(records: int) -> None:
+    document = {
+        "records": [
+            {
+                "id": i,
+                "name": f"record {i}",
+                "score": i / 7,
+                "tags": ["a", "b"],
+                "active": i % 2 == 0,
+                "meta": {"x": i, "y": None},
+            }
+            for i in range(records)
+        ]
+    }
+    backends = ["simplejson", "json"]
+    if importlib.util.find_spec("orjson") is not None:
+        backends.append("orjson")
+    text = json.dumps(document)
+    for backend in backends:
+        dumps = min(
+            timeit.repeat(
+                lambda: json.dumps(document, backend=backend), number=1, repeat=3
+            )
+        )
+        loads = min(
+            timeit.repeat(lambda: json.loads(text, backend=backend), number=1, repeat=3)
+        )
+        click.echo(f"{backend:>10}: dumps {dumps:6.3f} s, loads {loads:6.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Compare peak RSS while writing and reading a large document with `dump` and
+`load`, which go through a text layer, and `dump_bytes` and `load_bytes`,
+which don't. Each variant runs in a fresh process, and the load variants read
+the document written by the dump variants.
+
+    python -m benchmarks.bytes_memory --megabytes 2000
+"""
+
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import typing as t
+import click
+from missouri import json
+import numpy as np
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def document(megabytes: int) -> t.Dict[str, t.Any]:
+    # Each chunk is about 1.4 MB once base64-encoded.
+    chunk = np.random.default_rng(0).random(1 << 17)
+    return {"chunks": [chunk] * (megabytes * 3 // 4)}
+
+
+VARIANTS: t.Dict[str, t.Callable[[str, str, int], t.Any]] = {
+    "dump": lambda path, backend, megabytes: json.dump(
+        document(megabytes), path, backend=backend, ndarray_encoding="base64"
+    ),
+    "dump_bytes": lambda path, backend, megabytes: json.dump_bytes(
+        document(megabytes), path, backend=backend, ndarray_encoding="base64"
+    ),
+    "load": lambda path, backend, megabytes: json.load(path, backend=backend),
+    "load_bytes": lambda path, backend, megabytes: json.load_bytes(
+        path, backend=backend
+    ),
+}
+
+
+@click.command()
+@click.option("--megabytes", default=500, show_default=True)
+@click.option("--backend", "backends", multiple=True)
+@click.option("--run", type=(str, str, str), hidden=True)
+def main(megabytes: int, backends: t.Tuple[str, ...], run: t.Any) -> None:
+    if run is not None:
+        variant, path, backend = run
+        start = time.perf_counter()
+        VARIANTS[variant](path, backend, megabytes)
+        elapsed = time.perf_counter() - start
+        click.echo(
+            f"{backend:>10} {variant:>10}: {elapsed:5.1f} s, "
+            f"peak RSS {peak_rss_mb():7.1f} MB"
+        )
+        return
+
+    backends = backends or ("simplejson", "orjson")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "document.json")
+        for backend in backends:
+            for variant in VARIANTS:
+                subprocess.run(
+                    [
+                        sys.executable,
+                        "-m",
+                        "benchmarks.bytes_memory",
+                        "--megabytes",
+                        str(megabytes),
+                        "--run",
+                        variant,
+                        path,
+                        backend,
+                    ],
+                    check=True,
+                )
+        click.echo(f"document: {os.path.getsize(path) / 1e6:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
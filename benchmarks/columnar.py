@@ -0,0 +1,48 @@
+"""
+Compare dumping and loading a long list of dicts with the same keys as it is
+and by column.
+
+    python -m benchmarks.columnar --rows 300000
+"""
+
+import timeit
+import typing as t
+import click
+from missouri import json
+
+
+@click.command()
+@click.option("--rows", default=300_000, show_default=True)
+def main(rows: int) -> None:
+    document = [{"x": i / 3, "y": i / 7, "id": i} for i in range(rows)]
+    cases: t.List[t.Tuple[str, t.Dict[str, t.Any], t.Dict[str, t.Any]]] = [
+        ("as is", {}, {}),
+        ("columnar", {"columnar": True}, {"columns_as": "records"}),
+        (
+            "columnar base64",
+            {"columnar": True, "ndarray_encoding": "base64"},
+            {"columns_as": "records"},
+        ),
+        (
+            "structured",
+            {"columnar": True, "ndarray_encoding": "base64"},
+            {"columns_as": "structured"},
+        ),
+    ]
+    for label, dump_kwargs, load_kwargs in cases:
+        data = json.dumps(document, **dump_kwargs)
+        dump = min(
+            timeit.repeat(
+                lambda: json.dumps(document, **dump_kwargs), number=1, repeat=3
+            )
+        )
+        load = min(
+            timeit.repeat(lambda: json.loads(data, **load_kwargs), number=1, repeat=3)
+        )
+        click.echo(
+            f"{label:>15}: dumps {dump:6.3f} s, loads {load:6.3f} s, {len(data) / 1e6:6.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compare the wall time and size on disk of round-tripping a large,
+ndarray-heavy document through each compression format.
+
+    python -m benchmarks.compression --frames 2000
+"""
+
+import importlib.util
+import os
+import tempfile
+import time
+import typing as t
+import click
+from missouri import json
+import numpy as np
+
+FORMATS = {
+    "none": ("json", None),
+    "gzip": ("json.gz", None),
+    "bz2": ("json.bz2", None),
+    "xz": ("json.xz", None),
+    "zstd": ("json.zst", "zstandard"),
+    "lz4": ("json.lz4", "lz4"),
+}
+
+
+def document(frames: int) -> t.Dict[str, t.Any]:
+    rng = np.random.default_rng(0)
+    # Quantized coordinates, which compress like real scan data rather than
+    # like random noise.
+    points = np.round(rng.normal(size=(1000, 3)), 3).astype(np.float32)
+    return {
+        "frames": [
+            {"index": i, "points": points + np.float32(i), "label": f"frame {i}"}
+            for i in range(frames)
+        ]
+    }
+
+
+@click.command()
+@click.option("--frames", default=500, show_default=True)
+@click.option("--compresslevel", type=int, default=None)
+@click.option(
+    "--ndarray-encoding", type=click.Choice(["list", "base64"]), default="list"
+)
+def main(frames: int, compresslevel: t.Optional[int], ndarray_encoding: str) -> None:
+    data = document(frames)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for compression, (extension, module) in FORMATS.items():
+            if module is not None and importlib.util.find_spec(module) is None:
+                click.echo(f"{compression:>5}: skipped, {module} is not installed")
+                continue
+            path = os.path.join(tmpdir, f"document.{extension}")
+            kwargs = {} if compresslevel is None else {"compresslevel": compresslevel}
+
+            start = time.perf_counter()
+            json.dump(data, path, ndarray_encoding=ndarray_encoding, **kwargs)
+            dumped = time.perf_counter() - start
+
+            start = time.perf_counter()
+            json.load(path)
+            loaded = time.perf_counter() - start
+
+            click.echo(
+                f"{compression:>5}: {os.path.getsize(path) / 1e6:7.1f} MB, "
+                f"dump {dumped:5.2f} s, load {loaded:5.2f} s"
+            )
+
+
+if __name__ == "__main__":
+    main()
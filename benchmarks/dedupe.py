@@ -0,0 +1,54 @@
+"""
+Compare the size and dump time of a document in which many meshes share the
+same topology array and material dict, with and without `dedupe`.
+
+    python -m benchmarks.dedupe --meshes 100 --faces 100000
+"""
+
+import timeit
+import click
+from missouri import json
+import numpy as np
+
+
+@click.command()
+@click.option("--meshes", default=100, show_default=True)
+@click.option("--faces", default=20_000, show_default=True)
+def main(meshes: int, faces: int) -> None:
+    rng = np.random.default_rng(0)
+    topology = rng.integers(0, faces // 2, (faces, 3), dtype=np.int32)
+    material = {"color": [0.8, 0.2, 0.2], "shininess": 0.5}
+    document = {
+        "meshes": [
+            {
+                "faces": topology,
+                # An equal copy, which only dedupe="content" finds.
+                "outline": topology[:100].copy(),
+                "material": material,
+                "offset": [float(i), 0.0, 0.0],
+            }
+            for i in range(meshes)
+        ]
+    }
+    for label, kwargs in [
+        ("no dedupe", {}),
+        ("dedupe=identity", {"dedupe": "identity"}),
+        ("dedupe=content", {"dedupe": "content"}),
+    ]:
+        text = json.dumps(document, **kwargs)
+        dump_time = min(
+            timeit.repeat(lambda: json.dumps(document, **kwargs), number=1, repeat=3)
+        )
+        load_time = min(
+            timeit.repeat(
+                lambda: json.loads(text, dedupe=bool(kwargs)), number=1, repeat=3
+            )
+        )
+        click.echo(
+            f"{label:>16}: {len(text) / 1e6:7.1f} MB, "
+            f"dumps {dump_time:6.3f} s, loads {load_time:6.3f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
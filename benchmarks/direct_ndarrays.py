@@ -0,0 +1,79 @@
+"""
+Compare the time and peak RSS of loading a mesh whose arrays are encoded as
+nested lists, with and without `direct_ndarrays`. The document is written,
+and each load run, in a fresh process, so their peak RSS is not inherited.
+
+    python -m benchmarks.direct_ndarrays --vertices 10000000
+"""
+
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import typing as t
+import click
+from missouri import json
+import numpy as np
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+VARIANTS: t.Dict[str, t.Callable[[str], t.Any]] = {
+    "load": lambda path: json.load(path),
+    "load direct": lambda path: json.load(path, direct_ndarrays=True),
+    "load_bytes direct": lambda path: json.load_bytes(path, direct_ndarrays=True),
+}
+
+
+@click.command()
+@click.option("--vertices", default=1_000_000, show_default=True)
+@click.option("--run", type=(str, str), hidden=True)
+def main(vertices: int, run: t.Any) -> None:
+    if run is not None:
+        variant, path = run
+        if variant == "dump":
+            rng = np.random.default_rng(0)
+            json.dump(
+                {
+                    "v": rng.random((vertices, 3), dtype=np.float32),
+                    "f": rng.integers(0, vertices, (2 * vertices, 3), dtype=np.uint32),
+                },
+                path,
+            )
+            click.echo(
+                f"document: {os.path.getsize(path) / 1e6:.0f} MB, "
+                f"arrays: {vertices * 36 / 1e6:.0f} MB"
+            )
+            return
+        start = time.perf_counter()
+        mesh = VARIANTS[variant](path)
+        elapsed = time.perf_counter() - start
+        assert mesh["v"].shape == (vertices, 3)
+        click.echo(f"{variant:>18}: {elapsed:6.2f} s, peak RSS {peak_rss_mb():7.1f} MB")
+        return
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "mesh.json")
+        for variant in ["dump", *VARIANTS]:
+            subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "benchmarks.direct_ndarrays",
+                    "--vertices",
+                    str(vertices),
+                    "--run",
+                    variant,
+                    path,
+                ],
+                check=True,
+            )
+
+
+if __name__ == "__main__":
+    main()
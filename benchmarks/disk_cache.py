@@ -0,0 +1,46 @@
+"""
+Compare loading a document with many arrays and records without a cache,
+when the cache is cold, and when it is warm.
+
+    python -m benchmarks.disk_cache --rows 1000000 --records 100000
+"""
+
+import os
+import tempfile
+import timeit
+import click
+from missouri import json
+from missouri.cachelib import DiskCache
+import numpy as np
+
+
+@click.command()
+@click.option("--rows", default=1_000_000, show_default=True)
+@click.option("--records", default=100_000, show_default=True)
+def main(rows: int, records: int) -> None:
+    rng = np.random.default_rng(0)
+    document = {
+        "vertices": rng.random((rows, 3)),
+        "faces": rng.integers(0, rows, (rows, 3), dtype=np.int32),
+        "records": [{"id": i, "label": f"item {i}"} for i in range(records)],
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "example.json")
+        json.dump(document, path)
+        cache = DiskCache(os.path.join(directory, "cache"))
+
+        def cold() -> None:
+            cache.clear()
+            json.load(path, cache=cache)
+
+        for label, function in [
+            ("no cache", lambda: json.load(path)),
+            ("cold cache", cold),
+            ("warm cache", lambda: json.load(path, cache=cache)),
+        ]:
+            elapsed = min(timeit.repeat(function, number=1, repeat=3))
+            click.echo(f"{label:>10}: {elapsed:7.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Stream the frames out of a large synthetic single-document JSON file with
+`json.iter_items`, reporting peak RSS. Peak RSS should stay flat as --megabytes
+grows, while `json.load` grows with the file.
+
+    python -m benchmarks.iter_items_memory --megabytes 4000
+"""
+
+import os
+import resource
+import tempfile
+import time
+import click
+from missouri import json
+import numpy as np
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def write_document(path: str, count: int) -> None:
+    # Write the frames one at a time so writing doesn't dominate peak RSS.
+    points = np.random.default_rng(0).random((64, 3), dtype=np.float32)
+    with open(path, "w") as f:
+        f.write('{"version": 1, "frames": [')
+        for i in range(count):
+            if i:
+                f.write(", ")
+            f.write(json.dumps({"index": i, "points": points}))
+        f.write("]}")
+
+
+@click.command()
+@click.option("--megabytes", default=1000, show_default=True)
+@click.option("--compare-load/--no-compare-load", default=False)
+def main(megabytes: int, compare_load: bool) -> None:
+    # Each frame is about 4.1 KB once encoded.
+    count = megabytes * 1000 * 1000 // 4100
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "frames.json")
+        write_document(path, count)
+        size = os.path.getsize(path) / 1e6
+        click.echo(f"document: {count} frames, {size:.0f} MB")
+        click.echo(f"baseline: peak RSS {peak_rss_mb():7.1f} MB")
+
+        start = time.perf_counter()
+        loaded = sum(1 for _ in json.iter_items(path, "frames.item"))
+        elapsed = time.perf_counter() - start
+        assert loaded == count
+        click.echo(
+            f"iter_items: {loaded} frames in {elapsed:.1f} s, "
+            f"peak RSS {peak_rss_mb():7.1f} MB"
+        )
+
+        if compare_load:
+            start = time.perf_counter()
+            loaded = len(json.load(path)["frames"])
+            elapsed = time.perf_counter() - start
+            click.echo(
+                f"load:       {loaded} frames in {elapsed:.1f} s, "
+                f"peak RSS {peak_rss_mb():7.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
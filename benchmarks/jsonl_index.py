@@ -0,0 +1,65 @@
+"""
+Compare reading random records from an indexed JSON Lines file, by position
+and by key, with scanning the file for them.
+
+    python -m benchmarks.jsonl_index --records 10000000
+"""
+
+import os
+import random
+import tempfile
+import time
+import typing as t
+import click
+from missouri import jsonl
+
+
+def records(count: int) -> t.Iterator[t.Dict[str, t.Any]]:
+    for i in range(count):
+        yield {"id": f"record-{i}", "index": i, "values": [i, i + 1, i + 2]}
+
+
+@click.command()
+@click.option("--records", "count", default=10_000_000, show_default=True)
+@click.option("--lookups", default=1000, show_default=True)
+@click.option("--scans", default=3, show_default=True)
+def main(count: int, lookups: int, scans: int) -> None:
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "records.jsonl")
+        start = time.perf_counter()
+        jsonl.dump_indexed(records(count), path, key="id")
+        click.echo(f"write: {time.perf_counter() - start:.1f} s")
+
+        positions = [rng.randrange(count) for _ in range(lookups)]
+        with jsonl.IndexedReader(path) as reader:
+            start = time.perf_counter()
+            for n in positions:
+                reader[n]
+            per_position = (time.perf_counter() - start) / lookups
+
+            start = time.perf_counter()
+            for n in positions:
+                reader.lookup(f"record-{n}")
+            per_key = (time.perf_counter() - start) / lookups
+
+            start = time.perf_counter()
+            reader.get_many(positions)
+            per_batch = (time.perf_counter() - start) / lookups
+
+        start = time.perf_counter()
+        for n in positions[:scans]:
+            next(record for record in jsonl.iter_load(path) if record["index"] == n)
+        per_scan = (time.perf_counter() - start) / scans
+
+        for label, elapsed in [
+            ("by position", per_position),
+            ("by key", per_key),
+            ("get_many", per_batch),
+            ("linear scan", per_scan),
+        ]:
+            click.echo(f"{label:>11}: {elapsed * 1e6:12.1f} us per record")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Write and read back a large synthetic JSON Lines file, reporting peak RSS
+after each phase. Peak RSS should stay flat as --megabytes grows.
+
+    python -m benchmarks.jsonl_memory --megabytes 4000
+"""
+
+import os
+import resource
+import tempfile
+import time
+import typing as t
+import click
+from missouri import jsonl
+import numpy as np
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def records(count: int) -> t.Iterator[t.Dict[str, t.Any]]:
+    points = np.random.default_rng(0).random((64, 3), dtype=np.float32)
+    for i in range(count):
+        yield {"id": i, "label": f"record-{i}", "points": points}
+
+
+@click.command()
+@click.option("--megabytes", default=1000, show_default=True)
+def main(megabytes: int) -> None:
+    # Each record is about 1.15 KB once encoded.
+    count = megabytes * 1000 * 1000 // 1150
+    click.echo(f"baseline: peak RSS {peak_rss_mb():7.1f} MB")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "records.jsonl")
+
+        start = time.perf_counter()
+        jsonl.dump_iter(records(count), path, ndarray_encoding="base64")
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(path) / 1e6
+        click.echo(
+            f"dump_iter: {count} records, {size:.0f} MB in {elapsed:.1f} s, "
+            f"peak RSS {peak_rss_mb():7.1f} MB"
+        )
+
+        start = time.perf_counter()
+        loaded = sum(1 for _ in jsonl.iter_load(path))
+        elapsed = time.perf_counter() - start
+        assert loaded == count
+        click.echo(
+            f"iter_load: {loaded} records in {elapsed:.1f} s, "
+            f"peak RSS {peak_rss_mb():7.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Compare decoding and encoding a large JSON Lines file in one process with
+doing it on a pool of processes, for increasing numbers of workers.
+
+    python -m benchmarks.jsonl_parallel --records 2000000 --workers 1,2,4,8
+"""
+
+import os
+import tempfile
+import time
+import typing as t
+import click
+from missouri import jsonl
+
+
+def records(count: int) -> t.Iterator[t.Dict[str, t.Any]]:
+    for i in range(count):
+        yield {
+            "id": i,
+            "label": f"record-{i}",
+            "scores": [i * 0.5, i * 0.25, i * 0.125],
+            "tags": {"even": i % 2 == 0, "group": i % 7},
+        }
+
+
+def label(record: t.Dict[str, t.Any]) -> str:
+    return record["label"]
+
+
+def timed(function: t.Callable[[], t.Any]) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+@click.command()
+@click.option("--records", "count", default=2_000_000, show_default=True)
+@click.option(
+    "--workers",
+    default=",".join(str(2**i) for i in range(4)),
+    show_default=True,
+    help="Comma-separated numbers of workers",
+)
+def main(count: int, workers: str) -> None:
+    click.echo(f"{os.cpu_count()} CPUs")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "records.jsonl")
+        write = timed(lambda: jsonl.dump_iter(records(count), path))
+        read = timed(lambda: sum(1 for _ in jsonl.iter_load(path)))
+        click.echo(f"{'serial':>10}: write {write:6.2f} s, read {read:6.2f} s")
+        click.echo("Reading in parallel, with records sent back, or only their labels:")
+
+        for n in [int(value) for value in workers.split(",")]:
+            write = timed(
+                lambda: jsonl.dump_iter_parallel(records(count), path, workers=n)
+            )
+            read = timed(
+                lambda: sum(1 for _ in jsonl.iter_load_parallel(path, workers=n))
+            )
+            labels = timed(
+                lambda: sum(1 for _ in jsonl.iter_load_parallel(path, label, workers=n))
+            )
+            click.echo(
+                f"{n:>2} workers: write {write:6.2f} s, read {read:6.2f} s, labels {labels:6.2f} s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Compare reading a few values out of a large document with `load` and with
+`load_lazy`.
+
+    python -m benchmarks.load_lazy --rows 1000000 --records 100000
+"""
+
+import os
+import tempfile
+import timeit
+import click
+from missouri import json
+import numpy as np
+
+
+@click.command()
+@click.option("--rows", default=1_000_000, show_default=True)
+@click.option("--records", default=100_000, show_default=True)
+def main(rows: int, records: int) -> None:
+    rng = np.random.default_rng(0)
+    document = {
+        "vertices": rng.random((rows, 3)),
+        "faces": rng.integers(0, rows, (rows, 3), dtype=np.int32),
+        "records": [{"id": i, "label": f"item {i}"} for i in range(records)],
+        "name": "mesh",
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "example.json")
+        json.dump(document, path)
+
+        for label, function in [
+            ("load name", lambda: json.load(path)["name"]),
+            ("lazy name", lambda: json.load_lazy(path)["name"]),
+            ("lazy record", lambda: json.load_lazy(path)["records"][-1]["label"]),
+            ("lazy faces", lambda: json.load_lazy(path)["faces"]),
+        ]:
+            elapsed = min(timeit.repeat(function, number=1, repeat=3))
+            click.echo(f"{label:>11}: {elapsed:7.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Compare loading many files serially and with `load_many`, and returning
+arrays from worker processes through shared memory against pickling them.
+
+    python -m benchmarks.load_many --files 200 --workers 4
+"""
+
+import os
+import tempfile
+import timeit
+import typing as t
+import click
+from missouri import json, poollib
+import numpy as np
+
+
+@click.command()
+@click.option("--files", default=100, show_default=True)
+@click.option("--workers", default=os.cpu_count(), show_default=True)
+@click.option("--array-megabytes", default=8, show_default=True)
+def main(files: int, workers: int, array_megabytes: int) -> None:
+    array = np.random.default_rng(0).random(array_megabytes * (1 << 20) // 8)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = [os.path.join(tmpdir, f"{i}.json") for i in range(files)]
+        records = {"records": [{"id": i, "name": f"record {i}"} for i in range(2000)]}
+        json.dump_many(
+            {path: {"array": array, **records} for path in paths},
+            workers=workers,
+            ndarray_encoding="base64",
+        )
+
+        def run(name: str, load: t.Callable[[], t.Any]) -> None:
+            elapsed = min(timeit.repeat(load, number=1, repeat=3))
+            click.echo(f"{name:>30}: {elapsed:6.3f} s")
+
+        run("serial", lambda: [json.load(path) for path in paths])
+        run("threads", lambda: json.load_many(paths, workers=workers))
+        run(
+            "processes, shared memory",
+            lambda: json.load_many(paths, workers=workers, executor="process"),
+        )
+        threshold = poollib.SHARED_MEMORY_THRESHOLD
+        poollib.SHARED_MEMORY_THRESHOLD = 1 << 62
+        try:
+            run(
+                "processes, pickled",
+                lambda: json.load_many(paths, workers=workers, executor="process"),
+            )
+        finally:
+            poollib.SHARED_MEMORY_THRESHOLD = threshold
+
+
+if __name__ == "__main__":
+    main()
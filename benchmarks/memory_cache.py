@@ -0,0 +1,42 @@
+"""
+Compare loading a small config document and a model with a large array over
+and over with `load` and with `cached_load`.
+
+    python -m benchmarks.memory_cache --number 1000
+"""
+
+import os
+import tempfile
+import timeit
+import click
+from missouri import json
+import numpy as np
+
+
+@click.command()
+@click.option("--number", default=1000, show_default=True)
+def main(number: int) -> None:
+    config = {
+        "name": "service",
+        "features": {f"flag_{i}": i % 2 == 0 for i in range(100)},
+        "thresholds": [i / 10 for i in range(100)],
+    }
+    model = {"weights": np.random.default_rng(0).random((1000, 100)), "bias": 0.5}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, document in [("config", config), ("model", model)]:
+            path = os.path.join(directory, f"{name}.json")
+            json.dump(document, path)
+            for label, function in [
+                ("load", json.load),
+                ("cached_load", json.cached_load),
+            ]:
+                elapsed = min(
+                    timeit.repeat(lambda: function(path), number=number, repeat=3)
+                )
+                click.echo(
+                    f"{name:>6} {label:>11}: {elapsed / number * 1e6:9.1f} us per load"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Measure the per-object overhead of the JSONEncoder and JSONDecoder hooks.
+
+    python -m benchmarks.method_list_caller --records 1000000
+"""
+
+import timeit
+import typing as t
+import click
+from missouri import json
+from missouri.coding import JSONDecoder, JSONEncoder
+
+
+class Point:
+    def __init__(self, x: float, y: float):
+        self.x = x
+        self.y = y
+
+
+class LegacyPointEncoder(JSONEncoder):
+    def encode(self, obj: t.Any) -> t.Any:
+        if isinstance(obj, Point):
+            return {"x": obj.x, "y": obj.y}
+        else:
+            return None
+
+
+class PointEncoder(JSONEncoder):
+    def __init__(self) -> None:
+        super().__init__()
+        self.register_type(Point, lambda obj: {"x": obj.x, "y": obj.y})
+
+
+def per_call(fn: t.Callable[[], t.Any], number: int = 1_000_000) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=3)) / number
+
+
+@click.command()
+@click.option("--records", default=1_000_000, show_default=True)
+def main(records: int) -> None:
+    decoder = JSONDecoder()
+    record = {"id": 7, "name": "vertex"}
+    click.echo(
+        f"JSONDecoder()(dict):            {per_call(lambda: decoder(record)) * 1e9:6.0f} ns"
+    )
+
+    point = Point(1.0, 2.0)
+    legacy_encoder = LegacyPointEncoder()
+    click.echo(
+        f"encode() override:              {per_call(lambda: legacy_encoder(point)) * 1e9:6.0f} ns"
+    )
+    if hasattr(JSONEncoder, "register_type"):
+        encoder = PointEncoder()
+        click.echo(
+            f"register_type(Point, ...):      {per_call(lambda: encoder(point)) * 1e9:6.0f} ns"
+        )
+
+    text = json.dumps([{"id": i, "name": "vertex"} for i in range(records)])
+    elapsed = min(timeit.repeat(lambda: json.loads(text), number=1, repeat=3))
+    click.echo(f"loads {records} small dicts:  {elapsed:6.3f} s")
+
+
+if __name__ == "__main__":
+    main()
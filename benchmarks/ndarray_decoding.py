@@ -0,0 +1,46 @@
+"""
+Compare decoding (N, 3) float32 arrays from nested lists with `np.array`,
+which works out the shape itself, and with the recorded shape.
+
+    python -m benchmarks.ndarray_decoding --vertices 1000000 --vertices 10000000
+"""
+
+import timeit
+import typing as t
+import click
+from missouri import json
+import numpy as np
+
+
+@click.command()
+@click.option(
+    "--vertices", multiple=True, type=int, default=[10_000, 100_000, 1_000_000]
+)
+def main(vertices: t.Tuple[int, ...]) -> None:
+    for count in vertices:
+        array = np.random.default_rng(0).random((count, 3), dtype=np.float32)
+        encoded = json.dumps(array)
+
+        def load_without_shape() -> t.Any:
+            # `np.array`, as used for documents which don't record the shape.
+            return json.loads(encoded.replace(', "shape": [%d, 3]' % count, ""))
+
+        def load() -> t.Any:
+            return json.loads(encoded)
+
+        np.testing.assert_array_equal(load(), array)
+        np.testing.assert_array_equal(load_without_shape(), array)
+        baseline = min(timeit.repeat(load_without_shape, number=1, repeat=3))
+        elapsed = min(timeit.repeat(load, number=1, repeat=3))
+        # Take the time to parse the document out, to compare array construction.
+        parse = min(
+            timeit.repeat(lambda: json.loads(encoded, decoder=None), number=1, repeat=3)
+        )
+        click.echo(
+            f"{count:>10}: load {baseline:7.3f} s -> {elapsed:7.3f} s, "
+            f"of which building the array {baseline - parse:7.3f} s -> {elapsed - parse:7.3f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Compare dump and load of a large float32 array using the default nested-list
+ndarray encoding and the base64 encoding.
+
+    python -m benchmarks.ndarray_encoding --vertices 10000000
+"""
+
+import time
+import tracemalloc
+import typing as t
+import click
+from missouri import json
+import numpy as np
+
+
+def measure(fn: t.Callable[[], t.Any]) -> t.Tuple[t.Any, float, int]:
+    # Tracing allocations slows the workload down considerably, so time it on a
+    # separate, untraced run.
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+@click.command()
+@click.option("--vertices", default=1_000_000, show_default=True)
+def main(vertices: int) -> None:
+    array = np.random.default_rng(0).random((vertices, 3), dtype=np.float32)
+    click.echo(f"array: {array.shape} {array.dtype}, {array.nbytes / 1e6:.1f} MB")
+    for encoding in ("list", "base64"):
+        text, dump_time, dump_peak = measure(
+            lambda: json.dumps(array, ndarray_encoding=encoding)
+        )
+        loaded, load_time, load_peak = measure(lambda: json.loads(text))
+        np.testing.assert_array_equal(loaded, array)
+        click.echo(
+            f"{encoding:>6}: "
+            f"dump {dump_time:7.3f} s, peak {dump_peak / 1e6:8.1f} MB | "
+            f"load {load_time:7.3f} s, peak {load_peak / 1e6:8.1f} MB | "
+            f"size {len(text) / 1e6:8.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""
+Measure dumping numpy scalars, which are encoded one at a time by
+`encode_numpy`.
+
+    python -m benchmarks.numpy_scalars --count 1000000
+"""
+
+import timeit
+import click
+from missouri import json
+import numpy as np
+
+
+@click.command()
+@click.option("--count", default=1_000_000, show_default=True)
+def main(count: int) -> None:
+    rng = np.random.default_rng(0)
+    workloads = {
+        "float32": list(rng.random(count, dtype=np.float32)),
+        "int64": list(rng.integers(0, 1000, count)),
+        "bool": list(rng.random(count) > 0.5),
+    }
+    for name, scalars in workloads.items():
+        elapsed = min(timeit.repeat(lambda: json.dumps(scalars), number=1, repeat=3))
+        click.echo(f"dumps {count} {name:>7} scalars: {elapsed:6.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Compare the size and dump time of a document at several precisions: a float32
+array, written as nested lists, and nested lists of Python floats.
+
+    python -m benchmarks.precision --vertices 1000000
+"""
+
+import timeit
+import typing as t
+import click
+from missouri import json
+import numpy as np
+
+
+@click.command()
+@click.option("--vertices", default=1_000_000, show_default=True)
+def main(vertices: int) -> None:
+    rng = np.random.default_rng(0)
+    documents = {
+        "float32 array": rng.random((vertices, 3), dtype=np.float32) * 100,
+        "Python floats": (rng.random((vertices // 10, 3)) * 100).tolist(),
+    }
+    options: t.List[t.Tuple[str, t.Dict[str, int]]] = [
+        ("full", {}),
+        ("precision=6", {"precision": 6}),
+        ("precision=4", {"precision": 4}),
+        ("precision=2", {"precision": 2}),
+        ("significant_digits=4", {"significant_digits": 4}),
+    ]
+    for name, document in documents.items():
+        click.echo(name)
+        for label, kwargs in options:
+            text = json.dumps(document, **kwargs)
+            elapsed = min(
+                timeit.repeat(
+                    lambda: json.dumps(document, **kwargs), number=1, repeat=3
+                )
+            )
+            click.echo(
+                f"{label:>22}: {len(text) / 1e6:7.1f} MB, dumps {elapsed:6.3f} s, "
+                f"{len(text) / 1e6 / elapsed:6.1f} MB/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
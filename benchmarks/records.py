@@ -0,0 +1,79 @@
+"""
+Compare dumping dataclasses with a hand-written `for_json()`, with an encoder
+registered with `register_type()` which calls `dataclasses.asdict()`, and
+with the built-in record encoder, untagged and tagged.
+
+    python -m benchmarks.records --records 200000
+"""
+
+import dataclasses
+import enum
+import timeit
+import click
+from missouri import json
+from missouri.coding import JSONEncoder
+
+
+class Status(enum.Enum):
+    ACTIVE = "active"
+    RETIRED = "retired"
+
+
+@dataclasses.dataclass(slots=True)
+class Position:
+    x: float
+    y: float
+
+
+@dataclasses.dataclass(slots=True)
+class Robot:
+    id: int
+    name: str
+    status: Status
+    position: Position
+
+
+class ForJsonRobot(Robot):
+    __slots__ = ()
+
+    def for_json(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status.value,
+            "position": {"x": self.position.x, "y": self.position.y},
+        }
+
+
+@click.command()
+@click.option("--records", default=200_000, show_default=True)
+def main(records: int) -> None:
+    def robots(cls: type) -> list:
+        return [
+            cls(i, f"robot {i}", Status.ACTIVE, Position(i * 0.5, i * 0.25))
+            for i in range(records)
+        ]
+
+    asdict_encoder = JSONEncoder()
+    asdict_encoder.register_type(Robot, dataclasses.asdict)
+    asdict_encoder.register_type(Status, lambda status: status.value)
+    plain = robots(Robot)
+    for_json_robots = robots(ForJsonRobot)
+    for label, function in [
+        ("for_json", lambda: json.dumps(for_json_robots)),
+        ("asdict", lambda: json.dumps(plain, encoder=asdict_encoder)),
+        ("built-in", lambda: json.dumps(plain)),
+        ("built-in tagged", lambda: json.dumps(plain, tagged=True)),
+    ]:
+        elapsed = min(timeit.repeat(function, number=1, repeat=3))
+        click.echo(f"{label:>15}: dumps {elapsed:6.2f} s")
+
+    text = json.dumps(plain, tagged=True)
+    elapsed = min(
+        timeit.repeat(lambda: json.loads(text, tagged=True), number=1, repeat=3)
+    )
+    click.echo(f"{'tagged':>15}: loads {elapsed:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Compare dumping and loading records of a fixed shape, which hold numpy
+scalars and small arrays, with the generic encoder and decoder and with a
+compiled schema.
+
+    python -m benchmarks.schema --records 1000000
+"""
+
+import time
+import typing as t
+import click
+from missouri import json
+from missouri.coding import compile_schema
+import numpy as np
+
+
+class Detection(t.TypedDict):
+    id: int
+    label: str
+    score: np.float32
+    count: np.int64
+    box: np.ndarray
+
+
+@click.command()
+@click.option("--records", default=1_000_000, show_default=True)
+def main(records: int) -> None:
+    rng = np.random.default_rng(0)
+    scores = rng.random(records, dtype=np.float32)
+    boxes = rng.random((records, 4))
+    detections: t.List[Detection] = [
+        {
+            "id": i,
+            "label": f"object {i % 100}",
+            "score": scores[i],
+            "count": np.int64(i % 7),
+            "box": boxes[i],
+        }
+        for i in range(records)
+    ]
+    schema = compile_schema(Detection)
+
+    start = time.perf_counter()
+    text = json.dumps(detections)
+    dumps_time = time.perf_counter() - start
+    start = time.perf_counter()
+    json.loads(text)
+    loads_time = time.perf_counter() - start
+    click.echo(f"  generic: dumps {dumps_time:6.2f} s, loads {loads_time:6.2f} s")
+
+    start = time.perf_counter()
+    compiled_text = json.dumps([schema.encode(detection) for detection in detections])
+    dumps_time = time.perf_counter() - start
+    start = time.perf_counter()
+    [schema.decode(obj) for obj in json.loads(compiled_text, decoder=None)]
+    loads_time = time.perf_counter() - start
+    click.echo(f" compiled: dumps {dumps_time:6.2f} s, loads {loads_time:6.2f} s")
+    assert compiled_text == text
+
+
+if __name__ == "__main__":
+    main()
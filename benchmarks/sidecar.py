@@ -0,0 +1,53 @@
+"""
+Compare dumping and loading large arrays inline (base64) and in a
+memory-mapped sidecar file.
+
+    python -m benchmarks.sidecar --megabytes 5000
+"""
+
+import os
+import tempfile
+import time
+import click
+from missouri import json
+import numpy as np
+
+
+@click.command()
+@click.option("--megabytes", default=500, show_default=True)
+def main(megabytes: int) -> None:
+    rows = megabytes * 1000 * 1000 // (2 * 3 * 4)
+    rng = np.random.default_rng(0)
+    data = {
+        "vertices": rng.random((rows, 3), dtype=np.float32),
+        "normals": rng.random((rows, 3), dtype=np.float32),
+    }
+    click.echo(f"arrays: 2 x {data['vertices'].shape} float32")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "data.json")
+        for name, kwargs in (
+            ("base64", {"ndarray_encoding": "base64"}),
+            ("sidecar", {"sidecar_threshold": 1 << 20}),
+        ):
+            start = time.perf_counter()
+            json.dump(data, path, **kwargs)
+            dump_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            loaded = json.load(path)
+            load_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            first_row = loaded["vertices"][0].copy()
+            access_time = time.perf_counter() - start
+            np.testing.assert_equal(first_row, data["vertices"][0])
+
+            click.echo(
+                f"{name:>7}: dump {dump_time:6.2f} s | load {load_time:8.4f} s | "
+                f"read first row {access_time * 1e6:6.0f} us"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Run representative workloads through the dump and load functions, and compare
+the results with a baseline to catch performance regressions.
+
+    ./dev.py bench --save-baseline
+    ./dev.py bench --filter arrays --output results.json
+
+Each workload is encoded and decoded to and from a string, and to and from a
+file. Each case reports its median, 90th and 99th percentile latency over
+`--repeat` runs, its throughput in megabytes of JSON per second, and the peak
+memory traced during one more run.
+
+When the baseline file exists, and `--save-baseline` isn't passed, each case
+is compared with it, and the command exits with status 1 when the median
+latency or the peak memory of any case grows by more than its threshold.
+Baselines are specific to a machine, and only comparable at the same
+`--scale` and with the same backend.
+"""
+
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import typing as t
+import click
+from missouri import json
+import numpy as np
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+class Point:
+    def __init__(self, x: float, y: float):
+        self.x = x
+        self.y = y
+
+    def for_json(self) -> t.Dict[str, float]:
+        return {"x": self.x, "y": self.y}
+
+
+def nested(depth: int) -> t.Dict[str, t.Any]:
+    document: t.Dict[str, t.Any] = {"leaf": [1, 2.5, "three", None]}
+    for level in range(depth):
+        document = {"level": level, "child": document, "siblings": [level, {}]}
+    return document
+
+
+def workloads(scale: float) -> t.Dict[str, t.Tuple[t.Any, t.Dict[str, t.Any]]]:
+    """
+    Return each workload's document, with the keyword arguments it's dumped
+    with.
+    """
+
+    def count(n: int) -> int:
+        return max(1, round(n * scale))
+
+    rng = np.random.default_rng(0)
+    float32_arrays = [
+        rng.random(shape, dtype=np.float32)
+        for shape in [(count(200_000),), (count(50_000), 3), (count(100), 32, 32)]
+    ]
+    int64_arrays = [
+        rng.integers(-(10**12), 10**12, shape)
+        for shape in [(count(200_000),), (count(50_000), 3), (count(100), 32, 32)]
+    ]
+    return {
+        "small_dicts": (
+            [
+                {"id": i, "name": f"item {i}", "score": i / 7, "active": i % 2 == 0}
+                for i in range(count(100_000))
+            ],
+            {},
+        ),
+        "deep_nesting": ([nested(100) for _ in range(count(500))], {}),
+        "float32_arrays": (float32_arrays, {}),
+        "int64_arrays": (int64_arrays, {}),
+        "base64_arrays": (
+            float32_arrays + int64_arrays,
+            {"ndarray_encoding": "base64"},
+        ),
+        "numpy_scalars": (
+            [
+                {"x": np.float32(i / 3), "y": np.float64(i / 7), "id": np.int64(i)}
+                for i in range(count(50_000))
+            ],
+            {},
+        ),
+        "for_json": ([Point(i, i / 3) for i in range(count(100_000))], {}),
+    }
+
+
+def percentile(values: t.List[float], fraction: float) -> float:
+    """
+    Return the percentile of `values`, interpolating between the nearest ones.
+    """
+    values = sorted(values)
+    position = (len(values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def measure(run: t.Callable[[], t.Any], repeat: int, size: int) -> t.Dict[str, float]:
+    run()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    # Tracing allocations slows the run down, so it isn't timed.
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    median = statistics.median(times)
+    return {
+        "p50_s": median,
+        "p90_s": percentile(times, 0.9),
+        "p99_s": percentile(times, 0.99),
+        "throughput_mb_s": size / 1e6 / median,
+        "peak_memory_mb": peak / 1e6,
+    }
+
+
+def run_suite(
+    scale: float, repeat: int, backend: str, filters: t.Tuple[str, ...]
+) -> t.Dict[str, t.Any]:
+    cases = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, (document, dump_kwargs) in workloads(scale).items():
+            selected = [
+                operation
+                for operation in ["dumps", "loads", "dump", "load"]
+                if not filters
+                or any(pattern in f"{name}.{operation}" for pattern in filters)
+            ]
+            if not selected:
+                continue
+            text = json.dumps(document, backend=backend, **dump_kwargs)
+            path = os.path.join(directory, f"{name}.json")
+            json.dump(document, path, backend=backend, **dump_kwargs)
+            operations: t.Dict[str, t.Callable[[], t.Any]] = {
+                "dumps": lambda: json.dumps(document, backend=backend, **dump_kwargs),
+                "loads": lambda: json.loads(text, backend=backend),
+                "dump": lambda: json.dump(
+                    document, path, backend=backend, **dump_kwargs
+                ),
+                "load": lambda: json.load(path, backend=backend),
+            }
+            for operation in selected:
+                case = f"{name}.{operation}"
+                cases[case] = measure(
+                    operations[operation], repeat, len(text.encode("utf-8"))
+                )
+                click.echo(format_case(case, cases[case]), err=True)
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "system": platform.system(),
+            "numpy": np.__version__,
+            "cpus": os.cpu_count(),
+        },
+        "scale": scale,
+        "repeat": repeat,
+        "backend": backend,
+        "cases": cases,
+    }
+
+
+def format_case(case: str, result: t.Dict[str, float]) -> str:
+    return (
+        f"{case:>22}: p50 {result['p50_s'] * 1e3:9.2f} ms, "
+        f"p90 {result['p90_s'] * 1e3:9.2f} ms, "
+        f"p99 {result['p99_s'] * 1e3:9.2f} ms, "
+        f"{result['throughput_mb_s']:7.1f} MB/s, "
+        f"peak {result['peak_memory_mb']:7.1f} MB"
+    )
+
+
+def compare(
+    results: t.Dict[str, t.Any],
+    baseline: t.Dict[str, t.Any],
+    time_threshold: float,
+    memory_threshold: float,
+) -> t.List[str]:
+    """
+    Print how each case changed from the baseline, and return the cases
+    which regressed.
+    """
+    regressions = []
+    for case, result in results["cases"].items():
+        previous = baseline["cases"].get(case)
+        if previous is None:
+            click.echo(f"{case:>22}: not in the baseline")
+            continue
+        time_change = result["p50_s"] / previous["p50_s"] - 1
+        memory_change = (
+            result["peak_memory_mb"] / previous["peak_memory_mb"] - 1
+            if previous["peak_memory_mb"]
+            else 0.0
+        )
+        regressed = time_change > time_threshold or memory_change > memory_threshold
+        if regressed:
+            regressions.append(case)
+        click.echo(
+            f"{case:>22}: time {time_change:+7.1%}, memory {memory_change:+7.1%}"
+            + ("  REGRESSION" if regressed else "")
+        )
+    return regressions
+
+
+@click.command()
+@click.option("--scale", default=1.0, show_default=True, help="Scale every workload")
+@click.option("--repeat", default=5, show_default=True, help="Timed runs per case")
+@click.option("--backend", default="simplejson", show_default=True)
+@click.option(
+    "--filter",
+    "filters",
+    multiple=True,
+    help="Only run the cases whose names contain this text",
+)
+@click.option("--output", help="Write the results to this JSON file")
+@click.option("--baseline", default=DEFAULT_BASELINE, show_default=True)
+@click.option("--save-baseline", is_flag=True, help="Write the results as the baseline")
+@click.option(
+    "--time-threshold",
+    default=0.25,
+    show_default=True,
+    help="Fail when the median latency of a case grows by more than this fraction",
+)
+@click.option(
+    "--memory-threshold",
+    default=0.25,
+    show_default=True,
+    help="Fail when the peak memory of a case grows by more than this fraction",
+)
+def main(
+    scale: float,
+    repeat: int,
+    backend: str,
+    filters: t.Tuple[str, ...],
+    output: t.Optional[str],
+    baseline: str,
+    save_baseline: bool,
+    time_threshold: float,
+    memory_threshold: float,
+) -> None:
+    previous = None
+    if not save_baseline and os.path.exists(baseline):
+        previous = json.load(baseline)
+        for name, value in [("scale", scale), ("backend", backend)]:
+            if previous[name] != value:
+                raise click.ClickException(
+                    f"The baseline was run with --{name} {previous[name]}, not {value}"
+                )
+
+    results = run_suite(scale, repeat, backend, filters)
+    if output is not None:
+        json.dump(results, output, indent=2)
+    if save_baseline:
+        json.dump(results, baseline, indent=2)
+        click.echo(f"Saved the baseline to {baseline}")
+    elif previous is not None:
+        regressions = compare(results, previous, time_threshold, memory_threshold)
+        if regressions:
+            click.echo(f"{len(regressions)} cases regressed", err=True)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
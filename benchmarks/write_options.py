@@ -0,0 +1,53 @@
+"""
+Compare the time to dump a large document to a path with each of the write
+options.
+
+    python -m benchmarks.write_options --records 200000
+"""
+
+import os
+import tempfile
+import timeit
+import typing as t
+import click
+from missouri import json
+
+OPTIONS: t.Dict[str, t.Dict[str, t.Any]] = {
+    "default": {},
+    "buffer_size=1 MB": {"buffer_size": 1 << 20},
+    "single_write": {"single_write": True},
+    "atomic": {"atomic": True},
+    "atomic, fsync": {"atomic": True, "fsync": True},
+    "atomic, fsync, single_write": {
+        "atomic": True,
+        "fsync": True,
+        "single_write": True,
+    },
+}
+
+
+@click.command()
+@click.option("--records", default=200_000, show_default=True)
+@click.option("--backend", default="simplejson", show_default=True)
+def main(records: int, backend: str) -> None:
+    document = {
+        "records": [
+            {"id": i, "name": f"record {i}", "score": i / 7, "tags": ["a", "b"]}
+            for i in range(records)
+        ]
+    }
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "document.json")
+        for name, options in OPTIONS.items():
+            elapsed = min(
+                timeit.repeat(
+                    lambda: json.dump(document, path, backend=backend, **options),
+                    number=1,
+                    repeat=3,
+                )
+            )
+            click.echo(f"{name:>28}: {elapsed:6.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@ def python_source_files():
         glob.glob("*.py")
         + glob.glob("missouri/*.py")
         + glob.glob("missouri/**/*.py")
+        + glob.glob("benchmarks/*.py")
         + ["doc/"]
     )
     exclude_paths = []
@@ -33,6 +34,11 @@ def test():
     execute("pytest")
 
 
+@cli.command()
+def test_slow():
+    execute("pytest -m slow")
+
+
 @cli.command()
 def coverage():
     execute("pytest --cov=missouri")
@@ -64,6 +70,12 @@ def black_check():
     execute("black", "--check", *python_source_files())
 
 
+@cli.command(context_settings={"ignore_unknown_options": True})
+@click.argument("args", nargs=-1, type=click.UNPROCESSED)
+def bench(args):
+    execute("python", "-m", "benchmarks.suite", *args)
+
+
 @cli.command()
 def doc():
     execute("rm -rf build/ doc/build/ doc/api/")
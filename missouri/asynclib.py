@@ -0,0 +1,93 @@
+"""
+Run loads and dumps for the async API off the event loop, in a bounded pool
+of threads.
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import inspect
+import threading
+import typing as t
+
+R = t.TypeVar("R")
+
+
+class AsyncReader(t.Protocol):
+    async def read(self) -> t.Union[bytes, str]:
+        pass  # pragma: no cover
+
+
+class AsyncWriter(t.Protocol):
+    def write(self, data: bytes) -> t.Any:
+        pass  # pragma: no cover
+
+
+_max_workers = 4
+_executor: t.Optional[concurrent.futures.ThreadPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def set_max_workers(max_workers: int) -> None:
+    """
+    Set how many loads and dumps run at once in the default executor of
+    `aload` and `adump`. Any more wait for one of them to finish.
+    """
+    global _max_workers, _executor
+    with _lock:
+        _max_workers = max_workers
+        previous, _executor = _executor, None
+    if previous is not None:
+        previous.shutdown(wait=False)
+
+
+def default_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=_max_workers, thread_name_prefix="missouri"
+            )
+        return _executor
+
+
+async def run(
+    executor: t.Optional[concurrent.futures.Executor],
+    function: t.Callable[..., R],
+    *args: t.Any,
+    **kwargs: t.Any,
+) -> R:
+    """
+    Call `function` on `executor`, or the default executor, without blocking
+    the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor or default_executor(), functools.partial(function, *args, **kwargs)
+    )
+
+
+def is_async_reader(obj: object) -> bool:
+    """
+    Whether `obj` has a coroutine `read()`, like `asyncio.StreamReader`.
+    """
+    return inspect.iscoroutinefunction(getattr(obj, "read", None))
+
+
+def is_async_writer(obj: object) -> bool:
+    """
+    Whether `obj` has a coroutine `write()` or, like `asyncio.StreamWriter`, a
+    coroutine `drain()`.
+    """
+    return inspect.iscoroutinefunction(
+        getattr(obj, "write", None)
+    ) or inspect.iscoroutinefunction(getattr(obj, "drain", None))
+
+
+async def write(writer: AsyncWriter, data: bytes) -> None:
+    result = writer.write(data)
+    if inspect.isawaitable(result):
+        await result
+    drain = getattr(writer, "drain", None)
+    if drain is not None:
+        await drain()
@@ -0,0 +1,436 @@
+"""
+The JSON libraries which `missouri.json` can encode and decode with.
+
+- `"simplejson"`, the default.
+- `"json"`, the standard library's `json` module, which uses its C
+  accelerator when available.
+- `"orjson"`, which is considerably faster, if it is installed.
+
+Pick one per call by passing `backend=` to `dump`, `dumps`, `load` or
+`loads`, or for the whole process with `set_default_backend()`.
+
+Every backend calls the `JSONEncoder` for objects it can't encode, calls the
+`JSONDecoder` for every decoded dict, and honors the `for_json()` protocol,
+including on subclasses of dict, list and tuple.
+Some differences remain between backends:
+
+- orjson always writes compact UTF-8 output, as if called with
+  `separators=(",", ":")` and `ensure_ascii=False`, only supports `indent=2`,
+  writes NaN and infinity as `null`, and can't read them. It may also format
+  floats differently, e.g. `1e100` instead of `1e+100`, depending on its
+  version. It only writes dicts whose keys are strings, and raises a
+  `ValueError` for others, which simplejson converts to strings.
+- Only simplejson encodes named tuples as objects; the standard library
+  encodes them as arrays.
+- Keyword arguments which only simplejson understands, such as
+  `use_decimal`, raise a `ValueError` on the other backends.
+"""
+
+import abc
+import mmap
+import typing as t
+from .openlib import Buffer
+
+if t.TYPE_CHECKING:  # pragma: no cover
+    import types
+
+Encode = t.Callable[[t.Any], str]
+Decode = t.Callable[[str], t.Any]
+RawDecode = t.Callable[[str, int], t.Tuple[t.Any, int]]
+
+
+def _with_for_json(default: t.Callable[[t.Any], t.Any]) -> t.Callable[[t.Any], t.Any]:
+    def for_json_or_default(obj: t.Any) -> t.Any:
+        for_json = getattr(obj, "for_json", None)
+        if callable(for_json):
+            return for_json()
+        return default(obj)
+
+    return for_json_or_default
+
+
+def _subclass_as_base_type(
+    default: t.Callable[[t.Any], t.Any],
+) -> t.Callable[[t.Any], t.Any]:
+    def base_type_or_default(obj: t.Any) -> t.Any:
+        for base_type in (dict, list, str, int):
+            if isinstance(obj, base_type):
+                return base_type(obj)
+        return default(obj)
+
+    return base_type_or_default
+
+
+def _call_for_json(value: t.Any) -> t.Any:
+    """
+    Replace the subclasses of dict, list and tuple in `value` which have a
+    `for_json()` method with its result, since the standard library encodes
+    them without calling `default`. Containers are only copied when something
+    inside them changes, so `value` itself is returned when there's nothing to
+    replace.
+    """
+    value_type = type(value)
+    if value_type is not dict and value_type is not list and value_type is not tuple:
+        if not isinstance(value, (dict, list, tuple)):
+            return value
+        for_json = getattr(value, "for_json", None)
+        if callable(for_json):
+            return _call_for_json(for_json())
+
+    if isinstance(value, dict):
+        new_dict = None
+        for key, item in value.items():
+            new_item = _call_for_json(item)
+            if new_item is not item:
+                if new_dict is None:
+                    new_dict = dict(value)
+                new_dict[key] = new_item
+        return value if new_dict is None else new_dict
+    new_list = None
+    for i, item in enumerate(value):
+        new_item = _call_for_json(item)
+        if new_item is not item:
+            if new_list is None:
+                new_list = list(value)
+            new_list[i] = new_item
+    return value if new_list is None else new_list
+
+
+class Backend(abc.ABC):
+    """
+    Adapts a JSON library to missouri. The keyword arguments are the ones
+    prepared by `missouri.json`, with `default`, `for_json` and `object_hook`
+    set.
+    """
+
+    name: str
+    # Whether the library reads and writes UTF-8 directly, rather than strings.
+    native_bytes = False
+
+    @abc.abstractmethod
+    def encoder(self, dump_args: dict) -> Encode:
+        """
+        Return a function which encodes one object, for encoding many objects
+        with the same arguments.
+        """
+
+    def dump(self, obj: t.Any, fp: t.IO[str], *args: object, **kwargs: t.Any) -> None:
+        fp.write(self.encoder(self._positional(args, kwargs))(obj))
+
+    def dumps(self, obj: t.Any, **kwargs: t.Any) -> str:
+        return self.encoder(kwargs)(obj)
+
+    def dumps_bytes(self, obj: t.Any, **kwargs: t.Any) -> bytes:
+        """
+        Encode `obj` as UTF-8.
+        """
+        return self.dumps(obj, **kwargs).encode("utf-8")
+
+    def dump_bytes(self, obj: t.Any, fp: t.IO[bytes], **kwargs: t.Any) -> None:
+        """
+        Write `obj` to a binary file as UTF-8.
+        """
+        import io
+
+        # Stream the text through an encoding wrapper instead of encoding the
+        # whole document at once.
+        wrapper = io.TextIOWrapper(t.cast(t.BinaryIO, fp), encoding="utf-8", newline="")
+        try:
+            self.dump(obj, wrapper, **kwargs)
+            wrapper.flush()
+        finally:
+            wrapper.detach()
+
+    @abc.abstractmethod
+    def decoder(self, load_args: dict) -> Decode:
+        """
+        Return a function which decodes one document, for decoding many
+        documents with the same arguments.
+        """
+
+    def raw_decoder(self, load_args: dict) -> t.Optional[RawDecode]:
+        """
+        Return a function which decodes a value starting at an index in a
+        string and returns it with the index where it ends, if the backend
+        supports it.
+        """
+        return None
+
+    def load(self, fp: t.IO[str], *args: object, **kwargs: t.Any) -> t.Any:
+        return self.decoder(self._positional(args, kwargs))(fp.read())
+
+    def loads(self, s: str, **kwargs: t.Any) -> t.Any:
+        return self.decoder(kwargs)(s)
+
+    def loads_bytes(self, data: Buffer, **kwargs: t.Any) -> t.Any:
+        """
+        Decode a UTF-8 encoded document. Backends which set `native_bytes`
+        decode it without converting it to a string first.
+        """
+        return self.decoder(kwargs)(str(data, "utf-8"))
+
+    def _positional(self, args: t.Tuple[object, ...], kwargs: dict) -> dict:
+        if args:
+            raise ValueError(
+                f"The {self.name} backend doesn't accept positional arguments"
+            )
+        return kwargs
+
+
+class SimplejsonBackend(Backend):
+    name = "simplejson"
+
+    def encoder(self, dump_args: dict) -> Encode:
+        import simplejson
+
+        return simplejson.JSONEncoder(**dump_args).encode
+
+    def dump(self, obj: t.Any, fp: t.IO[str], *args: object, **kwargs: t.Any) -> None:
+        import simplejson
+
+        simplejson.dump(obj, fp, *args, **kwargs)
+
+    def dumps(self, obj: t.Any, **kwargs: t.Any) -> str:
+        import simplejson
+
+        return simplejson.dumps(obj, **kwargs)
+
+    def decoder(self, load_args: dict) -> Decode:
+        import simplejson
+
+        # The types-simplejson stubs mistype JSONDecoder.decode().
+        return simplejson.JSONDecoder(**load_args).decode  # type: ignore[return-value]
+
+    def raw_decoder(self, load_args: dict) -> t.Optional[RawDecode]:
+        import simplejson
+
+        # The types-simplejson stubs mistype JSONDecoder.raw_decode().
+        return simplejson.JSONDecoder(**load_args).raw_decode  # type: ignore[return-value]
+
+    def load(self, fp: t.IO[str], *args: object, **kwargs: t.Any) -> t.Any:
+        import simplejson
+
+        return simplejson.load(fp, *args, **kwargs)
+
+    def loads(self, s: str, **kwargs: t.Any) -> t.Any:
+        import simplejson
+
+        return simplejson.loads(s, **kwargs)
+
+
+class StdlibBackend(Backend):
+    name = "json"
+
+    _DUMP_ARGS = (
+        "skipkeys",
+        "ensure_ascii",
+        "check_circular",
+        "allow_nan",
+        "indent",
+        "separators",
+        "sort_keys",
+    )
+    _LOAD_ARGS = (
+        "parse_float",
+        "parse_int",
+        "parse_constant",
+        "object_pairs_hook",
+        "strict",
+    )
+
+    def _check_args(self, kwargs: dict, supported: t.Tuple[str, ...]) -> None:
+        for name in kwargs:
+            if name not in supported:
+                raise ValueError(f"The {self.name} backend doesn't support {name}")
+
+    def encoder(self, dump_args: dict) -> Encode:
+        import json
+
+        dump_args = dict(dump_args)
+        default = dump_args.pop("default")
+        for_json = dump_args.pop("for_json", False)
+        if for_json:
+            default = _with_for_json(default)
+        self._check_args(dump_args, self._DUMP_ARGS)
+        encode = json.JSONEncoder(default=default, **dump_args).encode
+        return (lambda obj: encode(_call_for_json(obj))) if for_json else encode
+
+    def dump(self, obj: t.Any, fp: t.IO[str], *args: object, **kwargs: t.Any) -> None:
+        import json
+
+        kwargs = self._positional(args, kwargs)
+        default = kwargs.pop("default")
+        if kwargs.pop("for_json", False):
+            default = _with_for_json(default)
+            obj = _call_for_json(obj)
+        self._check_args(kwargs, self._DUMP_ARGS)
+        json.dump(obj, fp, default=default, **kwargs)
+
+    def decoder(self, load_args: dict) -> Decode:
+        import json
+
+        self._check_args(load_args, self._LOAD_ARGS + ("object_hook",))
+        return json.JSONDecoder(**load_args).decode
+
+    def raw_decoder(self, load_args: dict) -> t.Optional[RawDecode]:
+        import json
+
+        self._check_args(load_args, self._LOAD_ARGS + ("object_hook",))
+        return json.JSONDecoder(**load_args).raw_decode
+
+
+def _apply_object_hook(value: t.Any, object_hook: t.Callable[[dict], t.Any]) -> t.Any:
+    """
+    Apply `object_hook` to each dict in `value`, innermost first, like a
+    decoder's object_hook. The containers, which are exactly dicts and lists as
+    produced by a parser, are updated in place.
+    """
+    value_type = type(value)
+    if value_type is dict:
+        for key, item in value.items():
+            item_type = type(item)
+            if item_type is dict or item_type is list:
+                value[key] = _apply_object_hook(item, object_hook)
+        return object_hook(value)
+    elif value_type is list:
+        for index, item in enumerate(value):
+            item_type = type(item)
+            if item_type is dict or item_type is list:
+                value[index] = _apply_object_hook(item, object_hook)
+    return value
+
+
+def _import_orjson() -> "types.ModuleType":
+    try:
+        import orjson
+    except ImportError:
+        raise ImportError("Install orjson to use the orjson backend")
+    return orjson
+
+
+class OrjsonBackend(Backend):
+    name = "orjson"
+    native_bytes = True
+
+    def bytes_encoder(self, dump_args: dict) -> t.Callable[[t.Any], bytes]:
+        """
+        Like `encoder`, but the function returns UTF-8, which is what orjson
+        produces.
+        """
+        orjson = _import_orjson()
+
+        dump_args = dict(dump_args)
+        default = dump_args.pop("default")
+        # Let the JSONEncoder and for_json() handle dataclasses and datetimes,
+        # like on the other backends.
+        option = orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_DATETIME
+        if dump_args.pop("for_json", False):
+            # Subclasses of dict, list, str and int may have a for_json()
+            # method too. Encode the others as their base type, as orjson would.
+            option |= orjson.OPT_PASSTHROUGH_SUBCLASS
+            default = _with_for_json(_subclass_as_base_type(default))
+        if dump_args.pop("sort_keys", False):
+            option |= orjson.OPT_SORT_KEYS
+        indent = dump_args.pop("indent", None)
+        if indent == 2:
+            option |= orjson.OPT_INDENT_2
+        elif indent is not None:
+            raise ValueError(f"The {self.name} backend only supports indent=2")
+        # The output format is fixed.
+        for name in ("separators", "ensure_ascii"):
+            dump_args.pop(name, None)
+        for name in dump_args:
+            raise ValueError(f"The {self.name} backend doesn't support {name}")
+
+        def encode(obj: t.Any) -> bytes:
+            # orjson replaces errors raised by `default` with its own, so keep the
+            # original to re-raise it.
+            errors: t.List[Exception] = []
+
+            def default_or_record(obj: t.Any) -> t.Any:
+                try:
+                    return default(obj)
+                except Exception as e:
+                    errors.append(e)
+                    raise
+
+            try:
+                return orjson.dumps(obj, default=default_or_record, option=option)
+            except orjson.JSONEncodeError as e:
+                if errors:
+                    raise errors[0] from None
+                elif str(e) == "Dict key must be str":
+                    raise ValueError(
+                        f"The {self.name} backend only supports dicts with str keys"
+                    ) from None
+                raise
+
+        return encode
+
+    def encoder(self, dump_args: dict) -> Encode:
+        encode = self.bytes_encoder(dump_args)
+        return lambda obj: encode(obj).decode("utf-8")
+
+    def dumps_bytes(self, obj: t.Any, **kwargs: t.Any) -> bytes:
+        return self.bytes_encoder(kwargs)(obj)
+
+    def dump_bytes(self, obj: t.Any, fp: t.IO[bytes], **kwargs: t.Any) -> None:
+        fp.write(self.dumps_bytes(obj, **kwargs))
+
+    def _object_hook(self, load_args: dict) -> t.Callable[[dict], t.Any]:
+        load_args = dict(load_args)
+        object_hook = load_args.pop("object_hook")
+        for name in load_args:
+            raise ValueError(f"The {self.name} backend doesn't support {name}")
+        return t.cast(t.Callable[[dict], t.Any], object_hook)
+
+    def decoder(self, load_args: dict) -> Decode:
+        orjson = _import_orjson()
+
+        object_hook = self._object_hook(load_args)
+
+        def decode(s: str) -> t.Any:
+            return _apply_object_hook(orjson.loads(s), object_hook)
+
+        return decode
+
+    def loads_bytes(self, data: Buffer, **kwargs: t.Any) -> t.Any:
+        orjson = _import_orjson()
+
+        object_hook = self._object_hook(kwargs)
+        if not isinstance(data, mmap.mmap):
+            return _apply_object_hook(orjson.loads(data), object_hook)
+        # orjson reads any contiguous buffer, but only accepts an mmap through
+        # a memoryview.
+        with memoryview(data) as view:
+            return _apply_object_hook(orjson.loads(view), object_hook)
+
+
+_BACKENDS: t.Dict[str, Backend] = {
+    backend.name: backend
+    for backend in (SimplejsonBackend(), StdlibBackend(), OrjsonBackend())
+}
+_default_backend = "simplejson"
+
+
+def get_backend(name: t.Optional[str] = None) -> Backend:
+    """
+    Return the backend called `name`, or the default backend.
+    """
+    if name is None:
+        name = _default_backend
+    try:
+        return _BACKENDS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown backend {name!r}; expected one of {', '.join(_BACKENDS)}"
+        )
+
+
+def set_default_backend(name: str) -> None:
+    """
+    Use the backend called `name` when none is passed explicitly.
+    """
+    global _default_backend
+    get_backend(name)
+    _default_backend = name
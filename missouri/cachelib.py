@@ -0,0 +1,425 @@
+"""
+Cache decoded documents, so loading the same file again doesn't parse the
+JSON.
+
+`DiskCache` stores them on disk, to share them between processes and runs.
+Each entry is a pickle, with the buffers of the arrays it contains stored
+out of band after it. A cached load memory-maps the entry, so the arrays are
+views into the mapped file rather than copies, and their data is only read
+from disk when it is accessed. The mapping is private, so writing to the
+arrays doesn't change the cache.
+
+`MemoryCache` keeps them in memory, for the files a process loads over and
+over.
+"""
+
+import collections
+import hashlib
+import os
+import struct
+import sys
+import threading
+import typing as t
+from .openlib import atomic_path
+from .sidecarlib import sidecar_path
+
+Validate = t.Literal["stat", "content"]
+
+
+class Cache(t.Protocol):
+    def get_or_load(
+        self, path: str, options: str, load: t.Callable[[], t.Any]
+    ) -> t.Any:
+        """
+        Return the cached document for loading `path` with `options`, which
+        describes the decoder and load options, calling `load` to decode it
+        on a miss.
+        """
+
+
+_MAGIC = b"MSRICHE1"
+# The magic, the length of the pickle and the number of buffers, followed by
+# the offset and length of each buffer.
+_HEADER = struct.Struct("<8sQQ")
+_BUFFER = struct.Struct("<QQ")
+# Align each buffer so arrays can be mapped efficiently.
+ALIGNMENT = 64
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.blake2b("\0".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    Cache decoded documents in `directory`. Pass an instance to
+    `missouri.json.load` as `cache`.
+
+    Entries are keyed on the absolute path of the file, on its size and
+    modification time or, with `validate="content"`, a hash of its contents,
+    and the same for its sidecar file when it has one, and on the decoder's
+    class, options and registered methods, and the other load options.
+    Changing the file or its sidecar therefore misses the cache, and the stale
+    entry is eventually evicted.
+
+    When `max_bytes` is given, the least recently used entries are removed
+    once the cache grows larger than that.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: t.Optional[int] = None,
+        validate: Validate = "stat",
+    ):
+        if validate not in ("stat", "content"):
+            raise ValueError(f"Unknown validate {validate!r}; expected stat or content")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.validate = validate
+
+    def _path_prefix(self, path: str) -> str:
+        return _digest(os.path.abspath(path))
+
+    def _version(self, path: str) -> str:
+        if self.validate == "content":
+            return _file_digest(path)
+        stat = os.stat(path)
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    def entry_path(self, path: str, options: str) -> str:
+        """
+        Return the path of the entry for loading `path` with `options`, which
+        describes the decoder and load options, in its current state.
+        """
+        version = self._version(path)
+        arrays_path = sidecar_path(path)
+        if os.path.exists(arrays_path):
+            version += f"|{self._version(arrays_path)}"
+        return os.path.join(
+            self.directory,
+            f"{self._path_prefix(path)}-{_digest(version, options)}.pickle",
+        )
+
+    def get_or_load(
+        self, path: str, options: str, load: t.Callable[[], t.Any]
+    ) -> t.Any:
+        entry_path = self.entry_path(path, options)
+        hit, value = self.get(entry_path)
+        if not hit:
+            value = load()
+            self.put(entry_path, value)
+        return value
+
+    def get(self, entry_path: str) -> t.Tuple[bool, t.Any]:
+        """
+        Return whether the entry exists, and its value.
+        """
+        import mmap
+        import pickle
+
+        try:
+            with open(entry_path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        except (FileNotFoundError, ValueError):
+            # Missing, or empty, which can't be mapped.
+            return False, None
+        try:
+            magic, pickle_length, buffer_count = _HEADER.unpack_from(mapped)
+            if magic != _MAGIC:
+                raise ValueError("Not a cache entry")
+            position = _HEADER.size
+            view = memoryview(mapped)
+            buffers = []
+            for _ in range(buffer_count):
+                offset, length = _BUFFER.unpack_from(mapped, position)
+                buffers.append(view[offset : offset + length])
+                position += _BUFFER.size
+            value = pickle.loads(
+                view[position : position + pickle_length], buffers=buffers
+            )
+        except Exception:
+            # A corrupt entry is a miss, and is replaced when the document is
+            # loaded.
+            return False, None
+        # Mark the entry as recently used.
+        os.utime(entry_path)
+        return True, value
+
+    def put(self, entry_path: str, value: t.Any) -> None:
+        """
+        Store `value` in the entry, unless it can't be pickled, and evict
+        the least recently used entries if the cache is too large.
+        """
+        import pickle
+
+        buffers: t.List[pickle.PickleBuffer] = []
+        try:
+            data = pickle.dumps(value, protocol=5, buffer_callback=buffers.append)
+        except Exception:
+            return
+        raws = [buffer.raw() for buffer in buffers]
+
+        os.makedirs(self.directory, exist_ok=True)
+        offset = _HEADER.size + _BUFFER.size * len(raws) + len(data)
+        entries = []
+        for raw in raws:
+            offset += -offset % ALIGNMENT
+            entries.append((offset, raw.nbytes))
+            offset += raw.nbytes
+        with atomic_path(entry_path) as temp_path, open(temp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, len(data), len(raws)))
+            for entry in entries:
+                f.write(_BUFFER.pack(*entry))
+            f.write(data)
+            for (offset, _), raw in zip(entries, raws):
+                f.write(b"\0" * (offset - f.tell()))
+                f.write(raw)
+        if self.max_bytes is not None:
+            self.evict(self.max_bytes)
+
+    def _entries(self) -> t.List[os.DirEntry]:
+        try:
+            with os.scandir(self.directory) as entries:
+                return [entry for entry in entries if entry.name.endswith(".pickle")]
+        except FileNotFoundError:
+            return []
+
+    def evict(self, max_bytes: int) -> None:
+        """
+        Remove the least recently used entries until the cache takes no more
+        than `max_bytes`.
+        """
+        entries = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:  # pragma: no cover
+                # Removed by another process.
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def _remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:  # pragma: no cover
+            # Removed by another process.
+            pass
+
+    def invalidate(self, path: str) -> None:
+        """
+        Remove the entries for the file at `path`.
+        """
+        prefix = self._path_prefix(path) + "-"
+        for entry in self._entries():
+            if entry.name.startswith(prefix):
+                self._remove(entry.path)
+
+    def clear(self) -> None:
+        """
+        Remove every entry.
+        """
+        for entry in self._entries():
+            self._remove(entry.path)
+
+
+def _nbytes(obj: t.Any) -> int:
+    """
+    Estimate the memory taken by a decoded document, including the data of
+    its arrays.
+    """
+    np = sys.modules.get("numpy")
+    ndarray = None if np is None else np.ndarray
+    seen: t.Set[int] = set()
+
+    def walk(obj: t.Any) -> int:
+        if id(obj) in seen:
+            return 0
+        seen.add(id(obj))
+        cls = type(obj)
+        if cls is dict:
+            return sys.getsizeof(obj) + sum(
+                walk(key) + walk(value) for key, value in obj.items()
+            )
+        elif cls is list or cls is tuple:
+            return sys.getsizeof(obj) + sum(walk(value) for value in obj)
+        elif ndarray is not None and isinstance(obj, ndarray):
+            return sys.getsizeof(obj) + obj.nbytes
+        return sys.getsizeof(obj)
+
+    return walk(obj)
+
+
+def _freeze(obj: t.Any) -> None:
+    """
+    Make the arrays in a decoded document read-only.
+    """
+    np = sys.modules.get("numpy")
+    ndarray = None if np is None else np.ndarray
+
+    def walk(obj: t.Any) -> None:
+        cls = type(obj)
+        if cls is dict:
+            for value in obj.values():
+                walk(value)
+        elif cls is list or cls is tuple:
+            for value in obj:
+                walk(value)
+        elif ndarray is not None and isinstance(obj, ndarray):
+            obj.flags.writeable = False
+
+    walk(obj)
+
+
+def _copy(obj: t.Any) -> t.Any:
+    """
+    Copy the dicts and lists of a decoded document, sharing everything else.
+    """
+    cls = type(obj)
+    if cls is dict:
+        return {key: _copy(value) for key, value in obj.items()}
+    elif cls is list:
+        return [_copy(value) for value in obj]
+    elif cls is tuple:
+        return tuple(_copy(value) for value in obj)
+    return obj
+
+
+_Stat = t.Tuple[int, int, int]
+
+
+def _stat(path: str) -> _Stat:
+    stat = os.stat(path)
+    return (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+
+def _stat_if_exists(path: str) -> t.Optional[_Stat]:
+    try:
+        return _stat(path)
+    except FileNotFoundError:
+        return None
+
+
+class MemoryCache:
+    """
+    Keep decoded documents in memory. Pass an instance to
+    `missouri.json.load` as `cache`, or use `missouri.json.cached_load`.
+
+    Each load checks the size, modification time and inode of the file and
+    of its sidecar file, and decodes it again when any of them changed.
+    Callers get their own copy of the dicts and lists in the document, while
+    its arrays are shared and read-only, so nothing they do changes the
+    cache. Other objects, such as those returned by custom decoders, are
+    shared as they are.
+
+    Once the cache holds more than `max_entries` documents, or documents
+    which take more than `max_bytes` including the data of their arrays, the
+    least recently used are evicted. A document larger than `max_bytes` isn't
+    cached.
+
+    The cache can be used from many threads. Threads which miss the cache at
+    the same time each decode the document.
+
+    `hits`, `misses` and `evictions` count how the cache has been used.
+    """
+
+    def __init__(
+        self, max_entries: t.Optional[int] = 128, max_bytes: t.Optional[int] = None
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.nbytes = 0
+        self._entries: t.OrderedDict[
+            t.Tuple[str, str], t.Tuple[t.Tuple[_Stat, t.Optional[_Stat]], t.Any, int]
+        ] = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_load(
+        self, path: str, options: str, load: t.Callable[[], t.Any]
+    ) -> t.Any:
+        key = (os.path.abspath(path), options)
+        version = (_stat(path), _stat_if_exists(sidecar_path(path)))
+        with self._lock:
+            entry = self._entries.get(key)
+            hit = entry is not None and entry[0] == version
+            if hit:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if hit:
+            return _copy(t.cast(tuple, entry)[1])
+
+        value = load()
+        _freeze(value)
+        nbytes = _nbytes(value)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.nbytes -= previous[2]
+            if self.max_bytes is None or nbytes <= self.max_bytes:
+                self._entries[key] = (version, value, nbytes)
+                self.nbytes += nbytes
+            self._evict()
+        return _copy(value)
+
+    def _evict(self) -> None:
+        while self._entries and (
+            (self.max_entries is not None and len(self._entries) > self.max_entries)
+            or (self.max_bytes is not None and self.nbytes > self.max_bytes)
+        ):
+            _, (_, _, nbytes) = self._entries.popitem(last=False)
+            self.nbytes -= nbytes
+            self.evictions += 1
+
+    def invalidate(self, path: str) -> None:
+        """
+        Remove the entries for the file at `path`.
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == path]:
+                self.nbytes -= self._entries.pop(key)[2]
+
+    def clear(self) -> None:
+        """
+        Remove every entry.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+
+_default_memory_cache: t.Optional[MemoryCache] = None
+_lock = threading.Lock()
+
+
+def default_memory_cache() -> MemoryCache:
+    """
+    Return the cache used by `missouri.json.cached_load`.
+    """
+    global _default_memory_cache
+    with _lock:
+        if _default_memory_cache is None:
+            _default_memory_cache = MemoryCache()
+        return _default_memory_cache
@@ -2,8 +2,38 @@
 # https://github.com/metabolize-forks/baiji-serialization/tree/8b77f19685555e1bab03e75a433d00ce6fa4bea5
 # Apache 2.0
 
+import copy
+import enum
+import os
+import types
 import typing as t
-from .numpylib import decode_numpy as _decode_numpy, encode_numpy as _encode_numpy
+from contextlib import contextmanager
+from .columnlib import (
+    ColumnarDecoding,
+    Columns,
+    check_columnar_decoding as _check_columnar_decoding,
+    columnize as _columnize,
+    decode_columns as _decode_columns,
+)
+from .dedupelib import Dedupe, SharedObject, dedupe as _dedupe
+from .numpylib import (
+    NdarrayEncoding,
+    decode_numpy as _decode_numpy,
+    encode_numpy as _encode_numpy,
+)
+from .recordlib import (
+    decode_enum as _decode_enum,
+    decode_record as _decode_record,
+    encode_enum as _encode_enum,
+    record_encoder as _record_encoder,
+    tag as _tag,
+)
+from .roundlib import Rounding
+from .schemalib import (  # noqa: F401 CompiledSchema and compile_schema are re-exported
+    CompiledSchema,
+    compile_schema,
+)
+from .sidecarlib import SidecarReader, SidecarWriter, sidecar_path
 
 if t.TYPE_CHECKING:  # pragma: no cover
     import numpy as np
@@ -11,12 +41,26 @@ if t.TYPE_CHECKING:  # pragma: no cover
 # TODO: Refine this type.
 CoderMethod = t.Callable[[t.Any], t.Any]
 
+_Caller = t.TypeVar("_Caller", bound="MethodListCaller")
+_Encoder = t.TypeVar("_Encoder", bound="JSONEncoder")
+_Decoder = t.TypeVar("_Decoder", bound="JSONDecoder")
+
+
+def _rebound(method: CoderMethod, old: object, new: object) -> CoderMethod:
+    if getattr(method, "__self__", None) is old:
+        return types.MethodType(getattr(method, "__func__"), new)
+    return method
+
 
 class MethodListCaller:
     """
     This is an internal class that lets the JSON(En,De)coder classes
     and their subclasses easily register a list of methods to try, which
     will then be called in order until one of them succeeds.
+
+    Subclasses may also override `dispatch` to look up a method directly
+    (e.g. by type or by key) rather than trying each one in turn. It is
+    consulted after the methods in method_list.
     """
 
     method_list: t.List[CoderMethod]
@@ -28,6 +72,18 @@ class MethodListCaller:
             index = len(self.method_list)
         self.method_list.insert(index, method)
 
+    def copy(self: _Caller) -> _Caller:
+        """
+        Return a shallow copy, whose registered methods of this instance are
+        bound to the copy instead. The coders use copies to hold the state of
+        one call, so that calls which share a coder don't see each other's.
+        """
+        clone = copy.copy(self)
+        clone.method_list = [
+            _rebound(method, self, clone) for method in self.method_list
+        ]
+        return clone
+
     def clear(self) -> None:
         # be defensive if someone forgets to call super pylint: disable=attribute-defined-outside-init
         self.method_list = []
@@ -37,12 +93,20 @@ class MethodListCaller:
         Call the methods in method_list until one of them returns something other than None
         and return that as the result of the call.
         """
-        try:
-            return next(
-                filter(lambda x: x is not None, (f(obj) for f in self.method_list))
-            )
-        except StopIteration:
-            return self.default(obj)
+        for method in self.method_list:
+            result = method(obj)
+            if result is not None:
+                return result
+        result = self.dispatch(obj)
+        if result is not None:
+            return result
+        return self.default(obj)
+
+    def dispatch(self, obj: t.Any) -> t.Any:
+        """
+        Called when none of the methods in method_list returned something.
+        """
+        return None
 
     def default(self, x: t.Any) -> t.Any:
         """
@@ -51,6 +115,14 @@ class MethodListCaller:
         return x
 
 
+def _call_for_json(obj: t.Any) -> t.Any:
+    return obj.for_json()
+
+
+def _no_encoder(obj: t.Any) -> None:
+    return None
+
+
 class JSONEncoder(MethodListCaller):
     """
     Instances may be passed to simplejson as default to encode json objects.
@@ -70,21 +142,194 @@ class JSONEncoder(MethodListCaller):
             "shape": [3, 2]
         }
 
+    Pass `ndarray_encoding="base64"` to write the raw array buffer instead of a
+    nested list, which is much faster and more compact for large arrays:
+
+    .. code-block:: python
+
+        {
+            "__ndarray__": "AMBWRADAVkQAAFlDAADUQgAAl0MAAAxD",
+            "dtype": "<f4",
+            "shape": [3, 2],
+            "encoding": "base64"
+        }
+
+    Pass `sidecar_threshold` to write arrays of at least that many bytes to a
+    binary file next to the JSON file instead; see `missouri.sidecarlib`. This
+    only applies when dumping to a path.
+
+    Pass `precision` to round floats, including those in arrays, to that many
+    decimal places, or `significant_digits` to round them to that many
+    significant digits; see `missouri.roundlib`. The dump functions round the
+    floats in the document with `prepare` before encoding it, and the floats in
+    the values returned by encoders are rounded as they are encoded.
+
+    Pass `dedupe="identity"` to write the dicts, lists, tuples and arrays which
+    appear more than once in the document once, and refer to them elsewhere,
+    or `dedupe="content"` to also treat arrays with the same contents as the
+    same array; see `missouri.dedupelib`. A decoder created with `dedupe=True`
+    restores the sharing.
+
+    Objects which define `for_json()` are encoded with it. Dataclasses, attrs
+    classes and named tuples are encoded as objects of their fields, and enum
+    members as their values; see `missouri.recordlib`. Pass `tagged=True` to
+    also write their types, so that a `JSONDecoder` created with `tagged=True`
+    decodes them to instances of the same classes.
+
+    Pass `columnar=True` to write the lists of dicts which have the same keys
+    by column, with the columns of numbers as arrays; see
+    `missouri.columnlib`. Lists wrapped in `missouri.columnlib.Columns` are
+    always written by column.
+
+    Encoders for a specific class are best registered with `register_type`,
+    which looks them up by the type of the object (or the nearest registered
+    base class) instead of trying every encoder in turn.
+
     Note that for default, if we want to do nothing, we return None and the object
     is encoded as best as simplejson can (which is often by throwing a TypeError).
     We override MethodListCaller.default to get this behavior.
     """
 
-    def __init__(self, encode_as_primitives: t.Optional[bool] = None):
+    type_dispatch: t.Dict[type, CoderMethod]
+    _type_dispatch_cache: t.Dict[type, CoderMethod]
+
+    def __init__(
+        self,
+        encode_as_primitives: t.Optional[bool] = None,
+        ndarray_encoding: t.Optional[NdarrayEncoding] = None,
+        sidecar_threshold: t.Optional[int] = None,
+        precision: t.Optional[int] = None,
+        significant_digits: t.Optional[int] = None,
+        dedupe: t.Optional[Dedupe] = None,
+        tagged: t.Optional[bool] = None,
+        columnar: t.Optional[bool] = None,
+    ):
         self.encode_as_primitives = (
             False if encode_as_primitives is None else encode_as_primitives
         )
-        self.register(self.encode)
+        self.ndarray_encoding: NdarrayEncoding = (
+            "list" if ndarray_encoding is None else ndarray_encoding
+        )
+        self.sidecar_threshold = sidecar_threshold
+        self.sidecar: t.Optional[SidecarWriter] = None
+        self.rounding = (
+            None
+            if precision is None and significant_digits is None
+            else Rounding(precision, significant_digits)
+        )
+        self.dedupe = dedupe
+        self.tagged = False if tagged is None else tagged
+        self.columnar = False if columnar is None else columnar
+        if not hasattr(self, "method_list"):
+            self.clear()
+        if type(self).encode is not JSONEncoder.encode:
+            self.register(self.encode)
         self.register(self.encode_numpy)
+        self.register_type(SharedObject, SharedObject.encode)
+        self.register_type(Columns, Columns.encode)
+
+    def register_type(self, cls: type, method: CoderMethod) -> None:
+        """
+        Register `method` to encode instances of `cls` and its subclasses.
+        """
+        if not hasattr(self, "method_list"):
+            self.clear()
+        self.type_dispatch[cls] = method
+        self._type_dispatch_cache.clear()
+
+    def clear(self) -> None:
+        super().clear()
+        self.type_dispatch = {}
+        self._type_dispatch_cache = {}
+
+    def copy(self: _Encoder) -> _Encoder:
+        clone = super().copy()
+        clone.type_dispatch = {
+            cls: _rebound(method, self, clone)
+            for cls, method in self.type_dispatch.items()
+        }
+        clone._type_dispatch_cache = {
+            cls: _rebound(method, self, clone)
+            for cls, method in self._type_dispatch_cache.items()
+        }
+        return clone
+
+    def dispatch(self, obj: t.Any) -> t.Any:
+        """
+        Encode `obj` with the method registered for its type. Types which have
+        none are encoded as records or enums.
+        """
+        cls = type(obj)
+        try:
+            method = self._type_dispatch_cache[cls]
+        except KeyError:
+            method = self._type_dispatch_cache[cls] = self._method_for_type(cls)
+        return method(obj)
+
+    def _method_for_type(self, cls: type) -> CoderMethod:
+        # The backends call for_json() before the encoder, but callers may pass
+        # the encoder as a plain `default`.
+        if callable(getattr(cls, "for_json", None)):
+            return _call_for_json
+        for x in cls.__mro__:
+            if x in self.type_dispatch:
+                return self.type_dispatch[x]
+        if issubclass(cls, enum.Enum):
+            return _encode_enum
+        return _record_encoder(cls) or _no_encoder
+
+    def __call__(self, obj: t.Any) -> t.Any:
+        # MethodListCaller.__call__, inlined since it's called for every object
+        # the backend can't encode.
+        for method in self.method_list:
+            result = method(obj)
+            if result is not None:
+                break
+        else:
+            result = self.dispatch(obj)
+            if result is None:
+                return self.default(obj)
+        rounding = getattr(self, "rounding", None)
+        if rounding is None or (type(result) is dict and "__ndarray__" in result):
+            # encode_numpy has rounded the array already, much faster.
+            return result
+        return rounding.round_nested(result)
 
     def default(self, obj: t.Any) -> t.Any:
         raise ValueError(f"Object of type {type(obj)} is not JSON-serializable")
 
+    def prepare(self, obj: t.Any) -> t.Any:
+        """
+        Called by the dump functions on the document before it is encoded.
+        Replace records and enum members by dicts which name their type when
+        tagging, replace the objects which appear more than once when
+        deduplicating, replace the lists of dicts with the same keys by their
+        columns when writing by column, and round the floats in its dicts,
+        lists and tuples when rounding.
+        """
+        if getattr(self, "tagged", False):
+            obj = _tag(obj)
+        dedupe = getattr(self, "dedupe", None)
+        if dedupe is not None:
+            obj = _dedupe(obj, dedupe)
+        if getattr(self, "columnar", False):
+            obj = _columnize(obj)
+        rounding = getattr(self, "rounding", None)
+        return obj if rounding is None else rounding.round_nested(obj)
+
+    @contextmanager
+    def writing_sidecar(self, json_path: str) -> t.Iterator["JSONEncoder"]:
+        """
+        Yield a copy of the encoder which writes large arrays to the sidecar
+        file for `json_path`, to encode it with. The sidecar file is only
+        replaced, or removed when no arrays are written to it, when encoding
+        succeeds.
+        """
+        assert self.sidecar_threshold is not None
+        encoder = self.copy()
+        with SidecarWriter(json_path, self.sidecar_threshold) as encoder.sidecar:
+            yield encoder
+
     def encode(self, obj: t.Any) -> t.Any:
         """
         In a subclass, either override this or add some encode functions and
@@ -93,7 +338,13 @@ class JSONEncoder(MethodListCaller):
         pass
 
     def encode_numpy(self, obj: "np.ndarray") -> t.Any:
-        return _encode_numpy(obj, as_primitives=self.encode_as_primitives)
+        return _encode_numpy(
+            obj,
+            as_primitives=self.encode_as_primitives,
+            ndarray_encoding=self.ndarray_encoding,
+            sidecar=getattr(self, "sidecar", None),
+            rounding=getattr(self, "rounding", None),
+        )
 
 
 class JSONDecoder(MethodListCaller):
@@ -114,14 +365,98 @@ class JSONDecoder(MethodListCaller):
             "shape": [3, 2]
         }
 
+    Arrays written with `ndarray_encoding="base64"` are decoded as well.
+
+    The other marker keys the encoder writes are only decoded when asked to,
+    so that documents which happen to use them as ordinary keys load as they
+    are:
+
+    - References to arrays in a sidecar file are resolved relative to
+      `sidecar_directory`, or when loading from a path which has a sidecar
+      file, relative to it.
+    - With `dedupe=True`, the objects written once with `dedupe` are shared
+      again wherever they are referred to.
+    - With `tagged=True`, records and enum members written with `tagged=True`
+      are decoded to instances of their classes, which must have been
+      imported already.
+    - With `columns_as="records"`, lists of dicts written by column are decoded
+      to lists of dicts, or with `columns_as="structured"` to a structured
+      array, or with `columns_as="columns"` to a dict of column arrays.
+
+    Those decoders raise `ValueError` for marker objects which they can't
+    decode.
+
+    Decoders for dicts identified by a marker key, like `"__ndarray__"`, are best
+    registered with `register_key`. They are only called for dicts which contain
+    that key, so the many dicts which contain none of them cost a single lookup
+    per marker key.
+
     Note that for `object_hook`, if we want to do nothing, we return the dict unchanged
     and the json is decoded as a plain old dict; this behavior is the default of
     MethodListCaller.
     """
 
-    def __init__(self) -> None:
-        self.register(self.decode)
-        self.register(self.decode_numpy)
+    key_dispatch: t.Dict[str, CoderMethod]
+
+    def __init__(
+        self,
+        sidecar_directory: t.Optional[str] = None,
+        columns_as: t.Optional[ColumnarDecoding] = None,
+        dedupe: t.Optional[bool] = None,
+        tagged: t.Optional[bool] = None,
+    ) -> None:
+        self.sidecar_directory = sidecar_directory
+        self.sidecar = (
+            None if sidecar_directory is None else SidecarReader(sidecar_directory)
+        )
+        if columns_as is not None:
+            _check_columnar_decoding(columns_as)
+        self.columns_as = columns_as
+        self.dedupe = False if dedupe is None else dedupe
+        self.tagged = False if tagged is None else tagged
+        self.parsed_arrays: t.Optional[t.List["np.ndarray"]] = None
+        self.shared_objects: t.Dict[int, t.Any] = {}
+        if type(self).decode is not JSONDecoder.decode:
+            self.register(self.decode)
+        self.register_key("__ndarray__", self.decode_numpy)
+        if self.sidecar is not None:
+            self.register_key("__ndarray_ref__", self.decode_numpy_ref)
+        if self.dedupe:
+            self.register_key("__shared__", self.decode_shared)
+            self.register_key("__ref__", self.decode_ref)
+        if self.tagged:
+            self.register_key("__record__", self.decode_record)
+            self.register_key("__enum__", self.decode_enum)
+        if self.columns_as is not None:
+            self.register_key("__columns__", self.decode_columns)
+
+    def register_key(self, key: str, method: CoderMethod) -> None:
+        """
+        Register `method` to decode dicts which contain `key`.
+        """
+        if not hasattr(self, "method_list"):
+            self.clear()
+        self.key_dispatch[key] = method
+
+    def clear(self) -> None:
+        super().clear()
+        self.key_dispatch = {}
+
+    def copy(self: _Decoder) -> _Decoder:
+        clone = super().copy()
+        clone.key_dispatch = {
+            key: _rebound(method, self, clone)
+            for key, method in self.key_dispatch.items()
+        }
+        return clone
+
+    def dispatch(self, obj: t.Any) -> t.Any:
+        for key, method in self.key_dispatch.items():
+            if key in obj:
+                result = method(obj)
+                if result is not None:
+                    return result
+        return None
 
     def decode(self, obj: t.Any) -> t.Any:
         """
@@ -132,3 +467,97 @@ class JSONDecoder(MethodListCaller):
 
     def decode_numpy(self, obj: t.Any) -> t.Optional["np.ndarray"]:
         return _decode_numpy(obj)
+
+    def decode_shared(self, obj: t.Any) -> t.Any:
+        """
+        Decode the definition of an object which appears more than once, and
+        remember it for the references which follow; see `missouri.dedupelib`.
+        """
+        index = obj["__shared__"]
+        if len(obj) != 2 or type(index) is not int or "value" not in obj:
+            raise ValueError(
+                'Shared objects must be written as {"__shared__": index, "value": value}'
+            )
+        self.shared_objects[index] = value = obj["value"]
+        return value
+
+    def decode_ref(self, obj: t.Any) -> t.Any:
+        index = obj["__ref__"]
+        if len(obj) != 1 or type(index) is not int:
+            raise ValueError(
+                'References to shared objects must be written as {"__ref__": index}'
+            )
+        try:
+            return self.shared_objects[index]
+        except KeyError:
+            raise ValueError(f"Reference to undefined shared object {index}")
+
+    def decode_record(self, obj: t.Any) -> t.Any:
+        return _decode_record(obj)
+
+    def decode_enum(self, obj: t.Any) -> t.Any:
+        return _decode_enum(obj)
+
+    def decode_columns(self, obj: t.Any) -> t.Any:
+        return _decode_columns(obj, getattr(self, "columns_as", None) or "records")
+
+    def decode_numpy_ref(self, obj: t.Any) -> "np.ndarray":
+        assert self.sidecar is not None
+        return self.sidecar.decode(obj)
+
+    def decode_numpy_parsed(self, obj: t.Any) -> "np.ndarray":
+        assert self.parsed_arrays is not None
+        return self.parsed_arrays[obj["__ndarray_parsed__"]]
+
+    @contextmanager
+    def reading_parsed_arrays(
+        self, arrays: t.List["np.ndarray"]
+    ) -> t.Iterator["JSONDecoder"]:
+        """
+        Yield a copy of the decoder which decodes `{"__ndarray_parsed__": index}`
+        placeholders, left by `missouri.numpylib.extract_ndarray_lists`, to the
+        arrays it parsed.
+        """
+        decoder = self.copy()
+        decoder.parsed_arrays = arrays
+        if arrays:
+            decoder.register_key("__ndarray_parsed__", decoder.decode_numpy_parsed)
+        yield decoder
+
+    @contextmanager
+    def reading_shared_objects(self) -> t.Iterator["JSONDecoder"]:
+        """
+        Yield a copy of the decoder which remembers the objects shared in one
+        document, so that loads which share this decoder don't resolve each
+        other's references, or this decoder when it doesn't decode them.
+        """
+        if "__ref__" not in getattr(self, "key_dispatch", {}):
+            yield self
+            return
+        decoder = self.copy()
+        decoder.shared_objects = {}
+        yield decoder
+
+    @contextmanager
+    def reading_sidecar(self, json_path: str) -> t.Iterator["JSONDecoder"]:
+        """
+        Yield the decoder to decode `json_path` with: a copy which resolves
+        sidecar array references relative to it when it has a sidecar file,
+        and otherwise leaves them as they are, or this decoder when a
+        sidecar_directory was given explicitly.
+
+        Decoders which don't call `JSONDecoder.__init__` don't decode sidecar
+        references.
+        """
+        if not hasattr(self, "sidecar_directory") or self.sidecar_directory is not None:
+            yield self
+            return
+        decoder = self.copy()
+        if os.path.exists(sidecar_path(json_path)):
+            decoder.sidecar = SidecarReader(os.path.dirname(os.path.abspath(json_path)))
+            decoder.register_key("__ndarray_ref__", decoder.decode_numpy_ref)
+        else:
+            # This may be a copy made for another document, in a nested load.
+            decoder.sidecar = None
+            decoder.key_dispatch.pop("__ndarray_ref__", None)
+        yield decoder
@@ -0,0 +1,184 @@
+"""
+Write lists of dicts which have the same keys by column, rather than as one
+object per dict:
+
+.. code-block:: python
+
+    {
+        "__columns__": {
+            "x": {"__ndarray__": [1.0, 3.0], "dtype": "float64", "shape": [2]},
+            "id": {"__ndarray__": [7, 8], "dtype": "int64", "shape": [2]},
+            "label": ["a", "b"]
+        }
+    }
+
+Columns of ints, floats or bools, or of numpy scalars of one dtype, become
+arrays, which the encoder writes like any other array, so
+`ndarray_encoding="base64"` and sidecar files apply to them. Other columns are
+written as lists.
+
+Decoding a list of dicts costs a call to the decoder for each of them, which a
+list of columns doesn't. Depending on its `columns_as`, the decoder returns the
+list of dicts, a structured array with a field for each column, or a dict of
+the column arrays.
+"""
+
+import sys
+import typing as t
+
+if t.TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
+
+ColumnarDecoding = t.Literal["records", "structured", "columns"]
+
+# Shorter lists are left as they are when finding lists to write by column,
+# since writing them by column saves little.
+MIN_ROWS = 16
+
+_PRIMITIVES = (str, int, float, bool, type(None))
+
+
+class Columns:
+    """
+    Wrap a list of dicts which have the same keys, for the encoder to write it
+    by column, whether or not it finds such lists itself.
+    """
+
+    def __init__(self, rows: t.Sequence[t.Dict[str, t.Any]]):
+        self.rows = rows
+
+    def encode(self) -> t.Dict[str, t.Any]:
+        columns = to_columns(self.rows)
+        if columns is None:
+            raise ValueError(
+                "Columns must wrap a list of dicts with the same keys, which don't start with __"
+            )
+        return {"__columns__": columns}
+
+
+def _column(values: t.List[t.Any]) -> t.Any:
+    import numpy as np
+
+    types = set(map(type, values))
+    if len(types) != 1:
+        return values
+    (cls,) = types
+    if cls is float or cls is bool:
+        return np.array(values, dtype=cls)
+    elif cls is int:
+        try:
+            return np.array(values, dtype=np.int64)
+        except OverflowError:
+            return values
+    elif issubclass(cls, (np.integer, np.floating, np.bool_)):
+        return np.array(values)
+    return values
+
+
+def to_columns(rows: t.Sequence[t.Any]) -> t.Optional[t.Dict[str, t.Any]]:
+    """
+    Return the columns of `rows`, in the order of the keys of the first row,
+    or None unless they are dicts with the same keys. Keys which start with
+    `__`, like the decoder's marker keys, aren't supported, since the rows
+    aren't decoded one by one.
+    """
+    if not rows:
+        return {}
+    keys = rows[0].keys() if type(rows[0]) is dict else None
+    if (
+        not keys
+        or any(type(key) is not str or key.startswith("__") for key in keys)
+        or not all(type(row) is dict and row.keys() == keys for row in rows)
+    ):
+        return None
+    return {key: _column([row[key] for row in rows]) for key in keys}
+
+
+def columnize(obj: t.Any, min_rows: int = MIN_ROWS) -> t.Any:
+    """
+    Return a copy of `obj` in which the lists and tuples of at least
+    `min_rows` dicts with the same keys, in its dicts, lists and tuples, are
+    replaced by their columns. Containers which hold none of them are not
+    copied.
+    """
+
+    def walk(obj: t.Any) -> t.Any:
+        cls = type(obj)
+        if cls in _PRIMITIVES:
+            return obj
+        elif cls is dict:
+            items = {name: walk(value) for name, value in obj.items()}
+            if any(items[name] is not value for name, value in obj.items()):
+                return items
+            return obj
+        elif cls is list or cls is tuple:
+            if len(obj) >= min_rows and type(obj[0]) is dict:
+                columns = to_columns(obj)
+                if columns is not None:
+                    return {"__columns__": columns}
+            values = [walk(value) for value in obj]
+            if any(new is not old for new, old in zip(values, obj)):
+                return cls(values)
+        return obj
+
+    return walk(obj)
+
+
+def _is_array(value: t.Any) -> bool:
+    np = sys.modules.get("numpy")
+    return np is not None and isinstance(value, np.ndarray)
+
+
+def _as_array(column: t.Any) -> "np.ndarray":
+    import numpy as np
+
+    if _is_array(column):
+        return column
+    elif column and all(type(value) is str for value in column):
+        return np.array(column)
+    return np.fromiter(column, dtype=object, count=len(column))
+
+
+def check_columnar_decoding(form: ColumnarDecoding) -> None:
+    if form not in t.get_args(ColumnarDecoding):
+        raise ValueError(
+            f"Unknown columns_as {form!r}; expected one of {', '.join(t.get_args(ColumnarDecoding))}"
+        )
+
+
+def decode_columns(obj: t.Any, form: ColumnarDecoding = "records") -> t.Any:
+    """
+    Decode `{"__columns__": columns}` to a list of dicts, a structured array,
+    or a dict of column arrays, in which the lists of strings are arrays of
+    strings, and other lists are arrays of objects.
+    """
+    columns = obj["__columns__"]
+    if len(obj) != 1 or type(columns) is not dict:
+        raise ValueError('Columns must be written as {"__columns__": {name: column}}')
+    if not all(
+        type(column) is list or _is_array(column) for column in columns.values()
+    ):
+        raise ValueError("Columns must be arrays or lists")
+    lengths = {len(column) for column in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError("Columns must all have the same length")
+
+    if form == "records":
+        values = [
+            column if type(column) is list else column.tolist()
+            for column in columns.values()
+        ]
+        return [dict(zip(columns, row)) for row in zip(*values)]
+
+    import numpy as np
+
+    arrays = {key: _as_array(column) for key, column in columns.items()}
+    if form == "columns":
+        return arrays
+    result = np.empty(
+        lengths.pop() if lengths else 0,
+        dtype=[(key, array.dtype, array.shape[1:]) for key, array in arrays.items()],
+    )
+    for key, array in arrays.items():
+        result[key] = array
+    return result
@@ -0,0 +1,126 @@
+"""
+Write the objects which appear more than once in a document once, and refer
+back to them everywhere else.
+
+The first occurrence of such an object is written as a definition, and the
+others as references to it:
+
+.. code-block:: python
+
+    {
+        "template": {"__shared__": 0, "value": {"color": "red"}},
+        "copies": [{"__ref__": 0}, {"__ref__": 0}]
+    }
+
+Since a definition always comes before its references in the document, a
+decoder created with `dedupe=True` resolves each reference to the object it
+has just decoded, so the loaded document shares them too.
+"""
+
+import typing as t
+
+Dedupe = t.Literal["identity", "content"]
+
+
+class SharedObject:
+    """
+    A placeholder for an object which appears more than once. The encoder
+    writes it as a definition the first time it is encoded, and as a
+    reference after that.
+    """
+
+    def __init__(self, index: int, value: t.Any):
+        self.index = index
+        self.value = value
+        self.written = False
+
+    def encode(self) -> t.Dict[str, t.Any]:
+        if self.written:
+            return {"__ref__": self.index}
+        self.written = True
+        return {"__shared__": self.index, "value": self.value}
+
+
+def _content_key(array: t.Any) -> t.Hashable:
+    import hashlib
+    import numpy as np
+
+    digest = hashlib.blake2b(np.ascontiguousarray(array).data, digest_size=16)
+    return (array.dtype.str, array.shape, digest.digest())
+
+
+def dedupe(obj: t.Any, by: Dedupe = "identity") -> t.Any:
+    """
+    Return a copy of `obj` in which the non-empty dicts, lists, tuples and
+    arrays which appear more than once are replaced by a `SharedObject`.
+    Objects are the same when they are identical or, with `by="content"`,
+    arrays are the same when they have the same dtype, shape and contents.
+    Containers which hold nothing shared are not copied.
+    """
+    import sys
+
+    np = sys.modules.get("numpy")
+    ndarray = None if np is None else np.ndarray
+
+    def key(obj: t.Any) -> t.Optional[t.Hashable]:
+        cls = type(obj)
+        if cls is dict or cls is list or cls is tuple:
+            return id(obj) if obj else None
+        elif ndarray is not None and isinstance(obj, ndarray) and obj.size:
+            if by == "content" and not obj.dtype.hasobject:
+                return _content_key(obj)
+            return id(obj)
+        return None
+
+    counts: t.Dict[t.Hashable, int] = {}
+
+    def count(obj: t.Any) -> None:
+        obj_key = key(obj)
+        if obj_key is None:
+            return
+        seen = counts.get(obj_key, 0)
+        counts[obj_key] = seen + 1
+        if seen:
+            return
+        cls = type(obj)
+        if cls is dict:
+            for value in obj.values():
+                count(value)
+        elif cls is list or cls is tuple:
+            for value in obj:
+                count(value)
+
+    count(obj)
+    if all(seen == 1 for seen in counts.values()):
+        return obj
+
+    shared: t.Dict[t.Hashable, SharedObject] = {}
+
+    def replace(obj: t.Any) -> t.Any:
+        obj_key = key(obj)
+        if obj_key is None:
+            return obj
+        if counts[obj_key] > 1:
+            placeholder = shared.get(obj_key)
+            if placeholder is None:
+                placeholder = shared[obj_key] = SharedObject(len(shared), None)
+                placeholder.value = copy(obj)
+            elif placeholder.value is None:
+                # Still copying it, so it contains itself.
+                raise ValueError("Circular reference detected")
+            return placeholder
+        return copy(obj)
+
+    def copy(obj: t.Any) -> t.Any:
+        cls = type(obj)
+        if cls is dict:
+            items = {name: replace(value) for name, value in obj.items()}
+            if any(items[name] is not value for name, value in obj.items()):
+                return items
+        elif cls is list or cls is tuple:
+            values = [replace(value) for value in obj]
+            if any(new is not old for new, old in zip(values, obj)):
+                return cls(values)
+        return obj
+
+    return replace(obj)
@@ -0,0 +1,135 @@
+"""
+Index the records of a JSON Lines file, so each one can be read without
+scanning the file.
+
+The index is a binary file next to the JSON Lines file, which holds the byte
+offset of each record, and optionally the hash of a key field of each record
+with its position, sorted by hash. Both are arrays of little-endian 64-bit
+integers, which the reader memory-maps, so opening an index doesn't read it.
+"""
+
+import array
+import bisect
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import typing as t
+
+Key = t.Union[str, int]
+
+_MAGIC = b"MSRIIDX1"
+# The magic, the number of records, the length of the key field name and the
+# size of the data file, followed by the key field name, padded to 8 bytes,
+# the offsets of the records and of the end of the last one, and when there
+# is a key field, the sorted hashes of the keys and the position of each.
+_HEADER = struct.Struct("<8sQQQ")
+
+
+def index_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".idx"
+
+
+def key_hash(key: Key) -> int:
+    if isinstance(key, str):
+        data = b"s" + key.encode("utf-8")
+    elif type(key) is int:
+        data = b"i" + str(key).encode("ascii")
+    else:
+        raise ValueError(f"Keys must be str or int, not {type(key).__name__}")
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+def _little_endian(values: array.array) -> bytes:
+    if sys.byteorder == "big":  # pragma: no cover
+        values = array.array("Q", values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _uint64s(view: memoryview) -> t.Sequence[int]:
+    if sys.byteorder == "big":  # pragma: no cover
+        values = array.array("Q", view.tobytes())
+        values.byteswap()
+        return values
+    return view.cast("Q")
+
+
+def write_index(
+    f: t.IO[bytes],
+    offsets: array.array,
+    key_field: t.Optional[str] = None,
+    hashes: t.Optional[array.array] = None,
+) -> None:
+    """
+    Write the index of a data file, given the offsets of its records and of
+    its end, and when there is a key field, the hash of each key.
+    """
+    name = (key_field or "").encode("utf-8")
+    f.write(_HEADER.pack(_MAGIC, len(offsets) - 1, len(name), offsets[-1]))
+    f.write(name + b"\0" * (-len(name) % 8))
+    f.write(_little_endian(offsets))
+    if hashes is not None:
+        order = sorted(range(len(hashes)), key=hashes.__getitem__)
+        f.write(_little_endian(array.array("Q", (hashes[i] for i in order))))
+        f.write(_little_endian(array.array("Q", order)))
+
+
+class Index:
+    """
+    The memory-mapped index of the data file at `path`.
+    """
+
+    def __init__(self, path: str):
+        with open(index_path(path), "rb") as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size or not header.startswith(_MAGIC):
+                raise ValueError(f"{index_path(path)} is not a JSON Lines index")
+            _, count, name_length, size = _HEADER.unpack(header)
+            if os.path.getsize(path) != size:
+                raise ValueError(f"The index of {path} is out of date; write it again")
+            self._mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        position = _HEADER.size
+        self.key_field = (
+            str(self._mapped[position : position + name_length], "utf-8") or None
+        )
+        position += name_length + -name_length % 8
+        self._view = memoryview(self._mapped)
+        self.offsets = _uint64s(self._view[position : position + 8 * (count + 1)])
+        position += 8 * (count + 1)
+        self.hashes = _uint64s(self._view[position : position + 8 * count])
+        self.positions = _uint64s(self._view[position + 8 * count :])
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def span(self, n: int) -> t.Tuple[int, int]:
+        """
+        Return the byte offsets of the start and end of record `n`.
+        """
+        if n < 0:
+            n += len(self)
+        if not 0 <= n < len(self):
+            raise IndexError("record index out of range")
+        return self.offsets[n], self.offsets[n + 1]
+
+    def candidates(self, key: Key) -> t.Iterator[int]:
+        """
+        Yield the positions of the records whose key has the same hash as
+        `key`, in order.
+        """
+        if self.key_field is None:
+            raise ValueError("The index has no key field")
+        digest = key_hash(key)
+        i = bisect.bisect_left(self.hashes, digest)
+        while i < len(self.hashes) and self.hashes[i] == digest:
+            yield self.positions[i]
+            i += 1
+
+    def close(self) -> None:
+        for view in [self.offsets, self.hashes, self.positions, self._view]:
+            if isinstance(view, memoryview):
+                view.release()
+        self._mapped.close()
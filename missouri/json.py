@@ -2,10 +2,56 @@
 # https://github.com/metabolize-forks/baiji-serialization/tree/8b77f19685555e1bab03e75a433d00ce6fa4bea5
 # Apache 2.0
 
+import contextlib
+import io
 import typing as t
-import simplejson as json
+from .backends import Backend, get_backend
+from .cachelib import Cache, default_memory_cache
 from .coding import JSONDecoder, JSONEncoder
-from .openlib import Readable, Writable, ensure_text_file_open
+from .lazylib import Document
+from .numpylib import extract_ndarray_lists
+from .openlib import (
+    BinaryReadable,
+    BinaryWritable,
+    Readable,
+    Writable,
+    ensure_binary_file_open,
+    ensure_buffer,
+    ensure_text_file_open,
+    path_of,
+    read_buffer,
+)
+from .poollib import (  # noqa: F401 FileError is re-exported
+    Executor,
+    FileError,
+    discard_shared_arrays,
+    imap,
+    is_process_executor,
+    share_arrays,
+    start_sharing_arrays,
+    unshare_arrays,
+)
+from .streamlib import iter_items as _iter_items
+
+if t.TYPE_CHECKING:  # pragma: no cover
+    import concurrent.futures
+    from . import asynclib
+
+
+# Keyword arguments which configure the default JSONEncoder and JSONDecoder.
+_ENCODER_OPTIONS = (
+    "encode_as_primitives",
+    "ndarray_encoding",
+    "sidecar_threshold",
+    "precision",
+    "significant_digits",
+    "dedupe",
+    "tagged",
+    "columnar",
+)
+_DECODER_OPTIONS = ("sidecar_directory", "columns_as", "dedupe", "tagged")
+# Keyword arguments which configure how files are opened.
+_OPEN_OPTIONS = ("compression", "compresslevel", "atomic", "buffer_size", "fsync")
 
 
 def _dump_args(kwargs: dict) -> dict:
@@ -18,21 +64,118 @@ def _dump_args(kwargs: dict) -> dict:
         del kwargs["encoder"]
     else:
         kwargs["default"] = JSONEncoder(
-            encode_as_primitives=kwargs.get("encode_as_primitives", None)
+            **{name: kwargs.get(name, None) for name in _ENCODER_OPTIONS}
         )
-    if "encode_as_primitives" in kwargs:
-        del kwargs["encode_as_primitives"]
+    for name in _ENCODER_OPTIONS:
+        kwargs.pop(name, None)
     kwargs["for_json"] = True
     return kwargs
 
 
+def _backend(kwargs: dict) -> Backend:
+    return get_backend(kwargs.pop("backend", None))
+
+
+def _open_args(kwargs: dict) -> dict:
+    return {name: kwargs.pop(name) for name in _OPEN_OPTIONS if name in kwargs}
+
+
+def _prepared(obj: t.Any, dump_args: dict) -> t.Any:
+    encoder = dump_args["default"]
+    return encoder.prepare(obj) if isinstance(encoder, JSONEncoder) else obj
+
+
+@contextlib.contextmanager
+def _writing_sidecar(
+    dump_args: dict, path: t.Optional[t.Union[Writable, BinaryWritable]]
+) -> t.Iterator[dict]:
+    """
+    Yield the arguments to encode the document at `path` with, whose encoder
+    writes its sidecar file when it has a sidecar_threshold.
+    """
+    encoder = dump_args["default"]
+    if not isinstance(encoder, JSONEncoder) or encoder.sidecar_threshold is None:
+        yield dump_args
+        return
+    json_path = None if path is None else path_of(path)
+    if json_path is None:
+        raise ValueError("Writing arrays to a sidecar file requires a path")
+    with encoder.writing_sidecar(json_path) as encoder:
+        yield dict(dump_args, default=encoder)
+
+
 def dump(obj: t.Any, path: Writable, *args: object, **kwargs: object) -> None:
-    with ensure_text_file_open(path, "w") as f:
-        json.dump(obj, f, *args, **_dump_args(kwargs))
+    """
+    Encode `obj` to a path or a text file object.
+
+    Pass `atomic=True` to write to a temporary file which only replaces `path`
+    once the whole document has been written, `fsync=True` to flush it to disk
+    before returning, and `buffer_size` to set the size of the write buffer.
+    Pass `single_write=True` to encode the whole document in memory first and
+    write it with a single call, which is faster but holds the encoded
+    document in memory.
+
+    Pass `precision` or `significant_digits` to round the floats in the
+    document, including those in arrays, to that many decimal places or
+    significant digits. See `missouri.coding.JSONEncoder`.
+    """
+    backend = _backend(kwargs)
+    single_write = kwargs.pop("single_write", False)
+    open_args = _open_args(kwargs)
+    dump_args = _dump_args(kwargs)
+    obj = _prepared(obj, dump_args)
+    with ensure_text_file_open(path, "w", **open_args) as f, _writing_sidecar(
+        dump_args, path
+    ) as dump_args:
+        if not single_write:
+            backend.dump(obj, f, *args, **dump_args)
+        elif args:
+            # Only a backend's dump takes positional arguments, so encode the
+            # document in memory with it.
+            buffer = io.StringIO()
+            backend.dump(obj, buffer, *args, **dump_args)
+            f.write(buffer.getvalue())
+        else:
+            f.write(backend.dumps(obj, **dump_args))
 
 
 def dumps(obj: t.Any, **kwargs: object) -> str:
-    return json.dumps(obj, **_dump_args(kwargs))
+    backend = _backend(kwargs)
+    dump_args = _dump_args(kwargs)
+    obj = _prepared(obj, dump_args)
+    with _writing_sidecar(dump_args, None) as dump_args:
+        return backend.dumps(obj, **dump_args)
+
+
+def dump_bytes(obj: t.Any, path: BinaryWritable, **kwargs: object) -> None:
+    """
+    Like `dump`, but write UTF-8 to a path or a binary file object, without
+    going through a text layer.
+    """
+    backend = _backend(kwargs)
+    single_write = kwargs.pop("single_write", False)
+    open_args = _open_args(kwargs)
+    dump_args = _dump_args(kwargs)
+    obj = _prepared(obj, dump_args)
+    with ensure_binary_file_open(path, "wb", **open_args) as f, _writing_sidecar(
+        dump_args, path
+    ) as dump_args:
+        if single_write:
+            f.write(backend.dumps_bytes(obj, **dump_args))
+        else:
+            backend.dump_bytes(obj, f, **dump_args)
+
+
+def dumps_bytes(obj: t.Any, **kwargs: object) -> bytes:
+    """
+    Like `dumps`, but return UTF-8. With the orjson backend, no intermediate
+    string is created.
+    """
+    backend = _backend(kwargs)
+    dump_args = _dump_args(kwargs)
+    obj = _prepared(obj, dump_args)
+    with _writing_sidecar(dump_args, None) as dump_args:
+        return backend.dumps_bytes(obj, **dump_args)
 
 
 def _load_args(kwargs: dict) -> dict:
@@ -44,14 +187,423 @@ def _load_args(kwargs: dict) -> dict:
         kwargs["object_hook"] = kwargs["decoder"]
         del kwargs["decoder"]
     else:
-        kwargs["object_hook"] = JSONDecoder()
+        kwargs["object_hook"] = JSONDecoder(
+            **{name: kwargs.get(name, None) for name in _DECODER_OPTIONS}
+        )
+    for name in _DECODER_OPTIONS:
+        kwargs.pop(name, None)
     return kwargs
 
 
+@contextlib.contextmanager
+def _reading_document(
+    load_args: dict, path: t.Optional[t.Union[Readable, BinaryReadable]]
+) -> t.Iterator[dict]:
+    """
+    Yield the arguments to decode the document at `path` with, whose decoder
+    holds the state of this call: it resolves references to the document's
+    sidecar file, and to the objects shared in it.
+    """
+    decoder = load_args["object_hook"]
+    if not isinstance(decoder, JSONDecoder):
+        yield load_args
+        return
+    json_path = None if path is None else path_of(path)
+    with contextlib.ExitStack() as stack:
+        if json_path is not None:
+            decoder = stack.enter_context(decoder.reading_sidecar(json_path))
+        decoder = stack.enter_context(decoder.reading_shared_objects())
+        yield dict(load_args, object_hook=decoder)
+
+
+def _next_document(load_args: dict) -> None:
+    """
+    Forget the objects shared in the previous document decoded with the
+    arguments yielded by `_reading_document`, like each record of a JSON Lines
+    file.
+    """
+    decoder = load_args["object_hook"]
+    if isinstance(decoder, JSONDecoder) and "__ref__" in decoder.key_dispatch:
+        decoder.shared_objects.clear()
+
+
+def _loads_direct(backend: Backend, text: str, load_args: dict) -> t.Any:
+    decoder = load_args["object_hook"]
+    if not isinstance(decoder, JSONDecoder):
+        raise ValueError("direct_ndarrays requires a missouri.coding.JSONDecoder")
+    parsed_text, arrays = extract_ndarray_lists(text)
+    with decoder.reading_parsed_arrays(arrays) as decoder:
+        try:
+            return backend.loads(parsed_text, **dict(load_args, object_hook=decoder))
+        except ValueError:
+            if not arrays:
+                raise
+    # The error's position is in the text without the arrays, so decode the
+    # original to raise it at the position in the caller's document.
+    return backend.loads(text, **load_args)
+
+
+# Load options which don't change the decoded document, or which configure
+# the decoder and are described by `_decoder_key`, so aren't part of the key
+# of a cache entry themselves.
+_CACHE_IGNORED_OPTIONS = (
+    "decoder",
+    "backend",
+    "direct_ndarrays",
+    *_DECODER_OPTIONS,
+    *_OPEN_OPTIONS,
+)
+
+
+def _qualified_name(obj: t.Any) -> str:
+    if not hasattr(obj, "__qualname__"):
+        obj = type(obj)
+    return f"{getattr(obj, '__module__', None)}.{obj.__qualname__}"
+
+
+def _decoder_key(kwargs: dict) -> t.Any:
+    """
+    Describe the decoder which `load` decodes with for `kwargs`, for the key of
+    a cache entry: its class, its options, and the methods registered on it.
+    """
+    decoder = (
+        kwargs["decoder"]
+        if "decoder" in kwargs
+        else JSONDecoder(**{name: kwargs.get(name, None) for name in _DECODER_OPTIONS})
+    )
+    if not isinstance(decoder, JSONDecoder):
+        return None if decoder is None else _qualified_name(decoder)
+    return (
+        _qualified_name(decoder),
+        [(name, getattr(decoder, name, None)) for name in _DECODER_OPTIONS],
+        [_qualified_name(method) for method in decoder.method_list],
+        sorted(
+            (key, _qualified_name(method))
+            for key, method in decoder.key_dispatch.items()
+        ),
+    )
+
+
+def _load_cached(
+    cache: Cache, path: Readable, args: t.Tuple[object, ...], kwargs: dict
+) -> t.Any:
+    if not isinstance(path, str):
+        raise ValueError("cache is only supported when loading a path")
+    options = repr(
+        (
+            _decoder_key(kwargs),
+            args,
+            sorted(
+                (name, repr(value))
+                for name, value in kwargs.items()
+                if name not in _CACHE_IGNORED_OPTIONS
+            ),
+        )
+    )
+    return cache.get_or_load(path, options, lambda: load(path, *args, **kwargs))
+
+
 def load(path: Readable, *args: object, **kwargs: object) -> t.Any:
-    with ensure_text_file_open(path, "r") as f:
-        return json.load(f, *args, **_load_args(kwargs))
+    """
+    Decode a document from a path or a text file object.
+
+    Pass `dedupe=True` or `tagged=True` to restore the objects written with
+    the dump options of the same names, and `columns_as` to decode the lists
+    written with `columnar=True`. Otherwise they load as plain dicts. See
+    `missouri.coding.JSONDecoder`.
+
+    Pass a `missouri.cachelib.DiskCache` or `MemoryCache` as `cache` to store
+    the decoded document, and load it from there while the file is unchanged.
+
+    Pass `direct_ndarrays=True` to parse numeric arrays encoded as nested
+    lists straight into arrays, rather than into a list of Python numbers
+    which is then converted. This takes a fraction of the memory, at the cost
+    of reading the whole document into a string first. See
+    `missouri.numpylib.extract_ndarray_lists`.
+    """
+    cache = kwargs.pop("cache", None)
+    if cache is not None:
+        return _load_cached(t.cast(Cache, cache), path, args, kwargs)
+    backend = _backend(kwargs)
+    direct_ndarrays = kwargs.pop("direct_ndarrays", False)
+    open_args = _open_args(kwargs)
+    load_args = _load_args(kwargs)
+    with ensure_text_file_open(path, "r", **open_args) as f, _reading_document(
+        load_args, path
+    ) as load_args:
+        if direct_ndarrays:
+            return _loads_direct(backend, f.read(), load_args)
+        return backend.load(f, *args, **load_args)
+
+
+def cached_load(path: str, *args: object, **kwargs: object) -> t.Any:
+    """
+    Decode a document from a path, keeping it in memory to return again while
+    the file is unchanged. The arrays in the document are read-only. Pass a
+    `missouri.cachelib.MemoryCache` as `cache` to bound its size, or to keep
+    it apart from the default cache.
+    """
+    if kwargs.get("cache") is None:
+        kwargs["cache"] = default_memory_cache()
+    return load(path, *args, **kwargs)
 
 
 def loads(s: str, **kwargs: object) -> t.Any:
-    return json.loads(s, **_load_args(kwargs))
+    backend = _backend(kwargs)
+    direct_ndarrays = kwargs.pop("direct_ndarrays", False)
+    with _reading_document(_load_args(kwargs), None) as load_args:
+        if direct_ndarrays:
+            return _loads_direct(backend, s, load_args)
+        return backend.loads(s, **load_args)
+
+
+def load_bytes(source: BinaryReadable, **kwargs: object) -> t.Any:
+    """
+    Like `load`, but read UTF-8 from a path, a binary file object, or a buffer
+    such as `bytes`, `memoryview` or `mmap.mmap`.
+
+    Files at a path are memory-mapped instead of read into memory. The orjson
+    backend parses the buffer directly. The other backends decode it to a
+    string, and the file is unmapped before parsing.
+    """
+    backend = _backend(kwargs)
+    direct_ndarrays = kwargs.pop("direct_ndarrays", False)
+    open_args = _open_args(kwargs)
+    load_args = _load_args(kwargs)
+    with _reading_document(load_args, source) as load_args:
+        with ensure_buffer(source, **open_args) as data:
+            if backend.native_bytes and not direct_ndarrays:
+                return backend.loads_bytes(data, **load_args)
+            text = str(data, "utf-8")
+        if direct_ndarrays:
+            return _loads_direct(backend, text, load_args)
+        return backend.loads(text, **load_args)
+
+
+def _lazy_markers(decoder: t.Any) -> t.Optional[t.Collection[str]]:
+    if decoder is None:
+        return ()
+    elif isinstance(decoder, JSONDecoder) and not decoder.method_list:
+        return decoder.key_dispatch.keys()
+    # Other decoders may change any object.
+    return None
+
+
+class _LazyDecode:
+    """
+    Decode the values of a document opened by `load_lazy`. They are decoded on
+    demand, long after it returns, but are all part of one document, so this
+    keeps the document's `_reading_document` context open for as long as the
+    proxies use it.
+    """
+
+    def __init__(
+        self, backend: Backend, load_args: dict, source: BinaryReadable
+    ) -> None:
+        self.backend = backend
+        self.context = contextlib.ExitStack()
+        self.decode_args = self.context.enter_context(
+            _reading_document(load_args, source)
+        )
+
+    def __call__(self, value: bytes) -> t.Any:
+        if self.backend.native_bytes:
+            return self.backend.loads_bytes(value, **self.decode_args)
+        return self.backend.loads(str(value, "utf-8"), **self.decode_args)
+
+
+def load_lazy(source: BinaryReadable, **kwargs: object) -> t.Any:
+    """
+    Open a document without decoding it, returning its root object or array
+    as a read-only `Mapping` or `Sequence` which decodes each value the first
+    time it is looked up, and caches it. Nested objects and arrays are
+    returned as proxies too, except objects the decoder handles, like arrays,
+    which are decoded in full. Call `decode()` on a proxy to decode all of it.
+    See `missouri.lazylib`.
+
+    Accepts a path, a binary file object or a buffer, like `load_bytes`. Files
+    at a path are memory-mapped for as long as a proxy is in use, and other
+    files are read into memory.
+
+    Objects shared with `dedupe` are decoded in the order they are looked up,
+    so a reference can only be decoded after the object it refers to.
+    """
+    backend = _backend(kwargs)
+    open_args = _open_args(kwargs)
+    load_args = _load_args(kwargs)
+    data = read_buffer(source, **open_args)
+    decode = _LazyDecode(backend, load_args, source)
+    return Document(
+        data, decode, _lazy_markers(decode.decode_args["object_hook"])
+    ).root()
+
+
+def iter_items(
+    path: Readable, prefix: str, chunk_size: int = 1 << 20, **kwargs: object
+) -> t.Iterator[t.Any]:
+    """
+    Lazily decode the values at `prefix` in a document which may be too large
+    to load at once, reading it `chunk_size` characters at a time. For example,
+    `prefix="frames.item"` yields each element of the `"frames"` array, and
+    `prefix="frames"` yields the array itself.
+
+    Accepts the same keyword arguments as `load`. Only the yielded values are
+    passed through the decoder.
+    """
+    backend = _backend(kwargs)
+    open_args = _open_args(kwargs)
+    load_args = _load_args(kwargs)
+    with ensure_text_file_open(path, "r", **open_args) as f, _reading_document(
+        load_args, path
+    ) as load_args:
+        yield from _iter_items(
+            f,
+            prefix,
+            chunk_size,
+            decode=backend.decoder(load_args),
+            raw_decode=backend.raw_decoder(load_args),
+        )
+
+
+def _task_kwargs(kwargs: dict, executor: Executor) -> dict:
+    import copy
+
+    # Each task gets its own copy of the encoder or decoder, which holds
+    # per-file state. Worker processes get theirs by unpickling. The other
+    # arguments, like a cache, are shared by the tasks.
+    if is_process_executor(executor):
+        return dict(kwargs)
+    return {
+        name: copy.deepcopy(value) if name in ("encoder", "decoder") else value
+        for name, value in kwargs.items()
+    }
+
+
+def _load_one(path: str, kwargs: dict, share: bool) -> t.Any:
+    value = load(path, **kwargs)
+    return share_arrays(value) if share else value
+
+
+def iter_load_many(
+    paths: t.Iterable[str],
+    workers: t.Optional[int] = None,
+    executor: Executor = "thread",
+    ordered: bool = True,
+    **kwargs: object,
+) -> t.Generator[t.Tuple[str, t.Any], None, None]:
+    """
+    Load many files in parallel, yielding `(path, value)` in the order of
+    `paths` or, when `ordered` is False, as each file is loaded.
+
+    `executor` is `"thread"`, `"process"` or a `concurrent.futures.Executor`,
+    and `workers` is the number of workers in the pool it creates. Threads
+    help most with the orjson backend and with slow storage; processes help
+    with CPU-bound decoding. With processes, the decoder is pickled and large
+    arrays come back through shared memory.
+
+    Accepts the same keyword arguments as `load`. A file which fails to load
+    raises a `FileError` with its path.
+    """
+    share = is_process_executor(executor)
+    if share:
+        start_sharing_arrays()
+    tasks = ((path, (path, _task_kwargs(kwargs, executor), share)) for path in paths)
+    for path, value in imap(
+        _load_one,
+        tasks,
+        executor,
+        workers,
+        ordered=ordered,
+        discard=discard_shared_arrays if share else None,
+    ):
+        yield path, unshare_arrays(value) if share else value
+
+
+def load_many(
+    paths: t.Iterable[str],
+    workers: t.Optional[int] = None,
+    executor: Executor = "thread",
+    **kwargs: object,
+) -> t.List[t.Any]:
+    """
+    Load many files in parallel, returning their values in the order of
+    `paths`. See `iter_load_many`.
+    """
+    return [
+        value
+        for _, value in iter_load_many(
+            paths, workers, executor, True, **t.cast(t.Dict[str, t.Any], kwargs)
+        )
+    ]
+
+
+def _dump_one(obj: t.Any, path: str, kwargs: dict) -> None:
+    dump(obj, path, **kwargs)
+
+
+def dump_many(
+    items: t.Union[t.Mapping[str, t.Any], t.Iterable[t.Tuple[str, t.Any]]],
+    workers: t.Optional[int] = None,
+    executor: Executor = "thread",
+    **kwargs: object,
+) -> None:
+    """
+    Dump many objects to files in parallel. `items` maps each path to the
+    object to write there, or is an iterable of `(path, obj)` pairs.
+
+    Accepts the same keyword arguments as `dump`, along with `workers` and
+    `executor` as for `iter_load_many`. A file which fails to be written
+    raises a `FileError` with its path.
+    """
+    pairs = items.items() if isinstance(items, t.Mapping) else items
+    tasks = ((path, (obj, path, _task_kwargs(kwargs, executor))) for path, obj in pairs)
+    for _ in imap(_dump_one, tasks, executor, workers):
+        pass
+
+
+async def aload(
+    source: t.Union[Readable, "asynclib.AsyncReader"],
+    executor: t.Optional["concurrent.futures.Executor"] = None,
+    **kwargs: object,
+) -> t.Any:
+    """
+    Like `load`, but without blocking the event loop: reading and decoding run
+    on `executor`, by default a small pool of threads shared by all calls (see
+    `missouri.asynclib.set_max_workers`).
+
+    `source` may also be an async reader with a coroutine `read()`, like
+    `asyncio.StreamReader`, which is read to the end on the event loop.
+
+    The orjson backend holds the GIL while it parses, which stalls the event
+    loop anyway. Pass a `concurrent.futures.ProcessPoolExecutor` to avoid
+    that.
+    """
+    from . import asynclib
+
+    if asynclib.is_async_reader(source):
+        data = await t.cast(asynclib.AsyncReader, source).read()
+        decode = load_bytes if isinstance(data, (bytes, bytearray)) else loads
+        return await asynclib.run(executor, decode, data, **kwargs)
+    return await asynclib.run(executor, load, t.cast(Readable, source), **kwargs)
+
+
+async def adump(
+    obj: t.Any,
+    destination: t.Union[Writable, "asynclib.AsyncWriter"],
+    executor: t.Optional["concurrent.futures.Executor"] = None,
+    **kwargs: object,
+) -> None:
+    """
+    Like `dump`, but without blocking the event loop: encoding and writing run
+    on `executor`, as for `aload`.
+
+    `destination` may also be an async writer, like `asyncio.StreamWriter`,
+    which is sent the UTF-8 encoded document and drained.
+    """
+    from . import asynclib
+
+    if asynclib.is_async_writer(destination):
+        data = await asynclib.run(executor, dumps_bytes, obj, **kwargs)
+        await asynclib.write(t.cast(asynclib.AsyncWriter, destination), data)
+    else:
+        await asynclib.run(executor, dump, obj, t.cast(Writable, destination), **kwargs)
@@ -0,0 +1,365 @@
+"""
+Read and write JSON Lines files, which hold one JSON document per line.
+
+Records are read and written one at a time, so memory use does not grow with
+the size of the file.
+
+`dump_indexed` also writes an index of the records, which `IndexedReader` uses
+to read any record, by position or by key, without scanning the file. See
+`missouri.indexlib`.
+
+`iter_load_parallel` and `dump_iter_parallel` decode and encode large files
+on a pool of processes, a chunk of the file at a time.
+"""
+
+import array
+import contextlib
+import mmap
+import os
+import typing as t
+from .indexlib import Index, Key, index_path, key_hash, write_index
+from .json import (
+    _backend,
+    _dump_args,
+    _load_args,
+    _next_document,
+    _open_args,
+    _prepared,
+    _reading_document,
+    _task_kwargs,
+    _writing_sidecar,
+)
+from .openlib import (
+    Readable,
+    Writable,
+    detect_compression,
+    ensure_binary_file_open,
+    ensure_text_file_open,
+)
+from .poollib import (
+    Executor,
+    discard_shared_arrays,
+    imap,
+    is_process_executor,
+    share_arrays,
+    start_sharing_arrays,
+    unshare_arrays,
+)
+
+
+def iter_load(path: Readable, **kwargs: object) -> t.Iterator[t.Any]:
+    """
+    Lazily decode each line of a JSON Lines file. Blank lines are skipped.
+    Accepts the same keyword arguments as `missouri.json.load`.
+    """
+    backend = _backend(kwargs)
+    open_args = _open_args(kwargs)
+    load_args = _load_args(kwargs)
+    with ensure_text_file_open(path, "r", **open_args) as f, _reading_document(
+        load_args, path
+    ) as load_args:
+        decode = backend.decoder(load_args)
+        for line in f:
+            if line.strip():
+                _next_document(load_args)
+                yield decode(line)
+
+
+def dump_iter(iterable: t.Iterable[t.Any], path: Writable, **kwargs: object) -> None:
+    """
+    Write each item of `iterable` as one line of a JSON Lines file, consuming the
+    iterable incrementally. Accepts the same keyword arguments as
+    `missouri.json.dump`, except for `indent`.
+    """
+    if kwargs.get("indent") is not None:
+        raise ValueError("JSON Lines records can't be indented")
+    backend = _backend(kwargs)
+    open_args = _open_args(kwargs)
+    dump_args = _dump_args(kwargs)
+    with ensure_text_file_open(path, "w", **open_args) as f, _writing_sidecar(
+        dump_args, path
+    ) as dump_args:
+        encode = backend.encoder(dump_args)
+        for item in iterable:
+            f.write(encode(_prepared(item, dump_args)))
+            f.write("\n")
+
+
+def _check_uncompressed(path: str, open_args: dict, mode: str, what: str) -> None:
+    if (open_args.get("compression") or detect_compression(path, mode)) is not None:
+        raise ValueError(f"{what} can't be compressed")
+
+
+def dump_indexed(
+    iterable: t.Iterable[t.Any],
+    path: str,
+    key: t.Optional[str] = None,
+    **kwargs: object,
+) -> None:
+    """
+    Like `dump_iter`, but also write an index of the records next to `path`,
+    for `IndexedReader`. Pass the name of a field of the records as `key` to
+    look them up by the value of that field, which must be a str or int.
+
+    The file can't be compressed, since records are read from it in place.
+    """
+    if kwargs.get("indent") is not None:
+        raise ValueError("JSON Lines records can't be indented")
+    backend = _backend(kwargs)
+    open_args = _open_args(kwargs)
+    _check_uncompressed(path, open_args, "wb", "Indexed JSON Lines files")
+    dump_args = _dump_args(kwargs)
+    offsets = array.array("Q", [0])
+    hashes = None if key is None else array.array("Q")
+    with ensure_binary_file_open(path, "wb", **open_args) as f, _writing_sidecar(
+        dump_args, path
+    ) as dump_args:
+        encode = backend.encoder(dump_args)
+        for item in iterable:
+            if hashes is not None:
+                hashes.append(key_hash(item[key]))
+            line = encode(_prepared(item, dump_args)).encode("utf-8") + b"\n"
+            f.write(line)
+            offsets.append(offsets[-1] + len(line))
+    index_args = {
+        name: open_args[name] for name in ["atomic", "fsync"] if name in open_args
+    }
+    with ensure_binary_file_open(index_path(path), "wb", **index_args) as f:
+        write_index(f, offsets, key, hashes)
+
+
+class IndexedReader:
+    """
+    Read the records of a JSON Lines file written by `dump_indexed`, using
+    its index. `reader[n]` decodes record `n`, `get_many` decodes a batch of
+    records, and `lookup` finds the first record with a given key.
+
+    The file and its index are memory-mapped until `close()`. Accepts the
+    same keyword arguments as `missouri.json.load`, except for the ones which
+    open the file.
+    """
+
+    def __init__(self, path: str, **kwargs: object):
+        self.path = path
+        backend = _backend(kwargs)
+        self._load_args = _load_args(kwargs)
+        self._backend = backend
+        self.index = Index(path)
+        with open(path, "rb") as f:
+            # Empty files can't be mapped.
+            self._data: t.Union[bytes, mmap.mmap] = (
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                if len(self.index)
+                else b""
+            )
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @contextlib.contextmanager
+    def _decoding(self) -> t.Iterator[t.Callable[[int], t.Any]]:
+        """
+        Yield a function which decodes record `n`, for one call.
+        """
+        backend = self._backend
+        with _reading_document(self._load_args, self.path) as load_args:
+            decode = None if backend.native_bytes else backend.decoder(load_args)
+
+            def record(n: int) -> t.Any:
+                start, end = self.index.span(n)
+                _next_document(load_args)
+                if decode is None:
+                    return backend.loads_bytes(self._data[start:end], **load_args)
+                return decode(str(self._data[start:end], "utf-8"))
+
+            yield record
+
+    def __getitem__(self, n: int) -> t.Any:
+        with self._decoding() as record:
+            return record(n)
+
+    def get_many(self, indices: t.Iterable[int]) -> t.List[t.Any]:
+        """
+        Decode the records at `indices`, reading them in the order they
+        appear in the file, and return them in the order of `indices`.
+        """
+        positions = [n + len(self) if n < 0 else n for n in indices]
+        records: t.List[t.Any] = [None] * len(positions)
+        with self._decoding() as record:
+            for i in sorted(range(len(positions)), key=positions.__getitem__):
+                records[i] = record(positions[i])
+        return records
+
+    def lookup(self, key: Key) -> t.Any:
+        """
+        Decode the first record whose key field is `key`, or raise a
+        `KeyError`.
+        """
+        with self._decoding() as decode:
+            for n in self.index.candidates(key):
+                record = decode(n)
+                # Another key may have the same hash.
+                if record[self.index.key_field] == key:
+                    return record
+        raise KeyError(key)
+
+    def close(self) -> None:
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self.index.close()
+
+    def __enter__(self) -> "IndexedReader":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def _line_ranges(path: str, chunk_size: int) -> t.Iterator[t.Tuple[int, int]]:
+    """
+    Split the file at `path` into ranges of about `chunk_size` bytes, which
+    end at the end of a line.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        start = 0
+        while start < size:
+            f.seek(start + chunk_size)
+            end = min(f.tell() + len(f.readline()), size)
+            yield start, end
+            start = end
+
+
+def _load_range(
+    path: str,
+    start: int,
+    end: int,
+    function: t.Optional[t.Callable[[t.Any], t.Any]],
+    kwargs: dict,
+    share: bool,
+) -> t.Tuple[list, bool]:
+    """
+    Decode the records from `start` to `end`, and return them with whether
+    their arrays were moved to shared memory.
+    """
+    backend = _backend(kwargs)
+    load_args = _load_args(kwargs)
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    # Only split on newlines: str.splitlines() also splits on characters
+    # which JSON strings may hold unescaped.
+    with _reading_document(load_args, path) as load_args:
+        decode = backend.decoder(load_args)
+        records = []
+        for line in str(data, "utf-8").split("\n"):
+            if line.strip():
+                _next_document(load_args)
+                records.append(decode(line))
+    if function is not None:
+        records = [function(record) for record in records]
+    # Walking the records to share their arrays is only worth it when the
+    # chunk holds encoded arrays. Other arrays are pickled.
+    shared = share and b"__ndarray" in data
+    return (share_arrays(records) if shared else records), shared
+
+
+def _discard_range(result: t.Tuple[list, bool]) -> None:
+    records, shared = result
+    if shared:
+        discard_shared_arrays(records)
+
+
+def iter_load_parallel(
+    path: str,
+    function: t.Optional[t.Callable[[t.Any], t.Any]] = None,
+    workers: t.Optional[int] = None,
+    executor: Executor = "process",
+    ordered: bool = True,
+    chunk_size: int = 1 << 20,
+    **kwargs: object,
+) -> t.Generator[t.Any, None, None]:
+    """
+    Like `iter_load`, but decode chunks of about `chunk_size` bytes of the
+    file in parallel, on a pool of processes by default. Records are yielded
+    in the order of the file or, when `ordered` is False, a chunk at a time
+    as each is decoded. Only a few chunks per worker are decoded ahead of the
+    records being consumed.
+
+    Sending the records back from the workers costs about as much as decoding
+    them, so this is fastest with `function`, which is called on each record
+    in the worker, and whose results are yielded instead. Use it to extract
+    the parts of the records which are needed, or to process them in full.
+    With processes it must be picklable, for example a module-level function.
+
+    `workers` and `executor` are as for `missouri.json.iter_load_many`. The
+    file can't be compressed, since each worker reads its own chunk of it.
+    """
+    _check_uncompressed(
+        path, _open_args(kwargs), "rb", "JSON Lines files read in parallel"
+    )
+    share = is_process_executor(executor)
+    if share:
+        start_sharing_arrays()
+    tasks = (
+        (path, (path, start, end, function, _task_kwargs(kwargs, executor), share))
+        for start, end in _line_ranges(path, chunk_size)
+    )
+    for _, (records, shared) in imap(
+        _load_range,
+        tasks,
+        executor,
+        workers,
+        ordered=ordered,
+        discard=_discard_range,
+    ):
+        yield from unshare_arrays(records) if shared else records
+
+
+def _dump_batch(items: t.List[t.Any], kwargs: dict) -> str:
+    backend = _backend(kwargs)
+    dump_args = _dump_args(kwargs)
+    encode = backend.encoder(dump_args)
+    return "".join(encode(_prepared(item, dump_args)) + "\n" for item in items)
+
+
+def _batches(iterable: t.Iterable[t.Any], size: int) -> t.Iterator[t.List[t.Any]]:
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def dump_iter_parallel(
+    iterable: t.Iterable[t.Any],
+    path: Writable,
+    workers: t.Optional[int] = None,
+    executor: Executor = "process",
+    batch_size: int = 10_000,
+    **kwargs: object,
+) -> None:
+    """
+    Like `dump_iter`, but encode batches of `batch_size` items in parallel,
+    on a pool of processes by default, and write them in order. Only a few
+    batches per worker are taken from `iterable` ahead of being written.
+
+    `workers` and `executor` are as for `missouri.json.iter_load_many`. The
+    encoder is copied to each worker, so `sidecar_threshold` isn't supported.
+    """
+    if kwargs.get("indent") is not None:
+        raise ValueError("JSON Lines records can't be indented")
+    if kwargs.get("sidecar_threshold") is not None:
+        raise ValueError("sidecar_threshold isn't supported when writing in parallel")
+    open_args = _open_args(kwargs)
+    name = path if isinstance(path, str) else "<stream>"
+    tasks = (
+        (name, (batch, _task_kwargs(kwargs, executor)))
+        for batch in _batches(iterable, batch_size)
+    )
+    with ensure_text_file_open(path, "w", **open_args) as f:
+        for _, data in imap(_dump_batch, tasks, executor, workers):
+            f.write(data)
@@ -0,0 +1,350 @@
+"""
+Decode the parts of a JSON document which are accessed, and nothing else.
+
+The document is read from a buffer, usually a memory-mapped file. Objects
+and arrays are returned as read-only proxies, which find the extent of each
+of their values the first time they are accessed, and decode a value, or
+wrap it in another proxy, only when it is looked up. Decoded values are
+cached.
+
+Finding the extent of a large value means scanning past it. Strings and
+shallow values are skipped by a regular expression, and long runs without
+strings, like arrays of numbers, by removing the pairs of brackets from
+each block of the run and looking at the rest.
+
+Objects which contain one of the decoder's marker keys, like `"__ndarray__"`,
+are decoded in full when they are accessed, so arrays are only decoded when
+they are needed.
+"""
+
+import collections.abc
+import re
+import typing as t
+from .openlib import Buffer
+
+Decode = t.Callable[[bytes], t.Any]
+Span = t.Tuple[int, int]
+
+_WHITESPACE = re.compile(rb"[ \t\n\r]*")
+_STRING = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+_STRING_TAIL = re.compile(_STRING[1:], re.DOTALL)
+_SCALAR_END = re.compile(rb"[ \t\n\r,\]}]")
+
+
+def _contents_pattern(depth: int) -> bytes:
+    """
+    Return a pattern which matches the contents of an object or array, up to
+    the first bracket of a value nested more than `depth` levels deeper.
+    """
+    other = rb'[^\[\]{}"]*'
+    alternatives = [_STRING]
+    if depth > 0:
+        alternatives.append(rb"[\[{]" + _contents_pattern(depth - 1) + rb"[\]}]")
+    # Each alternative starts with a different character, so the expression
+    # doesn't backtrack.
+    return other + rb"(?:(?:" + rb"|".join(alternatives) + rb")" + other + rb")*"
+
+
+# Values nested up to this deep are skipped by the regular expression engine,
+# and deeper ones by a loop over their brackets.
+SKIP_DEPTH = 4
+_CONTENTS = re.compile(_contents_pattern(SKIP_DEPTH), re.DOTALL)
+_QUOTE = re.compile(rb'"')
+_BRACKET = re.compile(rb"[\[\]{}]")
+# Keeps only the brackets, mapping braces to square brackets.
+_BRACKETS_TABLE = bytes.maketrans(b"{}", b"[]")
+_NOT_BRACKETS = bytes(set(range(256)) - set(b"[]{}"))
+# Runs without strings at least this long, like large arrays of numbers, are
+# skipped a block of this size at a time.
+SCAN_BLOCK_SIZE = 1 << 16
+
+
+def _unmatched_brackets(block: bytes) -> bytes:
+    """
+    Return the brackets in a block without strings which aren't matched
+    within it: some closing brackets followed by some opening brackets.
+    """
+    brackets = block.translate(_BRACKETS_TABLE, _NOT_BRACKETS)
+    while True:
+        unmatched = brackets.replace(b"[]", b"")
+        if len(unmatched) == len(brackets):
+            return unmatched
+        brackets = unmatched
+
+
+class Document:
+    """
+    The buffer holding a document, and how to decode the values in it.
+
+    `markers` are the keys which make an object be decoded in full by
+    `decode`, or None to decode every object in full.
+    """
+
+    def __init__(
+        self,
+        data: Buffer,
+        decode: Decode,
+        markers: t.Optional[t.Collection[str]] = (),
+    ):
+        self.data = data
+        self.decode = decode
+        self.markers = None if markers is None else frozenset(markers)
+
+    def error(self, message: str, position: int) -> ValueError:
+        return ValueError(f"{message} at offset {position}")
+
+    def skip_whitespace(self, position: int) -> int:
+        return _WHITESPACE.match(self.data, position).end()  # type: ignore[union-attr]
+
+    def skip_string(self, position: int) -> int:
+        """
+        Return the end of the string which starts at `position`.
+        """
+        match = _STRING_TAIL.match(self.data, position + 1)
+        if match is None:
+            raise self.error("Unterminated string", position)
+        return match.end()
+
+    def _skip_run(self, position: int, end: int, depth: int) -> t.Tuple[int, int]:
+        """
+        Skip from `position` to `end`, a run without strings, at `depth`.
+        Return where the container being skipped ends and a depth of 0, if it
+        ends in the run, or otherwise `end` and the depth there.
+        """
+        for block_start in range(position, end, SCAN_BLOCK_SIZE):
+            block = bytes(
+                self.data[block_start : min(block_start + SCAN_BLOCK_SIZE, end)]
+            )
+            unmatched = _unmatched_brackets(block)
+            closing = len(unmatched) - len(unmatched.lstrip(b"]"))
+            if closing < depth:
+                # The container doesn't end in this block.
+                depth += len(unmatched) - 2 * closing
+                continue
+            for match in _BRACKET.finditer(block):
+                depth += 1 if match.group() in b"[{" else -1
+                if depth == 0:
+                    return block_start + match.end(), 0
+        return end, depth
+
+    def skip_container(self, position: int) -> int:
+        """
+        Return the end of the object or array which starts at `position`.
+        """
+        data = self.data
+        start = position
+        depth = 1
+        position += 1
+        while True:
+            quote = _QUOTE.search(data, position)
+            run_end = len(data) if quote is None else quote.start()
+            if run_end - position >= SCAN_BLOCK_SIZE:
+                position, depth = self._skip_run(position, run_end, depth)
+                if depth == 0:
+                    return position
+            # Limit the match, so it doesn't go on to scan a long run which
+            # `_skip_run` skips faster.
+            position = _CONTENTS.match(  # type: ignore[union-attr]
+                data, position, position + SCAN_BLOCK_SIZE
+            ).end()
+            char = data[position : position + 1]
+            if char in (b"[", b"{"):
+                depth += 1
+                position += 1
+            elif char in (b"]", b"}"):
+                depth -= 1
+                position += 1
+                if depth == 0:
+                    return position
+            elif char == b'"':
+                position = self.skip_string(position)
+            elif not char:
+                raise self.error("Unterminated array or object", start)
+            # Otherwise the match stopped at its limit.
+
+    def skip_value(self, position: int) -> int:
+        """
+        Return the end of the value which starts at `position`.
+        """
+        char = self.data[position : position + 1]
+        if char == b'"':
+            return self.skip_string(position)
+        elif char in (b"[", b"{"):
+            return self.skip_container(position)
+        match = _SCALAR_END.search(self.data, position)
+        end = len(self.data) if match is None else match.start()
+        if end == position:
+            raise self.error("Expecting value", position)
+        return end
+
+    def _items(self, start: int, end: int, closing: bytes) -> t.Iterator[Span]:
+        """
+        Yield the extent of each item of the object or array from `start` to
+        `end`, and for objects, of each key before it.
+        """
+        data = self.data
+        position = self.skip_whitespace(start + 1)
+        if data[position : position + 1] != closing:
+            while True:
+                if closing == b"}":
+                    if data[position : position + 1] != b'"':
+                        raise self.error(
+                            "Expecting property name enclosed in double quotes",
+                            position,
+                        )
+                    key_end = self.skip_string(position)
+                    yield position, key_end
+                    position = self.skip_whitespace(key_end)
+                    if data[position : position + 1] != b":":
+                        raise self.error("Expecting ':' delimiter", position)
+                    position = self.skip_whitespace(position + 1)
+                value_end = self.skip_value(position)
+                yield position, value_end
+                position = self.skip_whitespace(value_end)
+                char = data[position : position + 1]
+                if char == closing:
+                    break
+                elif char != b",":
+                    raise self.error(
+                        f"Expecting ',' or {closing.decode()!r} delimiter", position
+                    )
+                position = self.skip_whitespace(position + 1)
+        if position + 1 != end:
+            # Only the end of the root is found without scanning it.
+            raise self.error("Extra data", self.skip_whitespace(position + 1))
+
+    def object_items(self, start: int, end: int) -> t.Iterator[t.Tuple[str, Span]]:
+        """
+        Yield each key of the object from `start` to `end`, with the extent of
+        its value.
+        """
+        items = self._items(start, end, b"}")
+        for key_start, key_end in items:
+            key = bytes(self.data[key_start + 1 : key_end - 1])
+            if b"\\" in key:
+                yield self.decode(b'"' + key + b'"'), next(items)
+            else:
+                yield key.decode("utf-8"), next(items)
+
+    def array_items(self, start: int, end: int) -> t.List[Span]:
+        """
+        Return the extent of each element of the array from `start` to `end`.
+        """
+        return list(self._items(start, end, b"]"))
+
+    def value(self, start: int, end: int) -> t.Any:
+        """
+        Return the value from `start` to `end`: a proxy for objects and
+        arrays, unless they are decoded in full, and otherwise the decoded
+        value.
+        """
+        char = self.data[start : start + 1]
+        if char == b"{" and self.markers is not None:
+            index = {}
+            for key, span in self.object_items(start, end):
+                if key in self.markers:
+                    break
+                index[key] = span
+            else:
+                return LazyObject(self, start, end, index)
+        elif char == b"[":
+            return LazyArray(self, start, end)
+        elif start == end:
+            raise self.error("Expecting value", start)
+        return self.decode(bytes(self.data[start:end]))
+
+    def root(self) -> t.Any:
+        start = self.skip_whitespace(0)
+        end = len(self.data)
+        while end > start and self.data[end - 1 : end] in (b" ", b"\t", b"\n", b"\r"):
+            end -= 1
+        return self.value(start, end)
+
+
+class LazyObject(collections.abc.Mapping):
+    """
+    A read-only proxy for an object in a document, which decodes its values
+    when they are looked up. `decode()` decodes the whole object.
+    """
+
+    def __init__(
+        self, document: Document, start: int, end: int, index: t.Dict[str, Span]
+    ):
+        self._document = document
+        self._start = start
+        self._end = end
+        self._index = index
+        self._values: t.Dict[str, t.Any] = {}
+
+    def __getitem__(self, key: str) -> t.Any:
+        try:
+            return self._values[key]
+        except KeyError:
+            pass
+        value = self._values[key] = self._document.value(*self._index[key])
+        return value
+
+    def __iter__(self) -> t.Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __repr__(self) -> str:
+        return f"<LazyObject with {len(self)} keys>"
+
+    def decode(self) -> t.Any:
+        return self._document.decode(
+            bytes(self._document.data[self._start : self._end])
+        )
+
+
+class LazyArray(collections.abc.Sequence):
+    """
+    A read-only proxy for an array in a document, which decodes its elements
+    when they are looked up. `decode()` decodes the whole array.
+    """
+
+    def __init__(self, document: Document, start: int, end: int):
+        self._document = document
+        self._start = start
+        self._end = end
+        self._index: t.Optional[t.List[Span]] = None
+        self._values: t.Dict[int, t.Any] = {}
+
+    @property
+    def _spans(self) -> t.List[Span]:
+        if self._index is None:
+            self._index = self._document.array_items(self._start, self._end)
+        return self._index
+
+    def __getitem__(self, index: t.Union[int, slice]) -> t.Any:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        span = self._spans[index]
+        try:
+            return self._values[span[0]]
+        except KeyError:
+            pass
+        value = self._values[span[0]] = self._document.value(*span)
+        return value
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, collections.abc.Sequence) or isinstance(
+            other, (str, bytes)
+        ):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"<LazyArray with {len(self)} items>"
+
+    def decode(self) -> t.Any:
+        return self._document.decode(
+            bytes(self._document.data[self._start : self._end])
+        )
@@ -1,6 +1,13 @@
+import re
+import sys
 import typing as t
+import weakref
 
 if t.TYPE_CHECKING:  # pragma: no cover
+    import types
+    from .roundlib import Rounding
+    from .sidecarlib import SidecarWriter
+
     try:
         import numpy as np
     except ImportError:
@@ -8,68 +15,173 @@ if t.TYPE_CHECKING:  # pragma: no cover
         pass
 
 
-def encode_numpy(obj: t.Any, as_primitives: bool) -> t.Any:
-    try:
-        import numpy as np
-    except ImportError:
-        # Clearly there won't be any numpy arrays to encode...
+NdarrayEncoding = t.Literal["list", "base64"]
+
+
+def _encode_ndarray_base64(obj: "np.ndarray") -> t.Dict[str, t.Any]:
+    import base64
+
+    # Write the raw buffer in an explicit (little-endian) byte order so the
+    # output does not depend on the architecture which produced it.
+    little_endian = obj.astype(obj.dtype.newbyteorder("<"), order="C", copy=False)
+    return {
+        "__ndarray__": base64.b64encode(little_endian.data).decode("ascii"),
+        "dtype": little_endian.dtype.str,
+        "shape": obj.shape,
+        "encoding": "base64",
+    }
+
+
+def _encode_ndarray(
+    obj: "np.ndarray",
+    as_primitives: bool,
+    ndarray_encoding: NdarrayEncoding,
+    sidecar: t.Optional["SidecarWriter"],
+    rounding: t.Optional["Rounding"],
+) -> t.Any:
+    # Round in float64, so the rounded values of smaller float dtypes are
+    # written as short decimals. Arrays which are written in binary are cast
+    # back.
+    rounded = (
+        rounding.round_array(obj)
+        if rounding is not None and obj.dtype.kind == "f"
+        else obj
+    )
+    if as_primitives:
+        return rounded.tolist()
+    if rounded is not obj and (sidecar is not None or ndarray_encoding == "base64"):
+        obj = rounded.astype(obj.dtype)
+    ref = None if sidecar is None else sidecar.encode(obj)
+    if ref is not None:
+        return ref
+    elif ndarray_encoding == "base64" and not obj.dtype.hasobject:
+        return _encode_ndarray_base64(obj)
+    else:
+        return {
+            "__ndarray__": rounded.tolist(),
+            "dtype": obj.dtype.name,
+            "shape": obj.shape,
+        }
+
+
+def _type_encoder(np: "types.ModuleType", cls: type) -> t.Optional[t.Callable]:
+    """
+    Return `_encode_ndarray` for arrays, the function which converts
+    instances of the numpy scalar type `cls` to the equivalent Python type,
+    or None for other types.
+    """
+    if issubclass(cls, np.ndarray):
+        return _encode_ndarray
+    elif issubclass(cls, np.bool_):
+        return bool
+    elif issubclass(cls, np.integer):
+        return int
+    elif issubclass(cls, np.floating):
+        return float
+    elif issubclass(cls, np.generic):
+        return np.generic.item
+    else:
         return None
 
-    if isinstance(obj, np.ndarray):
-        if as_primitives:
-            return obj.tolist()
-        else:
-            return {
-                "__ndarray__": obj.tolist(),
-                "dtype": obj.dtype.name,
-                "shape": obj.shape,
-            }
-    elif isinstance(obj, np.bool_) or (
-        hasattr(np, "bool8") and isinstance(obj, getattr(np, "bool8"))
-    ):
-        return bool(obj)
-    elif isinstance(
-        obj,
-        (
-            np.half,
-            np.single,
-            np.double,
-            np.float_,
-            np.longfloat,
-            np.float16,
-            np.float32,
-            np.float64,
-        ),
-    ) or (hasattr(np, "float128") and isinstance(obj, np.float128)):
-        return float(obj)
-    elif isinstance(
-        obj,
-        (
-            np.byte,
-            np.short,
-            np.intc,
-            np.int_,
-            np.longlong,
-            np.intp,
-            np.int8,
-            np.int16,
-            np.int32,
-            np.int64,
-            np.ubyte,
-            np.ushort,
-            np.uintc,
-            np.uint,
-            np.ulonglong,
-            np.uintp,
-            np.uint8,
-            np.uint16,
-            np.uint32,
-            np.uint64,
-        ),
-    ):
-        return int(obj)
+
+# The encoder of each type `encode_numpy` has been given, so that the many
+# objects which aren't numpy's cost a single lookup, like the scalars. Only
+# numpy's types and the builtins are kept for good; other classes may be
+# created on the fly, so they're only weakly referenced.
+_type_encoders: t.Dict[type, t.Optional[t.Callable]] = {}
+_other_type_encoders: "weakref.WeakKeyDictionary[type, t.Optional[t.Callable]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _lookup_type_encoder(cls: type) -> t.Optional[t.Callable]:
+    try:
+        return _other_type_encoders[cls]
+    except KeyError:
+        pass
+    # Look numpy up rather than importing it: when it hasn't been imported,
+    # clearly this isn't one of its types...
+    np = sys.modules.get("numpy")
+    type_encoder = None if np is None else _type_encoder(np, cls)
+    module = getattr(cls, "__module__", None) or ""
+    if module == "builtins" or module.partition(".")[0] == "numpy":
+        _type_encoders[cls] = type_encoder
     else:
+        _other_type_encoders[cls] = type_encoder
+    return type_encoder
+
+
+def encode_numpy(
+    obj: t.Any,
+    as_primitives: bool,
+    ndarray_encoding: NdarrayEncoding = "list",
+    sidecar: t.Optional["SidecarWriter"] = None,
+    rounding: t.Optional["Rounding"] = None,
+) -> t.Any:
+    try:
+        type_encoder = _type_encoders[type(obj)]
+    except KeyError:
+        type_encoder = _lookup_type_encoder(type(obj))
+
+    if type_encoder is None:
         return None
+    elif type_encoder is _encode_ndarray:
+        return _encode_ndarray(obj, as_primitives, ndarray_encoding, sidecar, rounding)
+    result = type_encoder(obj)
+    if rounding is not None and type(result) is float:
+        return rounding.round_float(result)
+    return result
+
+
+def _flatten(data: t.Any, shape: t.Tuple[int, ...]) -> t.Iterator[t.Any]:
+    """
+    Iterate over the elements of a nested list of the given shape, in C
+    order, checking the length of each list along the way.
+    """
+    import itertools
+
+    if not isinstance(data, list) or len(data) != shape[0]:
+        raise ValueError
+    rows: t.Iterable[t.Any] = data
+    for index, length in enumerate(shape[1:]):
+        # Materialize every level but the last, so its lengths can be checked.
+        if index:
+            rows = list(rows)
+        if set(map(type, rows)) - {list} or set(map(len, rows)) - {length}:
+            raise ValueError
+        rows = itertools.chain.from_iterable(rows)
+    return iter(rows)
+
+
+def _decode_ndarray_list(
+    data: t.Any, dtype: "np.dtype", shape: t.Tuple[int, ...]
+) -> "np.ndarray":
+    """
+    Decode an array from a nested list, using its recorded shape: numeric
+    arrays are allocated up front and filled from a flat iterator over the
+    list, which is much faster than having `np.array` work out the shape.
+    Raises `ValueError` when the list doesn't have the recorded shape.
+    """
+    import math
+    import numpy as np
+
+    error = ValueError(f"Array data doesn't match its shape {list(shape)}")
+    if not shape or dtype.kind not in "biuf":
+        # 0-d arrays, and other dtypes, which np.fromiter can't fill.
+        try:
+            result = np.array(data, dtype=dtype)
+        except ValueError:
+            raise error
+        if result.shape != shape:
+            raise error
+        return result
+
+    try:
+        flat = np.fromiter(_flatten(data, shape), dtype=dtype, count=math.prod(shape))
+    except (TypeError, ValueError):
+        # Lists too short, ragged or nested too deeply.
+        raise error
+    return flat.reshape(shape)
 
 
 def decode_numpy(dct: t.Dict) -> t.Optional["np.ndarray"]:
@@ -81,9 +193,174 @@ def decode_numpy(dct: t.Dict) -> t.Optional["np.ndarray"]:
                 "JSON file contains numpy arrays; install numpy to load it"
             )
 
-        return np.array(
-            dct["__ndarray__"],
-            dtype=np.dtype(dct["dtype"]) if "dtype" in dct else np.float64,
-        )
+        if dct.get("encoding") == "base64":
+            import base64
+
+            # Copy into a bytearray so the result is writable, like the arrays
+            # decoded from lists.
+            buffer = bytearray(base64.b64decode(dct["__ndarray__"]))
+            return np.frombuffer(buffer, dtype=np.dtype(dct["dtype"])).reshape(
+                dct["shape"]
+            )
+
+        dtype = np.dtype(dct["dtype"]) if "dtype" in dct else np.dtype(np.float64)
+        if "shape" not in dct:
+            return np.array(dct["__ndarray__"], dtype=dtype)
+        return _decode_ndarray_list(dct["__ndarray__"], dtype, tuple(dct["shape"]))
     else:
         return None
+
+
+# An array encoded as a nested list, as written by `encode_numpy`: the payload
+# starts after the marker, and the dtype and shape follow it.
+_NDARRAY_LIST_START = re.compile(r'"__ndarray__"\s*:\s*\[')
+_NDARRAY_LIST_END = re.compile(
+    r'\s*,\s*"dtype"\s*:\s*"(\w+)"\s*,\s*"shape"\s*:\s*\[([\d\s,]*)\]\s*\}'
+)
+# Deleting these from a nested list of numbers leaves its brackets and commas.
+_NUMBER_CHARACTERS = str.maketrans("", "", "0123456789+-.eE \t\n\r")
+# Numbers which np.fromstring accepts but JSON doesn't, like `+1`, `01`, `.5`
+# and `5.`, and missing elements, which it parses as -1.
+_INVALID_NUMBERS = re.compile(r"[\[,]\s*[,\]]|[\s\[,](?:\+|-?\.|-?0[0-9])|\.(?![0-9])")
+# Runs of digits as long as the largest 64-bit integers, which np.fromstring
+# clamps when they are out of range.
+_LONG_INTEGERS = {"i": re.compile(r"[0-9]{19}"), "u": re.compile(r"[0-9]{20}")}
+# Parse the payload of an array this many characters at a time, to bound the
+# memory used by intermediate strings.
+DIRECT_PARSE_CHUNK_SIZE = 1 << 22
+
+
+def _structure(shape: t.Tuple[int, ...]) -> str:
+    """
+    Return the brackets and commas of a nested list of the given shape.
+    """
+    structure = ""
+    for length in reversed(shape):
+        structure = "[" + ((structure + ",") * length)[:-1] + "]"
+    return structure
+
+
+def _chunks(text: str, start: int, end: int) -> t.Iterator[str]:
+    """
+    Split `text[start:end]` after commas into chunks of at most
+    `DIRECT_PARSE_CHUNK_SIZE` characters, so no number is cut in two.
+    """
+    while end - start > DIRECT_PARSE_CHUNK_SIZE:
+        stop = text.rfind(",", start, start + DIRECT_PARSE_CHUNK_SIZE) + 1
+        if stop <= start:
+            break
+        yield text[start:stop]
+        start = stop
+    yield text[start:end]
+
+
+def _parse_ndarray_list(
+    text: str, start: int, end: int, dtype: "np.dtype", shape: t.Tuple[int, ...]
+) -> t.Optional["np.ndarray"]:
+    """
+    Parse the nested list of numbers in `text[start:end]` straight into an
+    array. Return None unless it is a list of JSON numbers of the given shape.
+    """
+    import math
+    import warnings
+    import numpy as np
+
+    structure = "".join(
+        chunk.translate(_NUMBER_CHARACTERS) for chunk in _chunks(text, start, end)
+    )
+    if structure != _structure(shape):
+        return None
+
+    result = np.empty(math.prod(shape), dtype=dtype)
+    if len(result) and _INVALID_NUMBERS.search(text, start, end):
+        return None
+    parse_dtype = dtype
+    if dtype.kind in "iu":
+        # np.fromstring wraps integers which are out of range for narrower
+        # types, so parse into 64 bits and check the range, and leave those
+        # which may not fit in 64 bits to the decoder.
+        parse_dtype = np.dtype(np.uint64 if dtype.kind == "u" else np.int64)
+        info = np.iinfo(dtype)
+        if _LONG_INTEGERS[dtype.kind].search(text, start, end):
+            return None
+    parsed = 0
+    for chunk in _chunks(text, start, end):
+        numbers = chunk.replace("[", " ").replace("]", " ").strip(" \t\n\r,")
+        if not numbers:
+            continue
+        with warnings.catch_warnings():
+            # np.fromstring warns when it can't parse the whole string.
+            warnings.simplefilter("error", DeprecationWarning)
+            try:
+                values = np.fromstring(numbers, dtype=parse_dtype, sep=",")
+            except DeprecationWarning:
+                return None
+        if parse_dtype is not dtype and (
+            values.min() < info.min or values.max() > info.max
+        ):
+            return None
+        if parsed + len(values) > len(result):
+            return None
+        result[parsed : parsed + len(values)] = values
+        parsed += len(values)
+    # The structure has a comma between every two elements, and
+    # _INVALID_NUMBERS rejects empty ones, so each element yields a value.
+    assert parsed == len(result)
+    return result.reshape(shape)
+
+
+def extract_ndarray_lists(text: str) -> t.Tuple[str, t.List["np.ndarray"]]:
+    """
+    Parse the numeric arrays encoded as nested lists in a JSON document
+    straight into arrays, without creating a Python object for each number.
+    Return the arrays, and the document with each of them replaced by
+    `{"__ndarray_parsed__": index}`.
+
+    Arrays which hold anything but plain numbers, such as `NaN` or `null`, or
+    which don't match their shape, are left in place for the decoder. So are
+    all the arrays of a document which already contains the placeholder key.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("Install numpy to parse arrays directly")
+
+    if '"__ndarray_parsed__"' in text:
+        return text, []
+
+    pieces = []
+    arrays: t.List["np.ndarray"] = []
+    position = 0
+    for match in _NDARRAY_LIST_START.finditer(text):
+        # The marker must be the first key of its object.
+        object_start = match.start() - 1
+        while object_start >= position and text[object_start] in " \t\n\r":
+            object_start -= 1
+        if object_start < position or text[object_start] != "{":
+            continue
+        # Numbers contain no quotes, so the payload ends at the last bracket
+        # before the next key.
+        quote = text.find('"', match.end())
+        if quote == -1:
+            continue
+        payload_end = text.rfind("]", match.end(), quote) + 1
+        end = _NDARRAY_LIST_END.match(text, payload_end) if payload_end else None
+        if end is None:
+            continue
+        dtype = np.dtype(end.group(1))
+        if dtype.kind not in "iuf":
+            continue
+        shape = tuple(
+            int(length) for length in end.group(2).split(",") if length.strip()
+        )
+        array = _parse_ndarray_list(text, match.end() - 1, payload_end, dtype, shape)
+        if array is None:
+            continue
+        pieces.append(text[position:object_start])
+        pieces.append(f'{{"__ndarray_parsed__": {len(arrays)}}}')
+        arrays.append(array)
+        position = end.end()
+    if not arrays:
+        return text, arrays
+    pieces.append(text[position:])
+    return "".join(pieces), arrays
@@ -1,3 +1,5 @@
+import mmap
+import os
 import typing as t
 from contextlib import contextmanager
 
@@ -8,21 +10,419 @@ if t.TYPE_CHECKING:  # pragma: no cover
 Readable = t.Union["FileDescriptorOrPath", "SupportsRead[str]"]
 Writable = t.Union["FileDescriptorOrPath", "SupportsWrite[str]"]
 
+# An encoded document in memory.
+Buffer = t.Union[bytes, bytearray, memoryview, mmap.mmap]
+BinaryReadable = t.Union["FileDescriptorOrPath", "SupportsRead[bytes]", Buffer]
+BinaryWritable = t.Union["FileDescriptorOrPath", "SupportsWrite[bytes]"]
+
+Compression = t.Literal["gzip", "bz2", "xz", "zstd", "lz4"]
+
+_EXTENSIONS: t.Dict[str, Compression] = {
+    ".gz": "gzip",
+    ".bz2": "bz2",
+    ".xz": "xz",
+    ".zst": "zstd",
+    ".lz4": "lz4",
+}
+_MAGIC: t.Dict[bytes, Compression] = {
+    b"\x1f\x8b": "gzip",
+    b"BZh": "bz2",
+    b"\xfd7zXZ\x00": "xz",
+    b"\x28\xb5\x2f\xfd": "zstd",
+    b"\x04\x22\x4d\x18": "lz4",
+}
+# Stream compressed files through large buffers, so the codec is called
+# less often.
+COMPRESSED_BUFFER_SIZE = 1 << 20
+
+
+def _extension_compression(path: str) -> t.Optional[Compression]:
+    return _EXTENSIONS.get(os.path.splitext(path)[1].lower())
+
+
+def _signature_compression(head: bytes) -> t.Optional[Compression]:
+    return next(
+        (value for magic, value in _MAGIC.items() if head.startswith(magic)), None
+    )
+
+
+def detect_compression(path: str, mode: str) -> t.Optional[Compression]:
+    """
+    Return the compression of the file at `path`, going by its extension or,
+    when reading, by its first bytes.
+
+    This opens the file to read them. The functions which open files look for
+    the signature on the file they open instead.
+    """
+    compression = _extension_compression(path)
+    if compression is not None or not mode.startswith("r"):
+        return compression
+    with open(path, "rb") as f:
+        return _signature_compression(f.read(6))
+
+
+# The module which implements each format, and its compression level argument.
+_CODECS: t.Dict[Compression, t.Tuple[str, str]] = {
+    "gzip": ("gzip", "compresslevel"),
+    "bz2": ("bz2", "compresslevel"),
+    "xz": ("lzma", "preset"),
+    "zstd": ("zstandard", "cctx"),
+    "lz4": ("lz4.frame", "compression_level"),
+}
+
+
+def open_compressed(
+    path: t.Union[str, t.BinaryIO],
+    mode: t.Literal["rb", "wb"],
+    compression: Compression,
+    compresslevel: t.Optional[int] = None,
+) -> t.BinaryIO:
+    """
+    Open a compressed file, at a path or already open in binary mode, in
+    binary mode. `compresslevel` defaults to each library's own default.
+    """
+    import importlib
+
+    try:
+        module_name, level_arg = _CODECS[compression]
+    except KeyError:
+        raise ValueError(
+            f"Unknown compression {compression!r}; expected one of {', '.join(_CODECS)}"
+        )
+    try:
+        module = importlib.import_module(module_name)
+    except ImportError:
+        raise ImportError(
+            f"Install {module_name.split('.')[0]} to read and write {compression} files"
+        )
+    kwargs: t.Dict[str, t.Any] = {}
+    if compresslevel is not None and mode == "wb":
+        kwargs[level_arg] = (
+            module.ZstdCompressor(level=compresslevel)
+            if compression == "zstd"
+            else compresslevel
+        )
+    return t.cast(t.BinaryIO, module.open(path, mode, **kwargs))
+
+
+def _fsync(path: str) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_path(path: str, fsync: bool = False) -> t.Generator[str, None, None]:
+    """
+    Yield a temporary path in the same directory as `path`, and once the
+    block succeeds, move it over `path`, so readers see either the old file or
+    the complete new one. The new file keeps the permissions of the file it
+    replaces. On failure, the temporary file is removed and `path` is left
+    untouched. With `fsync`, the file and the rename are flushed to disk.
+    """
+    import shutil
+    import uuid
+
+    temp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        yield temp_path
+        if fsync:
+            _fsync(temp_path)
+        if os.path.exists(path):
+            shutil.copymode(path, temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    if fsync:
+        try:
+            _fsync(os.path.dirname(os.path.abspath(path)))
+        except OSError:  # pragma: no cover
+            # Directories can't be opened on Windows.
+            pass
+
+
+@contextmanager
+def _writing_to(path: str, atomic: bool, fsync: bool) -> t.Generator[str, None, None]:
+    if atomic:
+        with atomic_path(path, fsync) as temp_path:
+            yield temp_path
+    else:
+        yield path
+        if fsync:
+            _fsync(path)
+
+
+@contextmanager
+def _open_path(
+    path: str,
+    mode: t.Literal["r", "w", "rb", "wb"],
+    compression: t.Optional[Compression],
+    compresslevel: t.Optional[int],
+    atomic: bool,
+    buffer_size: t.Optional[int],
+    fsync: bool,
+) -> t.Generator[t.IO, None, None]:
+    import contextlib
+    import io
+
+    if mode.startswith("r"):
+        if atomic or fsync:
+            raise ValueError("atomic and fsync only apply when writing")
+        opening: t.ContextManager[str] = contextlib.nullcontext(path)
+    else:
+        opening = _writing_to(path, atomic, fsync)
+
+    if compression is None:
+        compression = _extension_compression(path)
+    buffering = -1 if buffer_size is None else buffer_size
+    with opening as open_path:
+        if compression is not None:
+            with _open_compressed_file(
+                open_path, mode, compression, compresslevel, buffer_size
+            ) as f:
+                yield f
+        elif not mode.startswith("r"):
+            with open(open_path, mode, buffering) as f:
+                yield f
+        else:
+            # Look for the signature of a compressed format on the file which
+            # is read anyway, rather than opening it twice. A buffer size of 1
+            # asks text files for line buffering, which only affects writing.
+            if buffering == 1 and mode == "r":
+                buffering = -1
+            with open(open_path, "rb", buffering) as raw_file:
+                compression = _signature_compression(raw_file.read(6))
+                raw_file.seek(0)
+                if compression is not None:
+                    with _open_compressed_file(
+                        raw_file, mode, compression, compresslevel, buffer_size
+                    ) as f:
+                        yield f
+                elif mode == "rb":
+                    yield raw_file
+                else:
+                    with io.TextIOWrapper(raw_file) as f:  # type: ignore[arg-type]
+                        yield f
+
+
+@contextmanager
+def _open_compressed_file(
+    path: t.Union[str, t.BinaryIO],
+    mode: t.Literal["r", "w", "rb", "wb"],
+    compression: Compression,
+    compresslevel: t.Optional[int],
+    buffer_size: t.Optional[int],
+) -> t.Generator[t.IO, None, None]:
+    import io
+
+    binary_mode: t.Literal["rb", "wb"] = "rb" if mode.startswith("r") else "wb"
+    if buffer_size is None:
+        buffer_size = COMPRESSED_BUFFER_SIZE
+    with open_compressed(path, binary_mode, compression, compresslevel) as raw:
+        buffered: t.Union[io.BufferedReader, io.BufferedWriter]
+        if binary_mode == "rb":
+            buffered = io.BufferedReader(raw, buffer_size)  # type: ignore[arg-type]
+        else:
+            buffered = io.BufferedWriter(raw, buffer_size)  # type: ignore[arg-type]
+        # Closing the wrappers flushes them and closes the compressed file.
+        wrapped = buffered if "b" in mode else io.TextIOWrapper(buffered)
+        with wrapped:
+            yield wrapped
+
+
+def _check_path_args(**options: t.Any) -> None:
+    for name, value in options.items():
+        if value:
+            raise ValueError(f"{name} is only supported when reading or writing a path")
+
 
 @contextmanager
 def ensure_text_file_open(
-    path_or_fp: t.Union[Readable, Writable], mode: t.Literal["r", "w"]
+    path_or_fp: t.Union[Readable, Writable],
+    mode: t.Literal["r", "w"],
+    compression: t.Optional[Compression] = None,
+    compresslevel: t.Optional[int] = None,
+    atomic: bool = False,
+    buffer_size: t.Optional[int] = None,
+    fsync: bool = False,
 ) -> t.Generator[t.IO[str], None, None]:
+    """
+    Open a path, or pass a file object through.
+
+    Paths ending in `.gz`, `.bz2`, `.xz`, `.zst` or `.lz4`, or which are read
+    and start with the signature of one of those formats, are decompressed or
+    compressed on the fly, unless `compression` is given explicitly. The last
+    two require the `zstandard` and `lz4` packages.
+
+    When writing, `atomic` writes to a temporary file which replaces the path
+    once writing succeeds (see `atomic_path`), and `fsync` flushes the file to
+    disk before returning. `buffer_size` sets the size of the file's buffer,
+    which defaults to 1 MB for compressed files and the system default for the
+    others.
+    """
     import io
 
     if isinstance(path_or_fp, str):
-        with open(path_or_fp, mode) as f:
+        with _open_path(
+            path_or_fp,
+            mode,
+            compression,
+            compresslevel,
+            atomic,
+            buffer_size,
+            fsync,
+        ) as f:
             yield f
     elif isinstance(path_or_fp, io.IOBase) or (
         hasattr(path_or_fp, "read") and hasattr(path_or_fp, "seek")
     ):
+        _check_path_args(
+            compression=compression,
+            compresslevel=compresslevel,
+            atomic=atomic,
+            buffer_size=buffer_size,
+            fsync=fsync,
+        )
         yield t.cast(t.TextIO, path_or_fp)
         if hasattr(path_or_fp, "flush"):
             path_or_fp.flush()
     else:
         raise ValueError("Object does not appear to be a path or a file-like object")
+
+
+@contextmanager
+def ensure_binary_file_open(
+    path_or_fp: t.Union[BinaryReadable, BinaryWritable],
+    mode: t.Literal["rb", "wb"],
+    compression: t.Optional[Compression] = None,
+    compresslevel: t.Optional[int] = None,
+    atomic: bool = False,
+    buffer_size: t.Optional[int] = None,
+    fsync: bool = False,
+) -> t.Generator[t.IO[bytes], None, None]:
+    """
+    Like `ensure_text_file_open`, in binary mode.
+    """
+    import io
+
+    if isinstance(path_or_fp, str):
+        with _open_path(
+            path_or_fp,
+            mode,
+            compression,
+            compresslevel,
+            atomic,
+            buffer_size,
+            fsync,
+        ) as f:
+            yield f
+    elif isinstance(path_or_fp, io.IOBase) or (
+        hasattr(path_or_fp, "read") and hasattr(path_or_fp, "seek")
+    ):
+        _check_path_args(
+            compression=compression,
+            compresslevel=compresslevel,
+            atomic=atomic,
+            buffer_size=buffer_size,
+            fsync=fsync,
+        )
+        yield t.cast(t.BinaryIO, path_or_fp)
+        if hasattr(path_or_fp, "flush"):
+            path_or_fp.flush()
+    else:
+        raise ValueError("Object does not appear to be a path or a file-like object")
+
+
+@contextmanager
+def ensure_buffer(
+    source: BinaryReadable,
+    compression: t.Optional[Compression] = None,
+    compresslevel: t.Optional[int] = None,
+    buffer_size: t.Optional[int] = None,
+) -> t.Generator[Buffer, None, None]:
+    """
+    Yield the contents of `source` as a buffer. Buffers are yielded as they
+    are, and uncompressed files at a path are memory-mapped, so their contents
+    are not copied onto the heap.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        _check_path_args(
+            compression=compression,
+            compresslevel=compresslevel,
+            buffer_size=buffer_size,
+        )
+        yield source
+    elif isinstance(source, str) and compression is None:
+        mapped = _map_uncompressed(source)
+        if isinstance(mapped, mmap.mmap):
+            with mapped:
+                yield mapped
+        elif mapped is None:
+            yield b""
+        else:
+            with ensure_binary_file_open(
+                source, "rb", mapped, compresslevel, buffer_size=buffer_size
+            ) as fp:
+                yield fp.read()
+    else:
+        with ensure_binary_file_open(
+            source, "rb", compression, compresslevel, buffer_size=buffer_size
+        ) as fp:
+            yield fp.read()
+
+
+def _map_uncompressed(path: str) -> t.Union[mmap.mmap, Compression, None]:
+    """
+    Memory-map the file at `path`, unless it's compressed, in which case
+    return its compression. Empty files, which can't be mapped, give None.
+    """
+    compression = _extension_compression(path)
+    if compression is not None:
+        return compression
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    compression = _signature_compression(mapped[:6])
+    if compression is None:
+        return mapped
+    mapped.close()
+    return compression
+
+
+def read_buffer(
+    source: BinaryReadable,
+    compression: t.Optional[Compression] = None,
+    compresslevel: t.Optional[int] = None,
+    buffer_size: t.Optional[int] = None,
+) -> Buffer:
+    """
+    Like `ensure_buffer`, but return the buffer, for a caller which reads it
+    for longer than a `with` block. Memory-mapped files stay mapped until the
+    buffer is closed or garbage-collected.
+    """
+    if isinstance(source, str) and compression is None:
+        mapped = _map_uncompressed(source)
+        if isinstance(mapped, mmap.mmap):
+            return mapped
+        elif mapped is None:
+            return b""
+        compression = mapped
+    with ensure_buffer(source, compression, compresslevel, buffer_size) as data:
+        return data
+
+
+def path_of(
+    path_or_fp: t.Union[Readable, Writable, BinaryReadable, BinaryWritable],
+) -> t.Optional[str]:
+    """
+    Return the path of the file, when it has one.
+    """
+    if isinstance(path_or_fp, str):
+        return path_or_fp
+    name = getattr(path_or_fp, "name", None)
+    return name if isinstance(name, str) else None
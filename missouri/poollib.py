@@ -0,0 +1,232 @@
+"""
+Read or write many files at once with a pool of threads or processes.
+
+Worker processes return large arrays through shared memory rather than
+pickling them, which copies them several times over.
+"""
+
+import os
+import sys
+import typing as t
+from collections import deque
+
+if t.TYPE_CHECKING:  # pragma: no cover
+    import concurrent.futures
+    import numpy as np
+
+# concurrent.futures is only imported to run tasks, as it takes a while.
+Executor = t.Union[t.Literal["thread", "process"], "concurrent.futures.Executor"]
+
+R = t.TypeVar("R")
+
+# Arrays of at least this many bytes are returned from worker processes through
+# shared memory instead of being pickled.
+SHARED_MEMORY_THRESHOLD = 1 << 16
+
+
+class FileError(Exception):
+    """
+    Raised when one of many files can't be read or written. `path` is the
+    offending file, and the original exception is the `__cause__`.
+    """
+
+    def __init__(self, path: str, error: BaseException):
+        super().__init__(f"{path}: {type(error).__name__}: {error}")
+        self.path = path
+
+
+def _make_executor(
+    executor: Executor, workers: t.Optional[int]
+) -> t.Tuple["concurrent.futures.Executor", bool]:
+    """
+    Return the executor, and whether the caller owns it and should shut it
+    down.
+    """
+    import concurrent.futures
+
+    if isinstance(executor, concurrent.futures.Executor):
+        return executor, False
+    elif executor == "thread":
+        return concurrent.futures.ThreadPoolExecutor(max_workers=workers), True
+    elif executor == "process":
+        return concurrent.futures.ProcessPoolExecutor(max_workers=workers), True
+    else:
+        raise ValueError(
+            f"Unknown executor {executor!r}; expected thread, process or a concurrent.futures.Executor"
+        )
+
+
+def is_process_executor(executor: Executor) -> bool:
+    if isinstance(executor, str):
+        return executor == "process"
+    import concurrent.futures
+
+    return isinstance(executor, concurrent.futures.ProcessPoolExecutor)
+
+
+def imap(
+    function: t.Callable[..., R],
+    tasks: t.Iterable[t.Tuple[str, t.Tuple[t.Any, ...]]],
+    executor: Executor,
+    workers: t.Optional[int],
+    ordered: bool = True,
+    discard: t.Optional[t.Callable[[R], None]] = None,
+) -> t.Iterator[t.Tuple[str, R]]:
+    """
+    Call `function(*args)` for each `(path, args)` task on the executor,
+    yielding `(path, result)` in the order of the tasks or, when `ordered` is
+    False, as they complete. Only a few tasks per worker are submitted ahead
+    of the results being consumed. The first task to fail raises a
+    `FileError`, and the remaining tasks are cancelled.
+
+    When the iterator is not exhausted, `discard` is called with the results
+    which were computed but never yielded.
+    """
+    import concurrent.futures
+
+    pool, owned = _make_executor(executor, workers)
+    window = 4 * (workers or os.cpu_count() or 1)
+    tasks = iter(tasks)
+    pending: t.Deque[t.Tuple[str, concurrent.futures.Future]] = deque()
+
+    def submit() -> None:
+        for path, args in tasks:
+            pending.append((path, pool.submit(function, *args)))
+            if len(pending) >= window:
+                return
+
+    def result(path: str, future: concurrent.futures.Future) -> t.Tuple[str, R]:
+        try:
+            return path, future.result()
+        except Exception as e:
+            raise FileError(path, e) from e
+
+    try:
+        submit()
+        while pending:
+            if ordered:
+                path, future = pending.popleft()
+            else:
+                concurrent.futures.wait(
+                    [future for _, future in pending],
+                    return_when=concurrent.futures.FIRST_COMPLETED,
+                )
+                path, future = next(item for item in pending if item[1].done())
+                pending.remove((path, future))
+            item = result(path, future)
+            submit()
+            yield item
+    finally:
+        for _, future in pending:
+            future.cancel()
+        if discard is not None:
+            concurrent.futures.wait([future for _, future in pending])
+            for _, future in pending:
+                if not future.cancelled() and future.exception() is None:
+                    discard(future.result())
+        if owned:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+class SharedArray(t.NamedTuple):
+    """
+    A placeholder for an array in a shared memory block.
+    """
+
+    name: str
+    dtype: "np.dtype"
+    shape: t.Tuple[int, ...]
+
+
+def _walk(value: t.Any, replace: t.Callable[[t.Any], t.Any]) -> t.Any:
+    """
+    Replace the items of the dicts and lists in `value`, in place.
+    """
+    if isinstance(value, dict):
+        for key, item in value.items():
+            value[key] = _walk(item, replace)
+        return value
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            value[index] = _walk(item, replace)
+        return value
+    return replace(value)
+
+
+def start_sharing_arrays() -> None:
+    """
+    Call in the parent process before starting the workers which call
+    `share_arrays`. This starts the process which tracks shared memory blocks,
+    so the workers inherit it instead of starting their own, which would
+    report the blocks released by the parent as leaked. It also releases any
+    blocks left behind if every process exits without releasing them.
+    """
+    from multiprocessing import resource_tracker
+
+    resource_tracker.ensure_running()
+
+
+def share_arrays(value: t.Any) -> t.Any:
+    """
+    In a worker process, move the large arrays in `value` into shared memory
+    blocks, replacing them with `SharedArray` placeholders. The blocks are
+    released by `unshare_arrays` or `discard_shared_arrays`.
+    """
+    np = sys.modules.get("numpy")
+    if np is None:
+        return value
+
+    def share(obj: t.Any) -> t.Any:
+        if (
+            not isinstance(obj, np.ndarray)
+            or obj.dtype.hasobject
+            or obj.nbytes < SHARED_MEMORY_THRESHOLD
+        ):
+            return obj
+        from multiprocessing.shared_memory import SharedMemory
+
+        shm = SharedMemory(create=True, size=obj.nbytes)
+        np.ndarray(obj.shape, obj.dtype, buffer=shm.buf)[...] = obj
+        shm.close()
+        return SharedArray(shm.name, obj.dtype, obj.shape)
+
+    return _walk(value, share)
+
+
+def unshare_arrays(value: t.Any) -> t.Any:
+    """
+    Replace the `SharedArray` placeholders in `value` with copies of the
+    arrays, and release the shared memory blocks.
+    """
+
+    def unshare(obj: t.Any) -> t.Any:
+        if not isinstance(obj, SharedArray):
+            return obj
+        import numpy as np
+        from multiprocessing.shared_memory import SharedMemory
+
+        shm = SharedMemory(obj.name)
+        try:
+            return np.ndarray(obj.shape, obj.dtype, buffer=shm.buf).copy()
+        finally:
+            shm.close()
+            shm.unlink()
+
+    return _walk(value, unshare)
+
+
+def discard_shared_arrays(value: t.Any) -> None:
+    """
+    Release the shared memory blocks in `value` without reading them.
+    """
+
+    def discard(obj: t.Any) -> t.Any:
+        if isinstance(obj, SharedArray):
+            from multiprocessing.shared_memory import SharedMemory
+
+            shm = SharedMemory(obj.name)
+            shm.close()
+            shm.unlink()
+        return obj
+
+    _walk(value, discard)
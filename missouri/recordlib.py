@@ -0,0 +1,216 @@
+"""
+Encode and decode dataclasses, attrs classes, named tuples and enums.
+
+The encoder writes a record as an object of its fields, and an enum member
+as its value. The fields of each class are looked up once, and read by a
+function generated for that class, like the ones dataclasses generates.
+
+To load the original types back, dump with `tagged=True`, which writes the
+type of each record and enum member next to its fields:
+
+.. code-block:: python
+
+    {"__record__": "shapes:Circle", "center": [0.0, 0.0], "radius": 1.0}
+    {"__enum__": "shapes:Color", "name": "RED"}
+
+`missouri.coding.JSONDecoder` decodes these to instances of the same class
+when created with `tagged=True`.
+Decoding never imports a module: the module must have been imported
+already, and the name must refer to a record or enum class.
+"""
+
+import dataclasses
+import enum
+import sys
+import typing as t
+
+Extract = t.Callable[[t.Any], t.Dict[str, t.Any]]
+Construct = t.Callable[[t.Dict[str, t.Any]], t.Any]
+
+# The types which are never records, checked first when tagging a document.
+_PRIMITIVES = frozenset([str, int, float, bool, type(None)])
+
+
+def _attrs_fields(cls: type) -> t.Optional[t.List[t.Any]]:
+    attr = sys.modules.get("attr")
+    if attr is None or not attr.has(cls):
+        return None
+    return list(attr.fields(cls))
+
+
+def _field_names(cls: type) -> t.Optional[t.List[str]]:
+    """
+    Return the names of the fields of a record class, or None for other
+    classes.
+    """
+    if dataclasses.is_dataclass(cls):
+        return [field.name for field in dataclasses.fields(cls)]
+    elif issubclass(cls, tuple) and hasattr(cls, "_fields"):
+        return list(getattr(cls, "_fields"))
+    attrs_fields = _attrs_fields(cls)
+    if attrs_fields is not None:
+        return [field.name for field in attrs_fields]
+    return None
+
+
+_record_encoders: t.Dict[type, t.Optional[Extract]] = {}
+_record_decoders: t.Dict[type, Construct] = {}
+
+
+def record_encoder(cls: type) -> t.Optional[Extract]:
+    """
+    Return a function which extracts the fields of instances of `cls` into a
+    dict, or None when it isn't a dataclass, attrs class or named tuple, or
+    it defines `for_json()`.
+    """
+    try:
+        return _record_encoders[cls]
+    except KeyError:
+        pass
+    names = None if callable(getattr(cls, "for_json", None)) else _field_names(cls)
+    extract = None
+    if names is not None:
+        # Attribute access works for classes with __slots__ too.
+        items = ", ".join(f"{name!r}: obj.{name}" for name in names)
+        namespace: t.Dict[str, t.Any] = {}
+        exec(f"def extract(obj):\n    return {{{items}}}", namespace)
+        extract = namespace["extract"]
+    _record_encoders[cls] = extract
+    return extract
+
+
+def encode_enum(obj: enum.Enum) -> t.Any:
+    return obj.value
+
+
+def type_name(cls: type) -> str:
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def resolve(name: str) -> type:
+    """
+    Look up a class written by `type_name`, in a module which has already
+    been imported.
+    """
+    module_name, _, qualname = name.partition(":")
+    obj: t.Any = sys.modules.get(module_name)
+    for attribute in qualname.split("."):
+        obj = getattr(obj, attribute, None)
+    if not isinstance(obj, type):
+        raise ValueError(
+            f"Can't find class {name}; import its module before loading the document"
+        )
+    return obj
+
+
+def tag(obj: t.Any) -> t.Any:
+    """
+    Return a copy of `obj` in which the records and enum members, in its
+    dicts, lists and tuples and in the fields of other records, are
+    replaced by dicts which name their type. Containers which hold none of
+    them are not copied, and a record which appears more than once is
+    replaced by the same dict each time.
+    """
+    tagged: t.Dict[int, t.Dict[str, t.Any]] = {}
+
+    def walk(obj: t.Any) -> t.Any:
+        cls = type(obj)
+        if cls in _PRIMITIVES:
+            return obj
+        elif cls is dict:
+            items = {name: walk(value) for name, value in obj.items()}
+            if any(items[name] is not value for name, value in obj.items()):
+                return items
+            return obj
+        elif cls is list or cls is tuple:
+            values = [walk(value) for value in obj]
+            if any(new is not old for new, old in zip(values, obj)):
+                return cls(values)
+            return obj
+        elif isinstance(obj, enum.Enum):
+            return {"__enum__": type_name(cls), "name": obj.name}
+
+        extract = record_encoder(cls)
+        if extract is None:
+            return obj
+        result = tagged.get(id(obj))
+        if result is None:
+            result = tagged[id(obj)] = {"__record__": type_name(cls)}
+            result.update((name, walk(value)) for name, value in extract(obj).items())
+        return result
+
+    return walk(obj)
+
+
+def record_decoder(cls: type) -> Construct:
+    """
+    Return a function which constructs an instance of the record class `cls`
+    from a dict of its fields.
+    """
+    construct = _record_decoders.get(cls)
+    if construct is None:
+        construct = _record_decoders[cls] = _record_decoder(cls)
+    return construct
+
+
+def _record_decoder(cls: type) -> Construct:
+    if dataclasses.is_dataclass(cls):
+        # Fields which aren't arguments of __init__ are set after it, which
+        # works for frozen dataclasses too.
+        others = [field.name for field in dataclasses.fields(cls) if not field.init]
+
+        def construct_dataclass(fields: t.Dict[str, t.Any]) -> t.Any:
+            values = {name: fields.pop(name) for name in others if name in fields}
+            obj = cls(**fields)
+            for name, value in values.items():
+                object.__setattr__(obj, name, value)
+            return obj
+
+        return construct_dataclass
+
+    attrs_fields = _attrs_fields(cls)
+    if attrs_fields is not None:
+        # attrs strips the leading underscores of private attributes from the
+        # names of the arguments of __init__.
+        arguments = {field.name: field.name.lstrip("_") for field in attrs_fields}
+        return lambda fields: cls(
+            **{arguments.get(name, name): value for name, value in fields.items()}
+        )
+    elif issubclass(cls, tuple) and hasattr(cls, "_fields"):
+        return lambda fields: cls(**fields)
+    raise ValueError(f"{type_name(cls)} is not a dataclass, attrs class or named tuple")
+
+
+def decode_record(obj: t.Dict[str, t.Any]) -> t.Any:
+    """
+    Decode a dict written by `tag` for a record.
+    """
+    fields = dict(obj)
+    name = fields.pop("__record__")
+    if type(name) is not str:
+        raise ValueError(
+            'Records must be written as {"__record__": "module:Class", ...}'
+        )
+    cls = resolve(name)
+    try:
+        return record_decoder(cls)(fields)
+    except TypeError as e:
+        raise ValueError(f"Can't decode {name} from its fields: {e}") from None
+
+
+def decode_enum(obj: t.Dict[str, t.Any]) -> t.Any:
+    """
+    Decode a dict written by `tag` for an enum member.
+    """
+    name = obj["__enum__"]
+    if len(obj) != 2 or type(name) is not str or type(obj.get("name")) is not str:
+        raise ValueError(
+            'Enum members must be written as {"__enum__": "module:Class", "name": name}'
+        )
+    cls = resolve(name)
+    if not issubclass(cls, enum.Enum):
+        raise ValueError(f"{type_name(cls)} is not an enum")
+    try:
+        return cls[obj["name"]]
+    except KeyError:
+        raise ValueError(f"{name} has no member {obj['name']}") from None
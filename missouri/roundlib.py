@@ -0,0 +1,115 @@
+"""
+Round the floats in a document before it is encoded, which makes the file
+smaller and faster to write.
+
+Values are rounded to the nearest decimal with the requested number of
+decimal places or significant digits, and written as the shortest string
+which reads back as that value, so `0.1234567` rounded to 3 places is written
+as `0.123`.
+
+Arrays are rounded with numpy, which scales them by a power of ten and rounds
+to the nearest integer. For values which are within a rounding error of
+halfway, like `2.675`, which is stored as `2.67499999...`, this can differ in
+the last digit from rounding the same value as a Python float.
+"""
+
+import math
+import typing as t
+
+if t.TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
+
+
+class Rounding:
+    """
+    Round to `precision` decimal places, or to `significant_digits`
+    significant digits.
+    """
+
+    def __init__(
+        self,
+        precision: t.Optional[int] = None,
+        significant_digits: t.Optional[int] = None,
+    ):
+        if (precision is None) == (significant_digits is None):
+            raise ValueError("Pass either precision or significant_digits")
+        if significant_digits is not None and significant_digits < 1:
+            raise ValueError("significant_digits must be at least 1")
+        self.precision = precision
+        self.significant_digits = significant_digits
+
+    def round_float(self, value: float) -> float:
+        value = float(value)
+        if self.precision is not None:
+            return round(value, self.precision)
+        assert self.significant_digits is not None
+        if value == 0 or not math.isfinite(value):
+            return value
+        exponent = math.floor(math.log10(abs(value)))
+        try:
+            return round(value, self.significant_digits - 1 - exponent)
+        except OverflowError:
+            # Rounding up the largest floats.
+            return value
+
+    def round_array(self, array: "np.ndarray") -> "np.ndarray":
+        """
+        Round a floating-point array, returning a float64 array so the
+        rounded values of smaller dtypes can be written exactly.
+        """
+        import numpy as np
+
+        values = array.astype(np.float64)
+        with np.errstate(over="ignore", invalid="ignore"):
+            if self.precision is not None:
+                decimals = np.full(values.shape, float(self.precision))
+            else:
+                assert self.significant_digits is not None
+                magnitudes = np.abs(values)
+                magnitudes[~np.isfinite(magnitudes) | (magnitudes == 0)] = 1.0
+                decimals = self.significant_digits - 1 - np.floor(np.log10(magnitudes))
+            # Scale by a power of ten, dividing rather than multiplying by its
+            # inverse, which isn't exact, so the result is the float nearest to
+            # the rounded decimal.
+            scale = 10.0 ** np.abs(decimals)
+            rounded = np.where(
+                decimals >= 0,
+                np.rint(values * scale) / scale,
+                np.rint(values / scale) * scale,
+            )
+        # Keep infinities and NaN, and the values which overflowed when scaled.
+        rounded = np.where(np.isfinite(rounded), rounded, values)
+        # Powers of ten above 1e22 aren't exact, so round the values which need
+        # them one at a time.
+        inexact = (np.abs(decimals) > 22) & np.isfinite(values) & (values != 0)
+        if inexact.any():
+            rounded[inexact] = [self.round_float(value) for value in values[inexact]]
+        return rounded
+
+    def round_nested(self, obj: t.Any) -> t.Any:
+        """
+        Return a copy of the dicts, lists and tuples in `obj`, with the floats
+        they contain rounded. Other objects, including arrays, are left to the
+        encoder.
+        """
+        precision = self.precision
+        round_float = self.round_float
+
+        def walk(obj: t.Any) -> t.Any:
+            cls = type(obj)
+            if cls is float:
+                # The common case, without the overhead of round_float.
+                return (
+                    round(obj, precision) if precision is not None else round_float(obj)
+                )
+            elif cls is list:
+                return [walk(value) for value in obj]
+            elif cls is dict:
+                return {key: walk(value) for key, value in obj.items()}
+            elif cls is tuple:
+                return tuple(walk(value) for value in obj)
+            elif isinstance(obj, float):
+                return round_float(obj)
+            return obj
+
+        return walk(obj)
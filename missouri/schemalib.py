@@ -0,0 +1,348 @@
+"""
+Compile the schema of a record type, such as a dataclass, into functions
+which encode and decode records of exactly that shape.
+
+The generic encoder probes the type of every value it doesn't know, like a
+numpy scalar, and the generic decoder checks every dict for marker keys. A
+compiled schema knows from the annotations which fields hold arrays, numpy
+scalars or nested records, so it converts only those fields, and writes the
+keys in the order the fields are declared:
+
+.. code-block:: python
+
+    @dataclasses.dataclass
+    class Detection:
+        label: str
+        score: np.float32
+        box: np.ndarray
+
+    schema = compile_schema(Detection)
+    text = json.dumps([schema.encode(detection) for detection in detections])
+    detections = [schema.decode(obj) for obj in json.loads(text, decoder=None)]
+
+Dataclasses, `typing.NamedTuple` and `typing.TypedDict` classes are supported.
+Fields may be annotated with `str`, `int`, `float`, `bool`, `np.ndarray` or
+`npt.NDArray`, numpy scalar types, other record types, and `Optional`,
+`List`, `Tuple` and `Dict` of those. The values of fields with any other
+annotation are passed through, and left to the encoder.
+"""
+
+import dataclasses
+import functools
+import sys
+import threading
+import typing as t
+from .numpylib import NdarrayEncoding, decode_numpy, encode_numpy
+
+if t.TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
+
+Converter = t.Callable[[t.Any], t.Any]
+
+
+class CompiledSchema:
+    """
+    The encoder and decoder compiled for a record type by `compile_schema`.
+
+    `encode` converts a record to a dict of values the JSON backend writes
+    natively. `decode` converts a dict back to a record, and accepts arrays
+    which have already been decoded as well as encoded ones, so the document
+    can be loaded with or without `missouri.coding.JSONDecoder`.
+    """
+
+    encode: Converter
+    decode: Converter
+
+    def __init__(self, cls: type, fields: t.List[t.Tuple[str, bool]]):
+        self.cls = cls
+        #: The name of each field, and whether it is required.
+        self.fields = fields
+
+
+# The schemas being compiled, which records containing themselves refer to.
+_compiling: t.Dict[t.Tuple[type, NdarrayEncoding], CompiledSchema] = {}
+_lock = threading.RLock()
+
+
+def _is_record(cls: t.Any) -> bool:
+    return isinstance(cls, type) and (
+        dataclasses.is_dataclass(cls)
+        or (issubclass(cls, tuple) and hasattr(cls, "_fields"))
+        or (issubclass(cls, dict) and hasattr(cls, "__required_keys__"))
+    )
+
+
+def _numpy_type(annotation: t.Any) -> t.Optional[type]:
+    np = sys.modules.get("numpy")
+    if np is None:
+        # Annotations can only refer to numpy types once it's imported.
+        return None
+    origin = t.get_origin(annotation) or annotation
+    if isinstance(origin, type) and issubclass(origin, (np.ndarray, np.generic)):
+        return origin
+    return None
+
+
+def _encode_ndarray_list(value: "np.ndarray") -> t.Dict[str, t.Any]:
+    # The same as encode_numpy, without looking up the type of the value.
+    return {
+        "__ndarray__": value.tolist(),
+        "dtype": value.dtype.name,
+        "shape": value.shape,
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def _dtype(name: str) -> "np.dtype":
+    import numpy as np
+
+    return np.dtype(name)
+
+
+def _decode_ndarray(value: t.Any) -> t.Any:
+    if type(value) is not dict:
+        # Decoded already.
+        return value
+    data = value["__ndarray__"]
+    shape = value.get("shape")
+    if type(data) is list and shape is not None and len(shape) == 1:
+        # The common case of a small vector, for which np.array is faster than
+        # the general decoder.
+        import numpy as np
+
+        try:
+            result = np.array(data, dtype=_dtype(value.get("dtype", "float64")))
+        except (TypeError, ValueError):
+            pass
+        else:
+            if result.shape == (shape[0],):
+                return result
+    return decode_numpy(value)
+
+
+def _converters(
+    annotation: t.Any, ndarray_encoding: NdarrayEncoding
+) -> t.Tuple[t.Optional[Converter], t.Optional[Converter]]:
+    """
+    Return the functions which encode and decode a value with the given
+    annotation, or None for values which are passed through.
+    """
+    if _is_record(annotation):
+        compiling = _compiling.get((annotation, ndarray_encoding))
+        if compiling is not None:
+            # A recursive record, whose functions aren't compiled yet.
+            return (
+                lambda value: compiling.encode(value),  # type: ignore
+                lambda value: compiling.decode(value),  # type: ignore
+            )
+        schema = compile_schema(annotation, ndarray_encoding)
+        return schema.encode, schema.decode
+
+    numpy_type = _numpy_type(annotation)
+    if numpy_type is not None:
+        import numpy as np
+
+        if issubclass(numpy_type, np.ndarray):
+            if ndarray_encoding == "list":
+                return _encode_ndarray_list, _decode_ndarray
+            return (
+                functools.partial(
+                    encode_numpy, as_primitives=False, ndarray_encoding="base64"
+                ),
+                _decode_ndarray,
+            )
+        elif issubclass(numpy_type, np.bool_):
+            return bool, numpy_type
+        elif issubclass(numpy_type, np.integer):
+            return int, numpy_type
+        elif issubclass(numpy_type, np.floating):
+            return float, numpy_type
+        return np.generic.item, None
+
+    origin = t.get_origin(annotation)
+    args = t.get_args(annotation)
+    if origin is t.Union and type(None) in args:
+        others = [arg for arg in args if arg is not type(None)]
+        if len(others) == 1:
+            encode, decode = _converters(others[0], ndarray_encoding)
+            return _optional(encode), _optional(decode)
+    elif origin in (list, tuple) and args and (origin is list or args[-1] is ...):
+        encode, decode = _converters(args[0], ndarray_encoding)
+        if origin is tuple:
+            # Decode to a tuple, which the document stores as a list.
+            return _sequence(encode), _tuple(decode)
+        return _sequence(encode), _sequence(decode)
+    elif origin is dict and len(args) == 2:
+        encode, decode = _converters(args[1], ndarray_encoding)
+        return _mapping(encode), _mapping(decode)
+    return None, None
+
+
+def _optional(convert: t.Optional[Converter]) -> t.Optional[Converter]:
+    if convert is None:
+        return None
+    return lambda value: None if value is None else convert(value)  # type: ignore
+
+
+def _sequence(convert: t.Optional[Converter]) -> t.Optional[Converter]:
+    if convert is None:
+        return None
+    return lambda values: [convert(value) for value in values]  # type: ignore
+
+
+def _tuple(convert: t.Optional[Converter]) -> Converter:
+    if convert is None:
+        return tuple
+    return lambda values: tuple(convert(value) for value in values)  # type: ignore
+
+
+def _mapping(convert: t.Optional[Converter]) -> t.Optional[Converter]:
+    if convert is None:
+        return None
+    return lambda values: {
+        key: convert(value) for key, value in values.items()  # type: ignore
+    }
+
+
+def _fields(cls: type) -> t.List[t.Tuple[str, bool]]:
+    if dataclasses.is_dataclass(cls):
+        # Fields which aren't arguments of __init__ are never required.
+        return [
+            (
+                field.name,
+                field.init
+                and field.default is dataclasses.MISSING
+                and field.default_factory is dataclasses.MISSING,
+            )
+            for field in dataclasses.fields(cls)
+        ]
+    elif issubclass(cls, tuple):
+        defaults = getattr(cls, "_field_defaults", {})
+        return [(name, name not in defaults) for name in getattr(cls, "_fields")]
+    required = getattr(cls, "__required_keys__")
+    return [(name, name in required) for name in t.get_type_hints(cls)]
+
+
+@functools.lru_cache(maxsize=None)
+def compile_schema(
+    cls: type, ndarray_encoding: NdarrayEncoding = "list"
+) -> CompiledSchema:
+    """
+    Compile an encoder and decoder for the records of a dataclass,
+    `typing.NamedTuple` or `typing.TypedDict` class. Arrays are encoded as
+    nested lists, or with `ndarray_encoding="base64"` as raw buffers.
+
+    The result is cached, so compiling the same class again is free.
+    """
+    if not _is_record(cls):
+        raise ValueError(
+            f"Can't compile a schema for {cls!r}; expected a dataclass, NamedTuple or TypedDict"
+        )
+    with _lock:
+        schema = _compiling[(cls, ndarray_encoding)] = CompiledSchema(cls, _fields(cls))
+        try:
+            _compile(schema, ndarray_encoding)
+        finally:
+            del _compiling[(cls, ndarray_encoding)]
+    return schema
+
+
+def _missing(cls: type, required: t.FrozenSet[str], obj: t.Dict) -> ValueError:
+    names = ", ".join(repr(name) for name in sorted(required - obj.keys()))
+    return ValueError(f"{cls.__qualname__} record is missing {names}")
+
+
+def _compile(schema: CompiledSchema, ndarray_encoding: NdarrayEncoding) -> None:
+    cls = schema.cls
+    hints = t.get_type_hints(cls)
+    required = frozenset(name for name, is_required in schema.fields if is_required)
+    namespace: t.Dict[str, t.Any] = {
+        "cls": cls,
+        "required": required,
+        "missing": functools.partial(_missing, cls, required),
+        "set_field": object.__setattr__,
+    }
+    # Generate the source of functions which read and convert each field in
+    # turn, like dataclasses does for __init__. The converters are passed in
+    # the namespace. TypedDict records are plain dicts, so they are decoded in
+    # place.
+    is_typed_dict = issubclass(cls, dict)
+    # Fields which aren't arguments of __init__ are set after it, which works
+    # for frozen dataclasses too.
+    not_init = (
+        {field.name for field in dataclasses.fields(cls) if not field.init}
+        if dataclasses.is_dataclass(cls)
+        else set()
+    )
+    encode_items = []
+    encode_optional = []
+    decode_arguments = []
+    decode_lines = []
+    set_lines = []
+    for index, (name, is_required) in enumerate(schema.fields):
+        key = repr(name)
+        encode, decode = _converters(hints.get(name), ndarray_encoding)
+        namespace[f"encode_{index}"] = encode
+        namespace[f"decode_{index}"] = decode
+
+        read = f"obj[{key}]" if is_typed_dict else f"obj.{name}"
+        if encode is not None:
+            read = f"encode_{index}({read})"
+        if is_required or not is_typed_dict:
+            encode_items.append(f"{key}: {read}")
+        else:
+            encode_optional.append(f"    if {key} in obj: result[{key}] = {read}")
+
+        decoded = f"obj[{key}]"
+        if decode is not None:
+            decoded = f"decode_{index}({decoded})"
+        if is_typed_dict:
+            if decode is None:
+                continue
+            line = f"obj[{key}] = {decoded}"
+        elif is_required:
+            decode_arguments.append(f"{name}={decoded}")
+            continue
+        elif name in not_init:
+            set_lines.append(
+                f"    if {key} in obj: set_field(record, {key}, {decoded})"
+            )
+            continue
+        else:
+            line = f"kwargs[{key}] = {decoded}"
+        decode_lines.append(
+            f"    {line}" if is_required else f"    if {key} in obj: {line}"
+        )
+
+    encode_source = "\n".join(
+        [
+            "def encode(obj):",
+            f"    result = {{{', '.join(encode_items)}}}",
+            *encode_optional,
+            "    return result",
+        ]
+    )
+    if is_typed_dict:
+        record = "obj"
+    else:
+        if decode_lines:
+            decode_lines.insert(0, "    kwargs = {}")
+            decode_arguments.append("**kwargs")
+        record = f"cls({', '.join(decode_arguments)})"
+    decode_source = "\n".join(
+        [
+            "def decode(obj):",
+            "    if not required.issubset(obj):",
+            "        raise missing(obj)",
+            *decode_lines,
+            *(
+                [f"    record = {record}", *set_lines, "    return record"]
+                if set_lines
+                else [f"    return {record}"]
+            ),
+        ]
+    )
+    exec(encode_source, namespace)
+    exec(decode_source, namespace)
+    schema.encode = namespace["encode"]
+    schema.decode = namespace["decode"]
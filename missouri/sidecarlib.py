@@ -0,0 +1,120 @@
+"""
+Store large arrays outside the JSON document, in a binary file next to it,
+and map them back in lazily on load.
+
+The JSON document holds a reference to each array, like:
+
+.. code-block:: python
+
+    {
+        "__ndarray_ref__": "example.arrays#4096",
+        "dtype": "<f4",
+        "shape": [1000000, 3]
+    }
+
+which names the sidecar file, relative to the JSON document, and the offset of
+the array's little-endian, C-ordered data within it.
+"""
+
+import contextlib
+import os
+import typing as t
+from .openlib import atomic_path
+
+if t.TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
+
+# Align each array so it can be mapped efficiently.
+ALIGNMENT = 64
+
+
+def sidecar_path(json_path: str) -> str:
+    return os.path.splitext(json_path)[0] + ".arrays"
+
+
+class SidecarWriter:
+    """
+    Append arrays of at least `threshold` bytes to the sidecar file for
+    `json_path`, within a `with` block. The file is written to a temporary
+    path with `missouri.openlib.atomic_path`, and only replaces the existing
+    sidecar when the block succeeds, so readers which have mapped the old file
+    are unaffected. When no arrays are written, the existing sidecar is
+    removed instead.
+    """
+
+    def __init__(self, json_path: str, threshold: int):
+        self.path = sidecar_path(json_path)
+        self.threshold = threshold
+        self.offset = 0
+        self._f: t.Optional[t.BinaryIO] = None
+        self._files = contextlib.ExitStack()
+
+    def _open(self) -> t.BinaryIO:
+        temp_path = self._files.enter_context(atomic_path(self.path))
+        return self._files.enter_context(open(temp_path, "wb"))
+
+    def encode(self, obj: "np.ndarray") -> t.Optional[t.Dict[str, t.Any]]:
+        if obj.dtype.hasobject or obj.nbytes == 0 or obj.nbytes < self.threshold:
+            return None
+        if self._f is None:
+            self._f = self._open()
+
+        padding = -self.offset % ALIGNMENT
+        self._f.write(b"\0" * padding)
+        self.offset += padding
+
+        little_endian = obj.astype(obj.dtype.newbyteorder("<"), order="C", copy=False)
+        self._f.write(little_endian.data)
+        ref = {
+            "__ndarray_ref__": f"{os.path.basename(self.path)}#{self.offset}",
+            "dtype": little_endian.dtype.str,
+            "shape": obj.shape,
+        }
+        self.offset += little_endian.nbytes
+        return ref
+
+    def __enter__(self) -> "SidecarWriter":
+        return self
+
+    def __exit__(self, *exc_info: t.Any) -> None:
+        if self._f is not None:
+            self._f = None
+            self._files.__exit__(*exc_info)
+        elif exc_info[0] is None and os.path.exists(self.path):
+            # Don't leave the arrays of a previous dump next to the document.
+            os.remove(self.path)
+
+
+class SidecarReader:
+    """
+    Resolve array references relative to `directory`. Each sidecar file is
+    memory-mapped once, read-only, and the arrays are views into it, so their
+    data is only read from disk when it is accessed.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._maps: t.Dict[str, "np.memmap"] = {}
+
+    def decode(self, dct: t.Dict) -> "np.ndarray":
+        import numpy as np
+
+        ref = dct["__ndarray_ref__"]
+        name, _, offset = ref.rpartition("#") if type(ref) is str else ("", "", "")
+        if (
+            not name
+            or os.path.basename(name) != name
+            or not offset.isdigit()
+            or type(dct.get("dtype")) is not str
+            or type(dct.get("shape")) is not list
+        ):
+            raise ValueError(f"Invalid array reference: {ref}")
+        path = os.path.join(self.directory, name)
+        if path not in self._maps:
+            self._maps[path] = np.memmap(path, dtype=np.uint8, mode="r")
+        return np.ndarray(
+            shape=tuple(dct["shape"]),
+            dtype=np.dtype(dct["dtype"]),
+            buffer=self._maps[path],
+            offset=int(offset),
+        )
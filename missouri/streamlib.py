@@ -0,0 +1,236 @@
+"""
+Incrementally scan a JSON document which is too large to decode at once,
+decoding only the values found at a given path.
+"""
+
+import re
+import typing as t
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_STRING_CONTENT = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+_STRUCTURAL = re.compile(r'[\[\]{}"]')
+_SCALAR_END = re.compile(r"[ \t\n\r,\]}]")
+_CLOSING = {"[": "]", "{": "}"}
+
+Path = t.Tuple[str, ...]
+
+
+def parse_prefix(prefix: str) -> Path:
+    """
+    Split an ijson-style prefix like `"frames.item"` into its components. The
+    empty prefix refers to the whole document; `item` refers to each element of
+    an array.
+    """
+    return tuple(prefix.split(".")) if prefix else ()
+
+
+Decode = t.Callable[[str], t.Any]
+RawDecode = t.Callable[[str, int], t.Tuple[t.Any, int]]
+
+
+class ChunkScanner:
+    """
+    Scan the JSON document in `f`, reading `chunk_size` characters at a time.
+    Only the part of the document which is being scanned is held in memory.
+
+    Values are decoded with `decode`, or when it is provided, `raw_decode`,
+    which decodes a value starting at an index in a string and returns it along
+    with the index where it ends. This avoids scanning the value in Python
+    before decoding it.
+    """
+
+    def __init__(
+        self,
+        f: t.IO[str],
+        chunk_size: int,
+        decode: Decode,
+        raw_decode: t.Optional[RawDecode] = None,
+    ):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decode = decode
+        self.raw_decode = raw_decode
+        self.buf = ""
+        self.pos = 0
+        # The offset in the document of `buf[0]`, for error messages.
+        self.offset = 0
+        # While scanning a value which will be decoded, the index where it starts.
+        self.mark: t.Optional[int] = None
+        self.eof = False
+
+    def fill(self) -> bool:
+        """
+        Read the next chunk, discarding the part of the buffer which has been
+        scanned. Return False at the end of the document.
+        """
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        keep_from = self.pos if self.mark is None else self.mark
+        self.buf = self.buf[keep_from:] + chunk
+        self.offset += keep_from
+        self.pos -= keep_from
+        if self.mark is not None:
+            self.mark -= keep_from
+        return True
+
+    def error(self, message: str) -> ValueError:
+        return ValueError(f"{message} at offset {self.offset + self.pos}")
+
+    def peek(self) -> str:
+        """
+        Skip whitespace and return the next character, or an empty string at the
+        end of the document.
+        """
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()  # type: ignore[union-attr]
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise self.error(f"Expecting {char!r}")
+        self.pos += 1
+
+    def _scan_string_tail(self) -> None:
+        # `pos` is just past the opening quote.
+        while True:
+            self.pos = _STRING_CONTENT.match(self.buf, self.pos).end()  # type: ignore[union-attr]
+            if self.pos < len(self.buf) and self.buf[self.pos] == '"':
+                self.pos += 1
+                return
+            if not self.fill():
+                raise self.error("Unterminated string")
+
+    def _scan_container_tail(self, opening: str) -> None:
+        # `pos` is just past the opening bracket.
+        open_brackets = [opening]
+        while open_brackets:
+            match = _STRUCTURAL.search(self.buf, self.pos)
+            if match is None:
+                self.pos = len(self.buf)
+                if not self.fill():
+                    raise self.error("Unterminated array or object")
+                continue
+            self.pos = match.end()
+            char = match.group()
+            if char == '"':
+                self._scan_string_tail()
+            elif char in "[{":
+                open_brackets.append(char)
+            elif _CLOSING[open_brackets.pop()] != char:
+                self.pos -= 1
+                raise self.error(f"Unexpected {char!r}")
+
+    def _scan_scalar_tail(self) -> None:
+        while True:
+            match = _SCALAR_END.search(self.buf, self.pos)
+            if match is not None:
+                self.pos = match.start()
+                return
+            self.pos = len(self.buf)
+            if not self.fill():
+                return
+
+    def scan_value(self, keep: bool) -> str:
+        """
+        Scan past the next value, returning its text if `keep` is True and an
+        empty string otherwise. When the text is not kept, large values are
+        skipped without being held in memory.
+        """
+        char = self.peek()
+        if not char:
+            raise self.error("Expecting value")
+        if keep:
+            self.mark = self.pos
+        self.pos += 1
+        if char == '"':
+            self._scan_string_tail()
+        elif char in "[{":
+            self._scan_container_tail(char)
+        else:
+            self._scan_scalar_tail()
+        if self.mark is None:
+            return ""
+        text = self.buf[self.mark : self.pos]
+        self.mark = None
+        return text
+
+    def decode_value(self) -> t.Any:
+        if self.raw_decode is not None and self.peek():
+            try:
+                value, end = self.raw_decode(self.buf, self.pos)
+            except ValueError:
+                # Most likely the value continues past the end of the buffer.
+                pass
+            else:
+                # A number cut by the end of the buffer, even right after its
+                # `.` or `e`, may continue in the next chunk, so only accept it
+                # when it's followed by what may follow a value.
+                if (
+                    _SCALAR_END.match(self.buf, end)
+                    if end < len(self.buf)
+                    else self.eof
+                ):
+                    self.pos = end
+                    return value
+        return self.decode(self.scan_value(keep=True))
+
+    def scan_key(self) -> str:
+        if self.peek() != '"':
+            raise self.error("Expecting property name enclosed in double quotes")
+        text = self.scan_value(keep=True)
+        key = text[1:-1] if "\\" not in text else self.decode(text)
+        self.expect(":")
+        return key
+
+    def iter_values(self, path: Path, prefix: Path) -> t.Iterator[t.Any]:
+        """
+        Yield the decoded values at `prefix` within the value at `path`, which
+        starts at the current position.
+        """
+        if path == prefix:
+            yield self.decode_value()
+            return
+
+        char = self.peek()
+        if prefix[: len(path)] != path or char not in "[{":
+            self.scan_value(keep=False)
+            return
+
+        self.pos += 1
+        closing = _CLOSING[char]
+        if self.peek() == closing:
+            self.pos += 1
+            return
+        while True:
+            if char == "{":
+                key = self.scan_key()
+                yield from self.iter_values(path + (key,), prefix)
+            else:
+                yield from self.iter_values(path + ("item",), prefix)
+            char_after = self.peek()
+            self.pos += 1
+            if char_after == closing:
+                return
+            elif char_after != ",":
+                self.pos -= 1
+                raise self.error(f"Expecting ',' or {closing!r} delimiter")
+
+
+def iter_items(
+    f: t.IO[str],
+    prefix: str,
+    chunk_size: int,
+    decode: Decode,
+    raw_decode: t.Optional[RawDecode] = None,
+) -> t.Iterator[t.Any]:
+    scanner = ChunkScanner(f, chunk_size, decode, raw_decode)
+    yield from scanner.iter_values((), parse_prefix(prefix))
+    if scanner.peek():
+        raise scanner.error("Extra data")
@@ -0,0 +1,222 @@
+import asyncio
+import typing as t
+from missouri import asynclib, json
+from missouri.coding import JSONDecoder
+import py
+import pytest
+
+DOCUMENT = {"frames": [{"index": i, "label": f"frame {i}"} for i in range(100)]}
+
+
+class UppercaseDecoder(JSONDecoder):
+    def decode(self, obj: t.Any) -> t.Any:
+        if "label" in obj:
+            return {**obj, "label": obj["label"].upper()}
+        return None
+
+
+class AsyncFile:
+    """
+    Like an aiofiles file: read() and write() are coroutines.
+    """
+
+    def __init__(self, data: t.Union[bytes, str] = b""):
+        self.data = data
+        self.written: t.List[bytes] = []
+
+    async def read(self) -> t.Union[bytes, str]:
+        return self.data
+
+    async def write(self, data: bytes) -> None:
+        self.written.append(data)
+
+
+def test_aload_and_adump_path(tmpdir: py.path.local) -> None:
+    path = str(tmpdir / "test_aload_and_adump_path.json")
+
+    async def main() -> t.Any:
+        await json.adump(DOCUMENT, path, indent=2)
+        return await json.aload(path)
+
+    assert asyncio.run(main()) == DOCUMENT
+    assert json.load(path) == DOCUMENT
+
+
+def test_aload_stream_reader() -> None:
+    async def main() -> t.Any:
+        reader = asyncio.StreamReader()
+        reader.feed_data(json.dumps_bytes(DOCUMENT)[:10])
+        reader.feed_data(json.dumps_bytes(DOCUMENT)[10:])
+        reader.feed_eof()
+        return await json.aload(reader, decoder=UppercaseDecoder())
+
+    res = asyncio.run(main())
+    assert res["frames"][1] == {"index": 1, "label": "FRAME 1"}
+
+
+def test_aload_async_text_file() -> None:
+    async def main() -> t.Any:
+        return await json.aload(AsyncFile(json.dumps(DOCUMENT)))
+
+    assert asyncio.run(main()) == DOCUMENT
+
+
+def test_adump_stream_writer(tmpdir: py.path.local) -> None:
+    async def main() -> bytes:
+        received = asyncio.get_running_loop().create_future()
+
+        async def handle(
+            reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+        ) -> None:
+            received.set_result(await reader.read())
+            writer.close()
+
+        server = await asyncio.start_unix_server(handle, str(tmpdir / "socket"))
+        _, writer = await asyncio.open_unix_connection(str(tmpdir / "socket"))
+        await json.adump(DOCUMENT, writer, backend="json")
+        writer.close()
+        await writer.wait_closed()
+        data = await received
+        server.close()
+        await server.wait_closed()
+        return data
+
+    assert asyncio.run(main()) == json.dumps_bytes(DOCUMENT)
+
+
+def test_adump_async_file() -> None:
+    f = AsyncFile()
+    asyncio.run(json.adump(DOCUMENT, f))
+    assert f.written == [json.dumps_bytes(DOCUMENT)]
+
+
+def test_adump_async_writer_with_sidecar_raises_expected_error() -> None:
+    with pytest.raises(
+        ValueError, match=r"Writing arrays to a sidecar file requires a path"
+    ):
+        asyncio.run(json.adump(DOCUMENT, AsyncFile(), sidecar_threshold=0))
+
+
+def test_aload_with_executor(tmpdir: py.path.local) -> None:
+    from concurrent.futures import ThreadPoolExecutor
+
+    path = str(tmpdir / "test_aload_with_executor.json")
+    json.dump(DOCUMENT, path)
+    with ThreadPoolExecutor(1, thread_name_prefix="custom") as executor:
+        assert asyncio.run(json.aload(path, executor=executor)) == DOCUMENT
+
+
+def test_set_max_workers(tmpdir: py.path.local) -> None:
+    import threading
+
+    path = str(tmpdir / "test_set_max_workers.json")
+    json.dump(DOCUMENT, path)
+    threads: t.Set[str] = set()
+
+    class RecordingDecoder(JSONDecoder):
+        def decode(self, obj: t.Any) -> t.Any:
+            threads.add(threading.current_thread().name)
+
+    async def main() -> None:
+        await asyncio.gather(
+            *(json.aload(path, decoder=RecordingDecoder()) for _ in range(8))
+        )
+
+    asynclib.set_max_workers(1)
+    try:
+        asyncio.run(main())
+        assert len(threads) == 1
+    finally:
+        asynclib.set_max_workers(4)
+
+    # A new executor is created with the new limit, which lets two loads wait
+    # for each other.
+    barrier = threading.Barrier(2, timeout=10)
+
+    class WaitingDecoder(JSONDecoder):
+        def __init__(self) -> None:
+            super().__init__()
+            self.waited = False
+
+        def decode(self, obj: t.Any) -> t.Any:
+            if not self.waited:
+                self.waited = True
+                barrier.wait()
+
+    async def both() -> None:
+        await asyncio.gather(
+            *(json.aload(path, decoder=WaitingDecoder()) for _ in range(2))
+        )
+
+    asynclib.set_max_workers(2)
+    try:
+        asyncio.run(both())
+    finally:
+        asynclib.set_max_workers(4)
+
+
+def assert_aload_keeps_event_loop_responsive(path: str) -> None:
+    import time
+
+    async def main() -> t.Tuple[float, t.List[float]]:
+        gaps: t.List[float] = []
+        loading = True
+
+        async def tick() -> None:
+            last = time.perf_counter()
+            while loading:
+                await asyncio.sleep(0.005)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        ticker = asyncio.create_task(tick())
+        start = time.perf_counter()
+        await json.aload(path)
+        elapsed = time.perf_counter() - start
+        loading = False
+        await ticker
+        return elapsed, gaps
+
+    elapsed, gaps = asyncio.run(main())
+    # The loop kept ticking throughout the load, rather than stalling until it
+    # finished.
+    assert len(gaps) >= 5
+    assert max(gaps) < max(0.25, elapsed / 2)
+
+
+def test_aload_keeps_event_loop_responsive(tmpdir: py.path.local) -> None:
+    path = str(tmpdir / "test_aload_keeps_event_loop_responsive.json")
+    json.dump(
+        {
+            "records": [
+                {"id": i, "tags": ["a", "b"], "meta": {"x": i}} for i in range(150000)
+            ]
+        },
+        path,
+    )
+    assert_aload_keeps_event_loop_responsive(path)
+
+
+@pytest.mark.slow
+def test_aload_keeps_event_loop_responsive_with_large_document(
+    tmpdir: py.path.local,
+) -> None:
+    import os
+
+    # A document of several hundred MB, written a batch of records at a time
+    # to keep the memory the test uses down.
+    path = str(
+        tmpdir / "test_aload_keeps_event_loop_responsive_with_large_document.json"
+    )
+    label = "x" * 200
+    with open(path, "w") as f:
+        f.write('{"records": [')
+        for start in range(0, 1_500_000, 15000):
+            if start:
+                f.write(",")
+            records = [{"id": i, "label": label} for i in range(start, start + 15000)]
+            f.write(json.dumps(records)[1:-1])
+        f.write("]}")
+    assert os.path.getsize(path) > 300 << 20
+    assert_aload_keeps_event_loop_responsive(path)
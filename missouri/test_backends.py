@@ -0,0 +1,311 @@
+import typing as t
+from missouri import json, jsonl
+from missouri.backends import get_backend, set_default_backend
+from missouri.coding import JSONDecoder, JSONEncoder
+import py
+import pytest
+
+BACKENDS = ["simplejson", "json", "orjson"]
+
+DOCUMENTS: t.List[t.Any] = [
+    None,
+    True,
+    3,
+    -1.5e-300,
+    'café ሴ "quoted" \\ \n',
+    [],
+    {},
+    ["foo", {"bar": ["baz", None, 1.0, 2]}],
+    {"nested": {"deeper": [{"a": 1}, {"b": [True, False]}], "empty": {}}},
+    {"ints": [0, -1, 2**62], "floats": [0.1, 1e100, -0.0]},
+]
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request: pytest.FixtureRequest) -> str:
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    return request.param
+
+
+class Point:
+    def __init__(self, x: float, y: float):
+        self.x = x
+        self.y = y
+
+    def for_json(self) -> t.Dict[str, float]:
+        return {"x": self.x, "y": self.y}
+
+
+class Vector:
+    def __init__(self, x: float):
+        self.x = x
+
+
+def vector_encoder() -> JSONEncoder:
+    encoder = JSONEncoder()
+    encoder.register_type(Vector, lambda obj: {"__vector__": obj.x})
+    return encoder
+
+
+def vector_decoder() -> JSONDecoder:
+    decoder = JSONDecoder()
+    decoder.register_key("__vector__", lambda obj: Vector(obj["__vector__"]))
+    return decoder
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+def test_backend_round_trip(backend: str, document: t.Any) -> None:
+    assert (
+        json.loads(json.dumps(document, backend=backend), backend=backend) == document
+    )
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+def test_backend_output_matches_simplejson(backend: str, document: t.Any) -> None:
+    if backend == "orjson":
+        # orjson's output format is fixed, and how it formats floats varies
+        # between versions, so only compare the values it writes.
+        kwargs: t.Dict[str, t.Any] = {"separators": (",", ":"), "ensure_ascii": False}
+        actual = json.dumps(document, backend=backend, **kwargs)
+        assert json.loads(actual) == json.loads(json.dumps(document, **kwargs))
+    else:
+        assert json.dumps(document, backend=backend) == json.dumps(document)
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+def test_backend_decodes_simplejson_output(backend: str, document: t.Any) -> None:
+    assert json.loads(json.dumps(document, indent=4), backend=backend) == document
+
+
+def test_backend_sort_keys_and_indent(backend: str) -> None:
+    document = {"c": [1, {"b": 0, "a": 0}], "a": 0}
+    assert (
+        json.loads(json.dumps(document, backend=backend, sort_keys=True, indent=2))
+        == document
+    )
+    assert json.dumps(
+        document, backend=backend, sort_keys=True, indent=2
+    ) == json.dumps(
+        document,
+        sort_keys=True,
+        indent=2,
+        **({"separators": (",", ": ")} if backend == "orjson" else {}),
+    )
+
+
+@pytest.mark.parametrize("ndarray_encoding", ["list", "base64"])
+def test_backend_round_trip_ndarrays(backend: str, ndarray_encoding: str) -> None:
+    import numpy as np
+
+    document = {
+        "points": np.arange(6, dtype=np.float32).reshape(2, 3),
+        "nested": [{"ids": np.arange(3)}],
+        "scalar": np.float64(0.5),
+    }
+    res = json.loads(
+        json.dumps(document, backend=backend, ndarray_encoding=ndarray_encoding),
+        backend=backend,
+    )
+    assert res["points"].dtype == np.float32
+    np.testing.assert_equal(res["points"], document["points"])
+    np.testing.assert_equal(res["nested"][0]["ids"], np.arange(3))
+    assert res["scalar"] == 0.5
+
+
+def test_backend_for_json(backend: str) -> None:
+    assert json.loads(json.dumps({"point": Point(1.0, 2.0)}, backend=backend)) == {
+        "point": {"x": 1.0, "y": 2.0}
+    }
+
+
+class PointDict(dict):
+    def for_json(self) -> t.Dict[str, int]:
+        return {"x": 1}
+
+
+class LabelList(list):
+    def for_json(self) -> str:
+        return "L"
+
+
+class PlainDict(dict):
+    pass
+
+
+def test_backend_for_json_on_container_subclasses(backend: str) -> None:
+    assert json.loads(
+        json.dumps({"a": PointDict(), "b": LabelList()}, backend=backend)
+    ) == {"a": {"x": 1}, "b": "L"}
+    assert json.loads(
+        json.dumps([PlainDict(c=[LabelList()]), (PointDict(),)], backend=backend)
+    ) == [{"c": ["L"]}, [{"x": 1}]]
+
+
+def test_backend_for_json_without_encoder(backend: str) -> None:
+    assert json.loads(
+        json.dumps({"point": Point(1.0, 2.0)}, backend=backend, encoder=None)
+    ) == {"point": {"x": 1.0, "y": 2.0}}
+
+
+def test_backend_for_json_with_plain_callable_encoder(
+    backend: str, tmpdir: py.path.local
+) -> None:
+    path = str(tmpdir.join("example.json"))
+    json.dump(
+        [Point(1.0, 2.0), Vector(3.0)], path, backend=backend, encoder=lambda v: v.x
+    )
+    assert json.load(path) == [{"x": 1.0, "y": 2.0}, 3.0]
+
+
+def test_backend_custom_coders(backend: str) -> None:
+    text = json.dumps(
+        [Vector(1.0), {"v": Vector(2.0)}], backend=backend, encoder=vector_encoder()
+    )
+    res = json.loads(text, backend=backend, decoder=vector_decoder())
+    assert res[0].x == 1.0
+    assert res[1]["v"].x == 2.0
+
+
+def test_backend_unknown_object_raises_expected_error(backend: str) -> None:
+    with pytest.raises(
+        (ValueError, TypeError),
+        match=r"Object of type <class .* is not JSON-serializable",
+    ):
+        json.dumps(complex(1, 3), backend=backend)
+
+
+def test_backend_file_round_trip(backend: str, tmpdir: py.path.local) -> None:
+    path = str(tmpdir / "test_backend_file_round_trip.json")
+    json.dump(DOCUMENTS, path, backend=backend)
+    assert json.load(path, backend=backend) == DOCUMENTS
+
+
+def test_backend_jsonl_and_iter_items(backend: str, tmpdir: py.path.local) -> None:
+    path = str(tmpdir / "test_backend_jsonl.jsonl")
+    jsonl.dump_iter(DOCUMENTS, path, backend=backend)
+    assert list(jsonl.iter_load(path, backend=backend)) == DOCUMENTS
+
+    path = str(tmpdir / "test_backend_iter_items.json")
+    json.dump({"documents": DOCUMENTS}, path, backend=backend)
+    assert (
+        list(json.iter_items(path, "documents.item", chunk_size=8, backend=backend))
+        == DOCUMENTS
+    )
+
+
+def test_set_default_backend() -> None:
+    pytest.importorskip("orjson")
+    try:
+        set_default_backend("orjson")
+        assert get_backend().name == "orjson"
+        assert json.dumps({"a": [1, 2]}) == '{"a":[1,2]}'
+    finally:
+        set_default_backend("simplejson")
+    assert json.dumps({"a": [1, 2]}) == '{"a": [1, 2]}'
+
+
+def test_unknown_backend_raises_expected_error() -> None:
+    with pytest.raises(ValueError, match=r"Unknown backend 'yaml'; expected one of"):
+        json.dumps({}, backend="yaml")
+    with pytest.raises(ValueError, match=r"Unknown backend 'yaml'; expected one of"):
+        set_default_backend("yaml")
+
+
+@pytest.mark.parametrize("backend", ["json", "orjson"])
+def test_backend_unsupported_args_raise_expected_error(backend: str) -> None:
+    if backend == "orjson":
+        pytest.importorskip("orjson")
+    with pytest.raises(
+        ValueError, match=rf"The {backend} backend doesn't support use_decimal"
+    ):
+        json.dumps(1.0, backend=backend, use_decimal=True)
+    with pytest.raises(
+        ValueError, match=rf"The {backend} backend doesn't support use_decimal"
+    ):
+        json.loads("1.0", backend=backend, use_decimal=True)
+
+
+@pytest.mark.parametrize("backend", ["json", "orjson"])
+def test_backend_positional_args_raise_expected_error(
+    backend: str, tmpdir: py.path.local
+) -> None:
+    if backend == "orjson":
+        pytest.importorskip("orjson")
+    path = str(tmpdir / "test_backend_positional_args.json")
+    with pytest.raises(
+        ValueError, match=rf"The {backend} backend doesn't accept positional arguments"
+    ):
+        json.dump({}, path, True, backend=backend)
+    with pytest.raises(
+        ValueError, match=rf"The {backend} backend doesn't accept positional arguments"
+    ):
+        json.load(path, None, backend=backend)
+
+
+def test_orjson_backend_unsupported_indent_raises_expected_error() -> None:
+    pytest.importorskip("orjson")
+    with pytest.raises(ValueError, match=r"The orjson backend only supports indent=2"):
+        json.dumps({}, backend="orjson", indent=4)
+
+
+def test_orjson_backend_raises_expected_error_when_not_installed(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    import sys
+
+    monkeypatch.setitem(sys.modules, "orjson", None)
+    with pytest.raises(ImportError, match=r"Install orjson to use the orjson backend"):
+        json.dumps({}, backend="orjson")
+
+
+def test_orjson_backend_reraises_its_own_errors() -> None:
+    pytest.importorskip("orjson")
+    import orjson
+
+    with pytest.raises(orjson.JSONEncodeError, match=r"Integer exceeds 64-bit range"):
+        json.dumps(2**70, backend="orjson")
+
+
+def test_orjson_backend_non_str_keys_raises_expected_error() -> None:
+    pytest.importorskip("orjson")
+    with pytest.raises(
+        ValueError, match=r"The orjson backend only supports dicts with str keys"
+    ):
+        json.dumps({"nested": {1: "one"}}, backend="orjson")
+
+
+def test_backend_bytes_round_trip(backend: str, tmpdir: py.path.local) -> None:
+    import mmap
+
+    data = json.dumps_bytes(DOCUMENTS, backend=backend)
+    assert data == json.dumps(DOCUMENTS, backend=backend).encode("utf-8")
+    assert json.load_bytes(data, backend=backend) == DOCUMENTS
+    assert json.load_bytes(memoryview(data), backend=backend) == DOCUMENTS
+
+    path = str(tmpdir / "test_backend_bytes_round_trip.json")
+    json.dump_bytes(DOCUMENTS, path, backend=backend)
+    assert json.load_bytes(path, backend=backend) == DOCUMENTS
+    with open(path, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mapped:
+        assert json.load_bytes(mapped, backend=backend) == DOCUMENTS
+
+
+def test_backend_loads_bytes(backend: str) -> None:
+    decoder = JSONDecoder()
+    data = json.dumps_bytes(DOCUMENTS)
+    assert get_backend(backend).loads_bytes(data, object_hook=decoder) == DOCUMENTS
+
+
+def test_backend_requires_encoder_and_decoder() -> None:
+    from missouri.backends import Backend
+
+    class EncoderOnly(Backend):
+        name = "encoder-only"
+
+        def encoder(self, dump_args: dict) -> t.Callable[[t.Any], str]:
+            return str
+
+    with pytest.raises(TypeError, match="abstract method decoder"):
+        EncoderOnly()  # type: ignore[abstract]
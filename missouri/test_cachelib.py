@@ -0,0 +1,411 @@
+import concurrent.futures
+import io
+import os
+import threading
+from missouri import json
+from missouri.cachelib import DiskCache, MemoryCache, Validate, default_memory_cache
+from missouri.sidecarlib import sidecar_path
+import numpy as np
+import py
+import pytest
+
+
+def write_document(path: str) -> None:
+    json.dump(
+        {"values": np.arange(12, dtype=np.float32).reshape(4, 3), "name": "mesh"},
+        path,
+    )
+
+
+def entries(cache: DiskCache) -> list:
+    return sorted(os.listdir(cache.directory))
+
+
+def test_load_with_cache(tmpdir: py.path.local) -> None:
+    path = str(tmpdir.join("example.json"))
+    write_document(path)
+    cache = DiskCache(str(tmpdir.join("cache")))
+
+    res = json.load(path, cache=cache)
+    assert res["name"] == "mesh"
+    np.testing.assert_array_equal(res["values"], np.arange(12).reshape(4, 3))
+    assert len(entries(cache)) == 1
+
+    cached = json.load(path, cache=cache)
+    assert cached["name"] == "mesh"
+    assert cached["values"].dtype == np.float32
+    np.testing.assert_array_equal(cached["values"], res["values"])
+    assert len(entries(cache)) == 1
+
+    # Writing to the array doesn't change the cache.
+    cached["values"][0, 0] = 100
+    assert json.load(path, cache=cache)["values"][0, 0] == 0
+
+
+def test_load_with_cache_keys_on_options(tmpdir: py.path.local) -> None:
+    path = str(tmpdir.join("example.json"))
+    write_document(path)
+    cache = DiskCache(str(tmpdir.join("cache")))
+
+    json.load(path, cache=cache)
+    json.load(path, cache=cache, direct_ndarrays=True, backend="json")
+    assert len(entries(cache)) == 1
+
+    res = json.load(path, cache=cache, decoder=None)
+    assert isinstance(res["values"], dict)
+    assert len(entries(cache)) == 2
+    assert isinstance(json.load(path, cache=cache, decoder=None)["values"], dict)
+
+
+def test_load_with_cache_keys_on_decoder_configuration(tmpdir: py.path.local) -> None:
+    from missouri.coding import JSONDecoder
+
+    path = str(tmpdir.join("example.json"))
+    json.dump([{"x": i, "y": i / 2} for i in range(20)], path, columnar=True)
+    cache = DiskCache(str(tmpdir.join("cache")))
+
+    assert "__columns__" in json.load(path, cache=cache)
+    records = json.load(path, cache=cache, decoder=JSONDecoder(columns_as="records"))
+    assert records[1] == {"x": 1, "y": 0.5}
+    columns = json.load(path, cache=cache, decoder=JSONDecoder(columns_as="columns"))
+    assert list(columns) == ["x", "y"]
+    assert len(entries(cache)) == 3
+
+    # The same configuration as an option or a decoder shares an entry.
+    assert json.load(path, cache=cache, columns_as="records") == records
+    assert len(entries(cache)) == 3
+
+    decoder = JSONDecoder(columns_as="records")
+    decoder.register_key("__columns__", lambda obj: sorted(obj["__columns__"]))
+    assert json.load(path, cache=cache, decoder=decoder) == ["x", "y"]
+    assert len(entries(cache)) == 4
+
+    class NamedDecoder(JSONDecoder):
+        pass
+
+    res = json.load(path, cache=cache, decoder=NamedDecoder(columns_as="records"))
+    assert res == records
+    assert len(entries(cache)) == 5
+
+
+def test_load_with_cache_misses_when_file_changes(tmpdir: py.path.local) -> None:
+    path = str(tmpdir.join("example.json"))
+    json.dump({"version": 1}, path)
+    cache = DiskCache(str(tmpdir.join("cache")))
+
+    assert json.load(path, cache=cache) == {"version": 1}
+    json.dump({"version": 22}, path)
+    assert json.load(path, cache=cache) == {"version": 22}
+    assert len(entries(cache)) == 2
+
+
+def test_load_with_cache_validating_content(tmpdir: py.path.local) -> None:
+    path = str(tmpdir.join("example.json"))
+    json.dump({"version": 1}, path)
+    cache = DiskCache(str(tmpdir.join("cache")), validate="content")
+
+    assert json.load(path, cache=cache) == {"version": 1}
+    # Touching the file doesn't miss the cache.
+    os.utime(path, ns=(0, 0))
+    assert json.load(path, cache=cache) == {"version": 1}
+    assert len(entries(cache)) == 1
+
+    json.dump({"version": 2}, path)
+    assert json.load(path, cache=cache) == {"version": 2}
+    assert len(entries(cache)) == 2
+
+
+def rewrite_sidecar_only(path: str, values: np.ndarray) -> None:
+    """
+    Write `values` to the sidecar of the document at `path`, which is
+    rewritten with the same text and modification time.
+    """
+    stat = os.stat(path)
+    json.dump({"values": values}, path, sidecar_threshold=0)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.utime(sidecar_path(path), ns=(stat.st_mtime_ns + 1, stat.st_mtime_ns + 1))
+
+
+@pytest.mark.parametrize("validate", ["stat", "content"])
+def test_load_with_cache_misses_when_sidecar_changes(
+    tmpdir: py.path.local, validate: Validate
+) -> None:
+    path = str(tmpdir.join("example.json"))
+    json.dump({"values": np.arange(4.0)}, path, sidecar_threshold=0)
+    cache = DiskCache(str(tmpdir.join("cache")), validate=validate)
+
+    np.testing.assert_array_equal(
+        json.load(path, cache=cache)["values"], np.arange(4.0)
+    )
+    with open(path) as f:
+        text = f.read()
+    rewrite_sidecar_only(path, np.full(4, 7.0))
+    with open(path) as f:
+        assert f.read() == text
+    np.testing.assert_array_equal(
+        json.load(path, cache=cache)["values"], np.full(4, 7.0)
+    )
+    assert len(entries(cache)) == 2
+
+
+def test_load_with_cache_requires_path(tmpdir: py.path.local) -> None:
+    cache = DiskCache(str(tmpdir.join("cache")))
+    with pytest.raises(
+        ValueError, match=r"^cache is only supported when loading a path$"
+    ):
+        json.load(io.StringIO("{}"), cache=cache)
+
+
+def test_disk_cache_invalid_validate(tmpdir: py.path.local) -> None:
+    with pytest.raises(
+        ValueError, match=r"^Unknown validate 'mtime'; expected stat or content$"
+    ):
+        DiskCache(str(tmpdir), validate="mtime")  # type: ignore[arg-type]
+
+
+def test_disk_cache_get_missing(tmpdir: py.path.local) -> None:
+    cache = DiskCache(str(tmpdir.join("cache")))
+    assert cache.get(str(tmpdir.join("cache", "missing.pickle"))) == (False, None)
+
+
+@pytest.mark.parametrize(
+    "contents",
+    [b"", b"short", b"not a cache entry, but long enough", b"MSRICHE1" + b"\xff" * 16],
+)
+def test_disk_cache_get_corrupt(tmpdir: py.path.local, contents: bytes) -> None:
+    cache = DiskCache(str(tmpdir))
+    entry_path = str(tmpdir.join("entry.pickle"))
+    with open(entry_path, "wb") as f:
+        f.write(contents)
+    assert cache.get(entry_path) == (False, None)
+
+
+def test_disk_cache_put_unpicklable(tmpdir: py.path.local) -> None:
+    cache = DiskCache(str(tmpdir.join("cache")))
+    entry_path = cache.entry_path(__file__, "options")
+    cache.put(entry_path, {"lock": threading.Lock()})
+    assert not os.path.exists(entry_path)
+    assert cache.get(entry_path) == (False, None)
+
+
+def test_disk_cache_aligns_buffers(tmpdir: py.path.local) -> None:
+    cache = DiskCache(str(tmpdir.join("cache")))
+    entry_path = cache.entry_path(__file__, "options")
+    cache.put(entry_path, [np.arange(3, dtype=np.int8), np.arange(5.0)])
+
+    hit, value = cache.get(entry_path)
+    assert hit
+    for array in value:
+        assert array.ctypes.data % 64 == 0
+    np.testing.assert_array_equal(value[0], [0, 1, 2])
+    np.testing.assert_array_equal(value[1], [0.0, 1.0, 2.0, 3.0, 4.0])
+
+
+def test_disk_cache_evicts_least_recently_used(tmpdir: py.path.local) -> None:
+    paths = [str(tmpdir.join(f"{i}.json")) for i in range(3)]
+    for path in paths:
+        json.dump({"values": np.zeros(1000)}, path)
+    cache = DiskCache(str(tmpdir.join("cache")))
+
+    entry_paths = [cache.entry_path(path, "options") for path in paths]
+    for i, entry_path in enumerate(entry_paths):
+        cache.put(entry_path, json.load(paths[i]))
+        os.utime(entry_path, ns=(i * 10**9, i * 10**9))
+    size = os.path.getsize(entry_paths[0])
+
+    # Using the first entry makes the second the least recently used.
+    assert cache.get(entry_paths[0])[0]
+    cache.evict(2 * size)
+    assert [os.path.exists(entry_path) for entry_path in entry_paths] == [
+        True,
+        False,
+        True,
+    ]
+
+
+def test_disk_cache_put_evicts_beyond_max_bytes(tmpdir: py.path.local) -> None:
+    path = str(tmpdir.join("example.json"))
+    write_document(path)
+    cache = DiskCache(str(tmpdir.join("cache")), max_bytes=0)
+    assert json.load(path, cache=cache)["name"] == "mesh"
+    assert entries(cache) == []
+
+
+def test_disk_cache_invalidate_and_clear(tmpdir: py.path.local) -> None:
+    first, second = str(tmpdir.join("first.json")), str(tmpdir.join("second.json"))
+    write_document(first)
+    write_document(second)
+    cache = DiskCache(str(tmpdir.join("cache")))
+    # Empty, or missing, caches are fine.
+    cache.clear()
+
+    json.load(first, cache=cache)
+    json.load(first, cache=cache, decoder=None)
+    json.load(second, cache=cache)
+    assert len(entries(cache)) == 3
+
+    cache.invalidate(first)
+    (remaining,) = entries(cache)
+    assert (
+        os.path.basename(cache.entry_path(second, "options")).split("-")[0]
+        == remaining.split("-")[0]
+    )
+
+    cache.clear()
+    assert entries(cache) == []
+
+
+def test_memory_cache(tmpdir: py.path.local) -> None:
+    path = str(tmpdir.join("example.json"))
+    write_document(path)
+    cache = MemoryCache()
+
+    res = json.load(path, cache=cache)
+    assert (cache.hits, cache.misses, len(cache)) == (0, 1, 1)
+    assert res["name"] == "mesh"
+    assert not res["values"].flags.writeable
+
+    cached = json.load(path, cache=cache)
+    assert (cache.hits, cache.misses, len(cache)) == (1, 1, 1)
+    assert cached == {"name": "mesh", "values": cached["values"]}
+    assert cached is not res
+    assert cached["values"] is res["values"]
+    with pytest.raises(ValueError, match="read-only"):
+        cached["values"][0, 0] = 100
+
+    # Callers can't change the cache.
+    cached["name"] = "changed"
+    assert json.load(path, cache=cache)["name"] == "mesh"
+
+    json.load(path, cache=cache, decoder=None)
+    assert (cache.hits, cache.misses, len(cache)) == (2, 2, 2)
+
+
+def test_memory_cache_misses_when_file_changes(tmpdir: py.path.local) -> None:
+    path = str(tmpdir.join("example.json"))
+    json.dump({"version": 1}, path)
+    cache = MemoryCache()
+
+    assert json.load(path, cache=cache) == {"version": 1}
+    json.dump({"version": 22}, path)
+    assert json.load(path, cache=cache) == {"version": 22}
+    assert json.load(path, cache=cache) == {"version": 22}
+    assert (cache.hits, cache.misses, cache.evictions, len(cache)) == (1, 2, 0, 1)
+
+
+def test_memory_cache_misses_when_sidecar_changes(tmpdir: py.path.local) -> None:
+    path = str(tmpdir.join("example.json"))
+    json.dump({"values": np.arange(4.0)}, path, sidecar_threshold=0)
+    cache = MemoryCache()
+
+    np.testing.assert_array_equal(
+        json.load(path, cache=cache)["values"], np.arange(4.0)
+    )
+    rewrite_sidecar_only(path, np.full(4, 7.0))
+    np.testing.assert_array_equal(
+        json.load(path, cache=cache)["values"], np.full(4, 7.0)
+    )
+    assert (cache.hits, cache.misses) == (0, 2)
+
+
+def test_memory_cache_evicts_beyond_max_entries(tmpdir: py.path.local) -> None:
+    paths = [str(tmpdir.join(f"{i}.json")) for i in range(3)]
+    for i, path in enumerate(paths):
+        json.dump({"index": i}, path)
+    cache = MemoryCache(max_entries=2)
+
+    json.load(paths[0], cache=cache)
+    json.load(paths[1], cache=cache)
+    # Using the first makes the second the least recently used.
+    json.load(paths[0], cache=cache)
+    json.load(paths[2], cache=cache)
+    assert (cache.evictions, len(cache)) == (1, 2)
+
+    json.load(paths[0], cache=cache)
+    assert cache.hits == 2
+    json.load(paths[1], cache=cache)
+    assert (cache.hits, cache.misses, cache.evictions) == (2, 4, 2)
+
+
+def test_memory_cache_evicts_beyond_max_bytes(tmpdir: py.path.local) -> None:
+    small, large = str(tmpdir.join("small.json")), str(tmpdir.join("large.json"))
+    json.dump({"values": np.zeros(1000)}, small)
+    json.dump({"values": np.zeros(2000)}, large)
+    cache = MemoryCache(max_bytes=20_000)
+
+    json.load(small, cache=cache)
+    assert 8000 < cache.nbytes < 10_000
+    json.load(large, cache=cache)
+    assert (cache.evictions, len(cache)) == (1, 1)
+    assert 16_000 < cache.nbytes < 18_000
+
+    # Larger than the whole cache.
+    cache = MemoryCache(max_bytes=10_000)
+    json.load(large, cache=cache)
+    json.load(large, cache=cache)
+    assert (cache.hits, cache.misses, len(cache), cache.nbytes) == (0, 2, 0, 0)
+
+
+def test_memory_cache_shared_and_nested_values(tmpdir: py.path.local) -> None:
+    values = np.arange(3.0)
+    shared = ("a", values)
+    cache = MemoryCache()
+
+    res = cache.get_or_load(__file__, "options", lambda: [shared, shared, {"b": 1}])
+    assert res == [shared, shared, {"b": 1}]
+    assert res[0] is not shared
+    assert not values.flags.writeable
+    assert cache.nbytes < 2 * values.nbytes + 1000
+
+
+def test_memory_cache_invalidate_and_clear(tmpdir: py.path.local) -> None:
+    first, second = str(tmpdir.join("first.json")), str(tmpdir.join("second.json"))
+    write_document(first)
+    write_document(second)
+    cache = MemoryCache()
+
+    json.load(first, cache=cache)
+    json.load(first, cache=cache, decoder=None)
+    json.load(second, cache=cache)
+    nbytes = cache.nbytes
+
+    cache.invalidate(first)
+    assert len(cache) == 1
+    assert 0 < cache.nbytes < nbytes
+    json.load(second, cache=cache)
+    assert cache.hits == 1
+
+    cache.clear()
+    assert (len(cache), cache.nbytes) == (0, 0)
+
+
+def test_memory_cache_from_threads(tmpdir: py.path.local) -> None:
+    paths = [str(tmpdir.join(f"{i}.json")) for i in range(4)]
+    for i, path in enumerate(paths):
+        json.dump({"index": i, "values": np.full(100, i)}, path)
+    cache = MemoryCache(max_entries=3)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(
+            executor.map(lambda i: json.load(paths[i % 4], cache=cache), range(200))
+        )
+    assert [res["index"] for res in results] == [i % 4 for i in range(200)]
+    assert cache.hits + cache.misses == 200
+    assert len(cache) == 3
+
+
+def test_cached_load(tmpdir: py.path.local) -> None:
+    path = str(tmpdir.join("example.json"))
+    write_document(path)
+    cache = default_memory_cache()
+    assert default_memory_cache() is cache
+    hits = cache.hits
+
+    assert json.cached_load(path)["name"] == "mesh"
+    assert json.cached_load(path)["name"] == "mesh"
+    assert cache.hits == hits + 1
+    cache.invalidate(path)
+
+    other = MemoryCache()
+    json.cached_load(path, cache=other)
+    assert (other.hits, other.misses) == (0, 1)
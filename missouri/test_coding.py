@@ -0,0 +1,188 @@
+import typing as t
+from missouri import json
+from missouri.coding import JSONDecoder, JSONEncoder, MethodListCaller
+import pytest
+
+
+def test_method_list_caller_calls_methods_in_order() -> None:
+    caller = MethodListCaller()
+    caller.register(lambda obj: None)
+    caller.register(lambda obj: "second")
+    caller.register(lambda obj: "first", index=0)
+    assert caller("anything") == "first"
+
+
+def test_method_list_caller_returns_default() -> None:
+    caller = MethodListCaller()
+    caller.register(lambda obj: None)
+    assert caller("anything") == "anything"
+
+
+class Point:
+    def __init__(self, x: float, y: float):
+        self.x = x
+        self.y = y
+
+
+class Point3(Point):
+    pass
+
+
+def test_json_encoder_register_type() -> None:
+    encoder = JSONEncoder()
+    encoder.register_type(Point, lambda obj: {"x": obj.x, "y": obj.y})
+
+    assert json.dumps(
+        [Point(1.0, 2.0), Point3(3.0, 4.0)], encoder=encoder
+    ) == json.dumps([{"x": 1.0, "y": 2.0}, {"x": 3.0, "y": 4.0}])
+
+
+def test_json_encoder_register_type_invalidates_cached_lookups() -> None:
+    encoder = JSONEncoder()
+    encoder.register_type(Point, lambda obj: "point")
+    assert encoder(Point3(1.0, 2.0)) == "point"
+
+    encoder.register_type(Point3, lambda obj: "point3")
+    assert encoder(Point3(1.0, 2.0)) == "point3"
+    assert encoder(Point(1.0, 2.0)) == "point"
+
+
+def test_json_encoder_encode_takes_priority_over_register_type() -> None:
+    class MyEncoder(JSONEncoder):
+        def __init__(self) -> None:
+            super().__init__()
+            self.register_type(Point, lambda obj: "registered")
+
+        def encode(self, obj: t.Any) -> t.Any:
+            return "encode" if isinstance(obj, Point) else None
+
+    assert MyEncoder()(Point(1.0, 2.0)) == "encode"
+
+
+def test_json_encoder_calls_for_json() -> None:
+    class WithForJson(Point):
+        def for_json(self) -> str:
+            return "for_json"
+
+    encoder = JSONEncoder()
+    encoder.register_type(Point, lambda obj: "point")
+    assert encoder(WithForJson(1.0, 2.0)) == "for_json"
+
+
+def test_json_encoder_base_encode_returns_none() -> None:
+    assert JSONEncoder().encode(Point(1.0, 2.0)) is None
+
+
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+def test_json_encoder_register_type_without_calling_super() -> None:
+    class MyEncoder(JSONEncoder):
+        def __init__(self) -> None:
+            self.register_type(Point, lambda obj: "point")
+            self.encode_as_primitives = False
+            self.ndarray_encoding = "list"
+
+    encoder = MyEncoder()
+    assert encoder(Point(1.0, 2.0)) == "point"
+    with pytest.raises(ValueError, match=r"is not JSON-serializable"):
+        encoder(complex(1, 3))
+
+
+def test_json_decoder_register_key() -> None:
+    decoder = JSONDecoder()
+    decoder.register_key("__point__", lambda obj: Point(*obj["__point__"]))
+
+    res = json.loads('[{"__point__": [1.0, 2.0]}, {"x": 1}]', decoder=decoder)
+    assert isinstance(res[0], Point)
+    assert res[1] == {"x": 1}
+
+
+def test_json_decoder_register_key_falls_through_when_method_returns_none() -> None:
+    decoder = JSONDecoder()
+    decoder.register_key("__point__", lambda obj: None)
+    decoder.register_key("__other__", lambda obj: "other")
+
+    assert decoder({"__point__": 1, "__other__": 2}) == "other"
+    assert decoder({"__point__": 1}) == {"__point__": 1}
+
+
+def test_json_decoder_base_decode_returns_none() -> None:
+    assert JSONDecoder().decode({"foo": "bar"}) is None
+
+
+def test_json_decoder_register_key_without_calling_super() -> None:
+    class MyDecoder(JSONDecoder):
+        def __init__(self) -> None:
+            self.register_key("__point__", lambda obj: "point")
+
+    assert MyDecoder()({"__point__": 1}) == "point"
+
+
+def test_json_encoder_encode_numpy_keeps_its_place_in_method_list() -> None:
+    import numpy as np
+
+    class AppendingEncoder(JSONEncoder):
+        def __init__(self) -> None:
+            super().__init__()
+            self.register(lambda obj: "appended")
+
+    class PrependingEncoder(JSONEncoder):
+        def __init__(self) -> None:
+            super().__init__()
+            self.register(lambda obj: "prepended", 0)
+
+    class ClearingEncoder(JSONEncoder):
+        def __init__(self) -> None:
+            super().__init__()
+            self.clear()
+            self.register(lambda obj: "only" if isinstance(obj, Point) else None)
+
+    array = np.arange(2)
+    assert AppendingEncoder()(array) == {
+        "__ndarray__": [0, 1],
+        "dtype": "int64",
+        "shape": (2,),
+    }
+    assert AppendingEncoder()(Point(1.0, 2.0)) == "appended"
+    assert PrependingEncoder()(array) == "prepended"
+    assert ClearingEncoder()(Point(1.0, 2.0)) == "only"
+    with pytest.raises(ValueError, match=r"is not JSON-serializable"):
+        ClearingEncoder()(array)
+
+
+def test_coder_copy_binds_its_own_methods_to_the_copy() -> None:
+    class MyEncoder(JSONEncoder):
+        def __init__(self) -> None:
+            super().__init__()
+            self.name = "original"
+            self.register(self.encode_name)
+            self.register_type(Point3, self.encode_point)
+
+        def encode_name(self, obj: t.Any) -> t.Any:
+            return self.name if isinstance(obj, Point) and obj.x == 0 else None
+
+        def encode_point(self, obj: Point) -> t.Any:
+            return [self.name, obj.x]
+
+    class MyDecoder(JSONDecoder):
+        def __init__(self) -> None:
+            super().__init__()
+            self.name = "original"
+            self.register_key("__name__", self.decode_name)
+
+        def decode_name(self, obj: t.Any) -> t.Any:
+            return self.name
+
+    encoder = MyEncoder()
+    assert encoder(Point3(1.0, 2.0)) == ["original", 1.0]
+    encoder_copy = encoder.copy()
+    encoder_copy.name = "copy"
+    assert encoder_copy(Point(0.0, 2.0)) == "copy"
+    assert encoder_copy(Point3(1.0, 2.0)) == ["copy", 1.0]
+    assert encoder(Point(0.0, 2.0)) == "original"
+    assert encoder(Point3(1.0, 2.0)) == ["original", 1.0]
+
+    decoder = MyDecoder()
+    decoder_copy = decoder.copy()
+    decoder_copy.name = "copy"
+    assert decoder_copy({"__name__": 1}) == "copy"
+    assert decoder({"__name__": 1}) == "original"
@@ -0,0 +1,145 @@
+import typing as t
+from missouri import json
+from missouri.coding import JSONDecoder
+from missouri.columnlib import Columns, columnize, decode_columns, to_columns
+import numpy as np
+import py
+import pytest
+
+ROWS = [
+    {"x": i / 4, "id": i, "ok": i % 2 == 0, "label": f"p{i}", "tags": [i] * (i % 3)}
+    for i in range(20)
+]
+
+
+def test_to_columns() -> None:
+    columns = to_columns(ROWS)
+    assert columns is not None
+    assert list(columns) == ["x", "id", "ok", "label", "tags"]
+    for key, dtype in [("x", np.float64), ("id", np.int64), ("ok", np.bool_)]:
+        assert isinstance(columns[key], np.ndarray)
+        assert columns[key].dtype == dtype
+        assert columns[key].tolist() == [row[key] for row in ROWS]
+    assert columns["label"] == [row["label"] for row in ROWS]
+    assert columns["tags"] == [row["tags"] for row in ROWS]
+
+    assert to_columns([]) == {}
+    assert to_columns([{"a": np.float32(1)}])["a"].dtype == np.float32  # type: ignore[index]
+    # Columns which can't be arrays without changing their values are lists.
+    assert to_columns([{"a": 1}, {"a": 2.5}]) == {"a": [1, 2.5]}
+    assert to_columns([{"a": 1}, {"a": 2**64}]) == {"a": [1, 2**64]}
+    assert to_columns([{"a": None}]) == {"a": [None]}
+
+
+@pytest.mark.parametrize(
+    "rows",
+    [
+        [{}],
+        [1, 2],
+        [{"a": 1}, {"b": 1}],
+        [{"a": 1}, {"a": 1, "b": 2}],
+        [{"a": 1}, [1]],
+        [{"__ndarray__": 1}],
+        [{1: 1}],
+    ],
+)
+def test_to_columns_other_lists(rows: t.List[t.Any]) -> None:
+    assert to_columns(rows) is None
+    with pytest.raises(ValueError, match="^Columns must wrap a list of dicts"):
+        Columns(rows).encode()
+
+
+def test_columnize() -> None:
+    few = ROWS[:3]
+    document = {"rows": ROWS, "nested": [(ROWS, 1)], "few": few, "other": [1, "a"]}
+
+    res = columnize(document)
+    assert list(res["rows"]["__columns__"]) == list(ROWS[0])
+    assert list(res["nested"][0][0]) == ["__columns__"]
+    assert type(res["nested"][0]) is tuple
+    # Containers which hold no lists to write by column aren't copied.
+    assert res["few"] is few
+    assert res["other"] is document["other"]
+    assert columnize(document["other"]) is document["other"]
+
+    assert list(columnize(few, min_rows=3)) == ["__columns__"]
+
+
+@pytest.mark.parametrize("backend", ["simplejson", "json", "orjson"])
+@pytest.mark.parametrize("ndarray_encoding", ["list", "base64"])
+def test_round_trip(backend: str, ndarray_encoding: t.Any) -> None:
+    if backend == "orjson":
+        pytest.importorskip("orjson")
+    document = {"rows": ROWS, "few": ROWS[:3]}
+    data = json.dumps_bytes(
+        document, columnar=True, ndarray_encoding=ndarray_encoding, backend=backend
+    )
+    # The short list is written as it is.
+    assert data.count(b"__columns__") == 1
+    assert data.count(b'"id"') == 4
+    assert json.load_bytes(data, backend=backend, columns_as="records") == document
+
+
+def test_decode_structured() -> None:
+    data = json.dumps_bytes(ROWS, columnar=True)
+
+    res = json.load_bytes(data, columns_as="structured")
+    assert res.dtype.names == ("x", "id", "ok", "label", "tags")
+    assert res["x"].tolist() == [row["x"] for row in ROWS]
+    assert res["id"].dtype == np.int64
+    assert res["label"].dtype == np.dtype("<U3")
+    assert res["tags"].dtype == object
+    assert res["tags"][4] == [4]
+    assert res[1]["label"] == "p1"
+
+    grid = {"__columns__": {"a": np.arange(6).reshape(3, 2), "b": [1.0, None, 2]}}
+    res = decode_columns(grid, "structured")
+    assert res["a"].tolist() == [[0, 1], [2, 3], [4, 5]]
+    assert res["b"].tolist() == [1.0, None, 2]
+    assert decode_columns({"__columns__": {}}, "structured").shape == (0,)
+
+
+def test_decode_columns() -> None:
+    data = json.dumps_bytes(ROWS, columnar=True, ndarray_encoding="base64")
+
+    res = json.load_bytes(data, columns_as="columns")
+    assert list(res) == list(ROWS[0])
+    assert all(isinstance(column, np.ndarray) for column in res.values())
+    assert res["ok"].tolist() == [row["ok"] for row in ROWS]
+    assert res["label"].tolist() == [row["label"] for row in ROWS]
+
+    assert decode_columns({"__columns__": {}}) == []
+    assert decode_columns({"__columns__": {"a": []}}, "columns")["a"].dtype == object
+
+
+def test_explicit_columns() -> None:
+    few = ROWS[:2]
+    data = json.dumps_bytes({"few": Columns(few), "other": few})
+    assert data.count(b"__columns__") == 1
+    assert json.load_bytes(data, columns_as="records") == {"few": few, "other": few}
+    assert json.load_bytes(json.dumps_bytes(Columns([])), columns_as="records") == []
+
+
+def test_decode_other_objects() -> None:
+    for obj in [
+        {"__columns__": {}, "b": 1},
+        {"__columns__": [1]},
+        {"__columns__": {"a": [1], "b": [1, 2]}},
+    ]:
+        assert json.loads(json.dumps(obj)) == obj
+        with pytest.raises(ValueError, match="^Columns must "):
+            json.loads(json.dumps(obj), columns_as="records")
+    with pytest.raises(ValueError, match="^Columns must be arrays or lists$"):
+        json.loads('{"__columns__": {"a": 1}}', columns_as="records")
+    with pytest.raises(ValueError, match="^Columns must all have the same length$"):
+        json.loads('{"__columns__": {"a": [1], "b": [1, 2]}}', columns_as="records")
+    with pytest.raises(ValueError, match="^Unknown columns_as 'rows'; expected"):
+        JSONDecoder(columns_as="rows")  # type: ignore[arg-type]
+
+
+def test_columnar_files(tmpdir: py.path.local) -> None:
+    path = str(tmpdir.join("rows.json"))
+    json.dump({"rows": ROWS}, path, columnar=True, sidecar_threshold=0)
+    assert tmpdir.join("rows.arrays").check()
+    assert json.load(path, columns_as="records") == {"rows": ROWS}
+    assert json.load_lazy(path, columns_as="records")["rows"][3] == ROWS[3]
@@ -0,0 +1,76 @@
+import typing as t
+from missouri.dedupelib import SharedObject, dedupe
+import pytest
+
+
+def test_dedupe_without_shared_objects_returns_document() -> None:
+    document = {"a": [1, 2], "b": [1, 2], "c": {}, "d": {}, "e": "x"}
+    document["f"] = document["c"]
+    assert dedupe(document) is document
+
+
+def test_dedupe() -> None:
+    template = {"color": "red"}
+    points = [1.0, 2.0]
+    inner = [template, points]
+    document: t.Dict[str, t.Any] = {
+        "a": template,
+        "b": [template, (points, points)],
+        "c": {"d": inner, "e": inner},
+        "f": {"g": [1]},
+    }
+
+    res = dedupe(document)
+    assert document["a"] is template
+    assert res["a"] is res["b"][0]
+    assert isinstance(res["a"], SharedObject)
+    assert res["a"].value is template
+    assert res["b"][1] == (res["b"][1][0], res["b"][1][0])
+    assert isinstance(res["b"][1][0], SharedObject)
+    assert res["b"][1][0].value is points
+    assert res["c"]["d"] is res["c"]["e"]
+    assert res["c"]["d"].value == [res["a"], res["b"][1][0]]
+    # Containers which hold nothing shared aren't copied.
+    assert res["f"] is document["f"]
+    assert sorted(
+        shared.index for shared in [res["a"], res["b"][1][0], res["c"]["d"]]
+    ) == [0, 1, 2]
+
+
+def test_shared_object_encode() -> None:
+    shared = SharedObject(3, [1])
+    assert shared.encode() == {"__shared__": 3, "value": [1]}
+    assert shared.encode() == {"__ref__": 3}
+
+
+@pytest.mark.parametrize("by", ["identity", "content"])
+def test_dedupe_arrays(by: t.Any) -> None:
+    import numpy as np
+
+    array = np.arange(6).reshape(2, 3)
+    document = {
+        "a": array,
+        "b": array,
+        "c": array.copy(),
+        "d": array.astype(np.float64),
+        "e": array.reshape(3, 2),
+        "f": np.zeros(0),
+        "g": np.zeros(0),
+        "h": np.array([None]),
+        "i": np.array([None]),
+    }
+
+    res = dedupe(document, by)
+    assert isinstance(res["a"], SharedObject)
+    assert res["a"] is res["b"]
+    assert (res["c"] is res["a"]) is (by == "content")
+    for key in ["d", "e", "f", "g", "h", "i"]:
+        assert res[key] is document[key]
+
+
+def test_dedupe_circular_reference_raises_expected_error() -> None:
+    document: t.List[t.Any] = [1]
+    document.append({"a": document})
+
+    with pytest.raises(ValueError, match=r"Circular reference detected"):
+        dedupe(document)
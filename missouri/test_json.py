@@ -145,6 +145,238 @@ def test_json_dump_ndarray_tricks_as_primitives() -> None:
     )
 
 
+def test_json_dump_ndarray_base64() -> None:
+    import numpy as np
+
+    assert (
+        json.dumps(
+            {
+                "foo": np.array(
+                    [[859.0, 859.0], [217.0, 106.0], [302.0, 140.0]],
+                    dtype=np.float32,
+                )
+            },
+            ndarray_encoding="base64",
+        )
+        == r'{"foo": {"__ndarray__": "AMBWRADAVkQAAFlDAADUQgAAl0MAAAxD", "dtype": "<f4", "shape": [3, 2], "encoding": "base64"}}'  # noqa: E501
+    )
+
+
+def test_json_dump_ndarray_base64_object_dtype_falls_back_to_list() -> None:
+    import numpy as np
+
+    assert (
+        json.dumps(np.array(["a", 1], dtype=object), ndarray_encoding="base64")
+        == r'{"__ndarray__": ["a", 1], "dtype": "object", "shape": [2]}'
+    )
+
+
+def test_json_load_ndarray_base64() -> None:
+    import numpy as np
+
+    res_array = json.loads(
+        '{"__ndarray__": "AMBWRADAVkQAAFlDAADUQgAAl0MAAAxD", "dtype": "<f4", "shape": [3, 2], "encoding": "base64"}'  # noqa: E501
+    )
+    assert isinstance(res_array, np.ndarray)
+    assert res_array.shape == (3, 2)
+    assert res_array.dtype == np.float32
+    assert res_array.flags.writeable
+    np.testing.assert_equal(
+        res_array, np.array([[859.0, 859.0], [217.0, 106.0], [302.0, 140.0]])
+    )
+
+
+@pytest.mark.parametrize("dtype", ["float32", ">f8", "<i8", ">u2", "bool", "complex64"])
+@pytest.mark.parametrize("shape", [(), (0,), (0, 3), (5,), (4, 3), (2, 3, 2)])
+def test_json_round_trip_ndarray_base64(dtype: str, shape: t.Tuple[int]) -> None:
+    import numpy as np
+
+    original = np.asarray(
+        np.arange(int(np.prod(shape)), dtype=np.float64).reshape(shape) % 3
+    ).astype(dtype)
+
+    res_array = json.loads(json.dumps(original, ndarray_encoding="base64"))
+    assert res_array.shape == original.shape
+    assert res_array.dtype.newbyteorder("=") == original.dtype.newbyteorder("=")
+    np.testing.assert_equal(res_array, original)
+
+
+def test_json_round_trip_non_contiguous_ndarray_base64() -> None:
+    import numpy as np
+
+    original = np.arange(12, dtype=np.int32).reshape(3, 4).T[::2]
+    res_array = json.loads(json.dumps(original, ndarray_encoding="base64"))
+    np.testing.assert_equal(res_array, original)
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float64", "int64", "uint8", "bool"])
+@pytest.mark.parametrize(
+    "shape", [(), (0,), (0, 3), (3, 0), (5,), (4, 3), (2, 3, 2), (2, 0, 3)]
+)
+def test_json_round_trip_ndarray_list(dtype: str, shape: t.Tuple[int]) -> None:
+    import numpy as np
+
+    original = np.asarray(
+        np.arange(int(np.prod(shape)), dtype=np.float64).reshape(shape) % 3
+    ).astype(dtype)
+
+    res_array = json.loads(json.dumps(original))
+    assert isinstance(res_array, np.ndarray)
+    assert res_array.shape == original.shape
+    assert res_array.dtype == original.dtype
+    np.testing.assert_equal(res_array, original)
+
+
+def test_json_load_ndarray_list_object_dtype() -> None:
+    res_array = json.loads('{"__ndarray__": ["a", 1], "dtype": "object", "shape": [2]}')
+    assert res_array.dtype == object
+    assert res_array.tolist() == ["a", 1]
+
+
+def test_json_load_ndarray_list_without_shape() -> None:
+    import numpy as np
+
+    res_array = json.loads('{"__ndarray__": [[1, 2], [3, 4]]}')
+    assert res_array.dtype == np.float64
+    np.testing.assert_equal(res_array, [[1.0, 2.0], [3.0, 4.0]])
+
+
+@pytest.mark.parametrize("backend", ["simplejson", "json"])
+def test_json_load_direct_ndarrays(tmpdir: py.path.local, backend: str) -> None:
+    import numpy as np
+    from missouri.coding import JSONDecoder
+
+    class DoublingDecoder(JSONDecoder):
+        def decode(self, obj: t.Any) -> t.Any:
+            return obj["__double__"] * 2 if "__double__" in obj else None
+
+    original = {
+        "vertices": np.random.default_rng(0).random((100, 3)).astype(np.float32),
+        "faces": np.arange(30, dtype=np.uint32).reshape(10, 3),
+        "flags": np.array([True, False]),
+        "labels": np.array(["a", "b"], dtype=object),
+    }
+    path = str(tmpdir / "test_json_load_direct_ndarrays.json")
+    json.dump({**original, "doubled": {"__double__": 2}}, path)
+
+    for res in [
+        json.load(path, direct_ndarrays=True, backend=backend),
+        json.loads(json.dumps(original), direct_ndarrays=True, backend=backend),
+        json.load_bytes(path, direct_ndarrays=True, backend=backend),
+        json.load(
+            path, direct_ndarrays=True, backend=backend, decoder=DoublingDecoder()
+        ),
+    ]:
+        for key in original:
+            assert res[key].dtype == original[key].dtype
+            np.testing.assert_array_equal(res[key], original[key])
+    assert res["doubled"] == 4
+
+
+def test_json_load_direct_ndarrays_orjson(tmpdir: py.path.local) -> None:
+    import numpy as np
+
+    pytest.importorskip("orjson")
+    original = np.arange(12, dtype=np.float64).reshape(4, 3)
+    path = str(tmpdir / "test_json_load_direct_ndarrays_orjson.json")
+    json.dump({"a": original}, path)
+    res = json.load_bytes(path, direct_ndarrays=True, backend="orjson")
+    np.testing.assert_array_equal(res["a"], original)
+
+
+@pytest.mark.parametrize("backend", ["simplejson", "json"])
+@pytest.mark.parametrize("with_array", [True, False])
+def test_json_load_direct_ndarrays_reports_errors_at_original_position(
+    backend: str, with_array: bool
+) -> None:
+    import numpy as np
+
+    text = '{"b": [1, 2}'
+    if with_array:
+        text = json.dumps({"a": np.arange(100)})[:-1] + ", " + text[1:]
+    with pytest.raises(ValueError) as expected:
+        json.loads(text, backend=backend)
+    with pytest.raises(ValueError) as actual:
+        json.loads(text, direct_ndarrays=True, backend=backend)
+    assert str(actual.value) == str(expected.value)
+    assert f"(char {len(text) - 1})" in str(actual.value)
+
+
+def test_json_load_direct_ndarrays_without_json_decoder_raises_expected_error() -> None:
+    with pytest.raises(
+        ValueError, match=r"direct_ndarrays requires a missouri.coding.JSONDecoder"
+    ):
+        json.loads("[]", direct_ndarrays=True, decoder=None)
+
+
+def test_json_load_direct_ndarrays_with_shared_decoder_in_nested_calls() -> None:
+    import numpy as np
+    from missouri.coding import JSONDecoder
+
+    inner = json.dumps(np.arange(3))
+
+    class NestedDecoder(JSONDecoder):
+        def __init__(self) -> None:
+            super().__init__()
+            self.register_key("__nested__", self.decode_nested)
+
+        def decode_nested(self, obj: t.Any) -> t.Any:
+            # Load another document while decoding this one, like another
+            # thread sharing the decoder would.
+            return json.loads(inner, direct_ndarrays=True, decoder=self)
+
+    res = json.loads(
+        json.dumps({"nested": {"__nested__": 1}, "array": np.arange(5.0)}),
+        direct_ndarrays=True,
+        decoder=NestedDecoder(),
+    )
+    np.testing.assert_array_equal(res["nested"], np.arange(3))
+    np.testing.assert_array_equal(res["array"], np.arange(5.0))
+
+
+@pytest.mark.parametrize(
+    "obj",
+    [
+        {"__ref__": 1},
+        {"__shared__": 0, "value": 1},
+        {"__record__": "x:Y", "a": 1},
+        {"__record__": 5},
+        {"__enum__": "enum:Enum"},
+        {"__ndarray_parsed__": 0},
+        {"__ndarray_ref__": "a#0"},
+        {"__columns__": {"a": [1, 2], "b": [3, 4]}},
+    ],
+)
+def test_json_load_marker_keys_are_only_decoded_when_enabled(obj: t.Any) -> None:
+    text = json.dumps({"obj": obj})
+    assert json.loads(text) == {"obj": obj}
+    assert json.loads(text, direct_ndarrays=True) == {"obj": obj}
+
+
+@pytest.mark.parametrize(
+    "data,dtype,shape",
+    [
+        ("[[1, 2], [3]]", "float32", [2, 2]),
+        ("[[1, 2], [3, 4], [5, 6]]", "float32", [2, 2]),
+        ("[1, 2, 3, 4]", "float32", [2, 2]),
+        ("[[1, [2]], [3, 4]]", "float32", [2, 2]),
+        ("[[1, 2], 3]", "float32", [2, 2]),
+        ('[[1, 2], {"a": 1, "b": 2}]', "float32", [2, 2]),
+        ("5", "float32", [2, 2]),
+        ("[[[1], [2]], [[3], [4, 5]]]", "float32", [2, 2, 1]),
+        ("[1, 2]", "float32", []),
+        ("[1, [2]]", "float32", []),
+        ("[[1, 2], [3, 4]]", "float32", [4]),
+        ('[["a", 1], ["b"]]', "object", [2, 2]),
+    ],
+)
+def test_json_load_ndarray_list_with_wrong_shape_raises_expected_error(
+    data: str, dtype: str, shape: t.List[int]
+) -> None:
+    with pytest.raises(ValueError, match=r"Array data doesn't match its shape"):
+        json.loads(f'{{"__ndarray__": {data}, "dtype": "{dtype}", "shape": {shape}}}')
+
+
 @pytest.mark.filterwarnings("ignore::DeprecationWarning")
 def test_json_dump_np_scalars() -> None:
     import numpy as np
@@ -161,6 +393,218 @@ def test_json_dump_np_scalars() -> None:
     assert json.dumps(np.short(3)) == "3"
 
 
+@pytest.mark.parametrize("backend", ["simplejson", "json", "orjson"])
+def test_json_dumps_precision(backend: str) -> None:
+    import numpy as np
+    from missouri.coding import JSONEncoder
+
+    if backend == "orjson":
+        pytest.importorskip("orjson")
+
+    class Point:
+        def __init__(self, x: float):
+            self.x = x
+
+    class PointEncoder(JSONEncoder):
+        def encode(self, obj: t.Any) -> t.Any:
+            return {"x": obj.x} if isinstance(obj, Point) else None
+
+    document = {
+        "float": 0.123456,
+        "tuple": (1.987654, "a", 2),
+        "np_float64": np.float64(0.123456),
+        "np_float32": np.float32(0.123456),
+        "array": np.array([[0.123456, 1.5], [2.0, -3.333333]], dtype=np.float32),
+        "ints": np.array([1, 2]),
+        "point": Point(0.123456),
+    }
+    assert json.loads(
+        json.dumps(document, encoder=PointEncoder(precision=2), backend=backend),
+        decoder=None,
+    ) == {
+        "float": 0.12,
+        "tuple": [1.99, "a", 2],
+        "np_float64": 0.12,
+        "np_float32": 0.12,
+        "array": {
+            "__ndarray__": [[0.12, 1.5], [2.0, -3.33]],
+            "dtype": "float32",
+            "shape": [2, 2],
+        },
+        "ints": {"__ndarray__": [1, 2], "dtype": "int64", "shape": [2]},
+        "point": {"x": 0.12},
+    }
+
+    text = json.dumps(
+        {"float": 0.123456, "array": document["array"]},
+        significant_digits=3,
+        backend=backend,
+    )
+    assert "0.123," in text
+    assert "-3.33]" in text
+    assert '"dtype": "float32"' in text.replace('":"', '": "')
+
+
+def test_json_dump_precision_base64_and_primitives(tmpdir: py.path.local) -> None:
+    import numpy as np
+
+    array = np.array([0.123456, 2.5], dtype=np.float32)
+    res = json.loads(json.dumps(array, precision=1, ndarray_encoding="base64"))
+    assert res.dtype == np.float32
+    np.testing.assert_array_equal(res, np.array([0.1, 2.5], dtype=np.float32))
+
+    assert json.dumps(array, precision=1, encode_as_primitives=True) == "[0.1, 2.5]"
+
+    path = str(tmpdir / "test_json_dump_precision_sidecar.json")
+    json.dump({"a": array}, path, precision=1, sidecar_threshold=0)
+    np.testing.assert_array_equal(
+        json.load(path)["a"], np.array([0.1, 2.5], dtype=np.float32)
+    )
+
+    json.dump_bytes({"a": 0.123456}, path, precision=3)
+    assert json.load_bytes(path) == {"a": 0.123}
+    assert json.dumps_bytes({"a": 0.123456}, precision=3) == b'{"a": 0.123}'
+
+
+def test_json_dump_precision_and_significant_digits_raises_expected_error() -> None:
+    with pytest.raises(
+        ValueError, match=r"Pass either precision or significant_digits"
+    ):
+        json.dumps(1.0, precision=1, significant_digits=1)
+
+
+@pytest.mark.parametrize("backend", ["simplejson", "json", "orjson"])
+@pytest.mark.parametrize("sort_keys", [False, True])
+def test_json_round_trip_dedupe(backend: str, sort_keys: bool) -> None:
+    import numpy as np
+
+    if backend == "orjson":
+        pytest.importorskip("orjson")
+
+    topology = np.arange(12, dtype=np.int32).reshape(4, 3)
+    template = {"color": "red", "faces": topology}
+    document = {
+        "template": template,
+        "meshes": [template, {"faces": topology}, template],
+        "copy": topology.copy(),
+    }
+
+    text = json.dumps(document, dedupe="identity", sort_keys=sort_keys, backend=backend)
+    assert text.count("__ndarray__") == 2
+    res = json.loads(text, backend=backend, dedupe=True)
+    assert res["meshes"][0] is res["template"]
+    assert res["meshes"][2] is res["template"]
+    assert res["meshes"][1]["faces"] is res["template"]["faces"]
+    np.testing.assert_array_equal(res["template"]["faces"], topology)
+    assert res["copy"] is not res["template"]["faces"]
+
+    text = json.dumps(document, dedupe="content", sort_keys=sort_keys, backend=backend)
+    assert text.count("__ndarray__") == 1
+    res = json.loads(text, backend=backend, dedupe=True)
+    assert res["copy"] is res["template"]["faces"]
+
+
+def test_json_dump_dedupe_and_precision(tmpdir: py.path.local) -> None:
+    values = [0.123456, 1.987654]
+    path = str(tmpdir / "test_json_dump_dedupe_and_precision.json")
+    json.dump({"a": values, "b": values}, path, dedupe="identity", precision=2)
+
+    res = json.load(path, dedupe=True)
+    assert res == {"a": [0.12, 1.99], "b": [0.12, 1.99]}
+    assert res["a"] is res["b"]
+
+
+@pytest.mark.parametrize(
+    "obj,message",
+    [
+        ({"__ref__": 0, "x": 1}, "References to shared objects must be written as"),
+        ({"__ref__": "a"}, "References to shared objects must be written as"),
+        ({"__shared__": "a", "value": 1}, "Shared objects must be written as"),
+        ({"__shared__": 0}, "Shared objects must be written as"),
+        ({"__shared__": 0, "value": 1, "x": 2}, "Shared objects must be written as"),
+    ],
+)
+def test_json_load_invalid_shared_objects_raise_expected_error(
+    obj: t.Any, message: str
+) -> None:
+    assert json.loads(json.dumps([obj])) == [obj]
+    with pytest.raises(ValueError, match=message):
+        json.loads(json.dumps([obj]), dedupe=True)
+
+
+def test_json_load_undefined_ref_raises_expected_error() -> None:
+    with pytest.raises(ValueError, match=r"Reference to undefined shared object 1"):
+        json.loads('[{"__shared__": 0, "value": []}, {"__ref__": 1}]', dedupe=True)
+
+
+def test_json_load_dedupe_with_reused_decoder() -> None:
+    from missouri.coding import JSONDecoder
+
+    decoder = JSONDecoder(dedupe=True)
+    res = json.loads(
+        '[{"__shared__": 0, "value": [1]}, {"__ref__": 0}]', decoder=decoder
+    )
+    assert res[0] is res[1]
+    with pytest.raises(ValueError, match=r"Reference to undefined shared object 0"):
+        json.loads('{"__ref__": 0}', decoder=decoder)
+    assert decoder.shared_objects == {}
+
+
+def test_json_load_dedupe_with_shared_decoder_in_nested_calls() -> None:
+    from missouri.coding import JSONDecoder
+
+    class NestedDecoder(JSONDecoder):
+        def __init__(self) -> None:
+            super().__init__(dedupe=True)
+            self.register_key("__nested__", self.decode_nested)
+
+        def decode_nested(self, obj: t.Any) -> t.Any:
+            # Load another document while decoding this one, like another
+            # thread sharing the decoder would.
+            return json.loads(
+                '[{"__shared__": 0, "value": ["inner"]}, {"__ref__": 0}]',
+                decoder=self,
+            )
+
+    res = json.loads(
+        '[{"__shared__": 0, "value": ["outer"]}, {"__nested__": 1}, {"__ref__": 0}]',
+        decoder=NestedDecoder(),
+    )
+    assert res[0] == ["outer"] and res[2] is res[0]
+    assert res[1] == [["inner"], ["inner"]]
+
+
+def test_json_load_dedupe_with_shared_decoder_in_threads() -> None:
+    from concurrent.futures import ThreadPoolExecutor
+    from missouri.coding import JSONDecoder
+
+    decoder = JSONDecoder(dedupe=True)
+    texts = [json.dumps({"values": [[i]] * 1000}, dedupe="identity") for i in range(8)]
+    with ThreadPoolExecutor(4) as executor:
+        for _ in range(10):
+            results = list(
+                executor.map(lambda text: json.loads(text, decoder=decoder), texts)
+            )
+            for i, res in enumerate(results):
+                assert res["values"] == [[i]] * 1000
+                assert all(value is res["values"][0] for value in res["values"])
+
+
+def test_json_dump_container_subclasses_with_for_json() -> None:
+    class CustomDict(dict):
+        def for_json(self) -> str:
+            return "custom-dict"
+
+    class CustomList(list):
+        def for_json(self) -> str:
+            return "custom-list"
+
+    assert (
+        json.dumps({"a": CustomDict(b=1), "c": CustomList([2])}, sort_keys=True)
+        == '{"a": "custom-dict", "c": "custom-list"}'
+    )
+
+
 def test_json_dump_custom_encoder() -> None:
     from missouri.coding import JSONEncoder
 
@@ -258,3 +702,123 @@ def test_json_dump_raises_expected_error_with_non_file_object() -> None:
         ValueError, match=r"Object does not appear to be a path or a file-like object"
     ):
         json.dump({"some": "data"}, dict())  # type: ignore[arg-type]
+
+
+def test_json_iter_items_path_decodes_ndarrays(tmpdir: py.path.local) -> None:
+    import numpy as np
+
+    path = str(tmpdir / "test_json_iter_items_path.json")
+    frames = [
+        {"index": i, "points": np.full((2, 3), i, dtype=np.float32)} for i in range(3)
+    ]
+    json.dump({"version": 1, "frames": frames}, path)
+
+    res = list(json.iter_items(path, "frames.item", chunk_size=16))
+    assert [x["index"] for x in res] == [0, 1, 2]
+    for original, res_frame in zip(frames, res):
+        assert isinstance(res_frame["points"], np.ndarray)
+        assert res_frame["points"].dtype == np.float32
+        np.testing.assert_equal(res_frame["points"], original["points"])
+
+
+def test_json_dumps_bytes() -> None:
+    assert json.dumps_bytes(["foo", {"bar": "ሴ"}]) == b'["foo", {"bar": "\\u1234"}]'
+    assert json.dumps_bytes(["ሴ"], ensure_ascii=False) == '["ሴ"]'.encode("utf-8")
+
+
+def test_json_dump_bytes_bytesio() -> None:
+    from io import BytesIO
+
+    io = BytesIO()
+    json.dump_bytes(["streaming API"], io)
+    assert io.getvalue() == b'["streaming API"]'
+
+
+def test_json_dump_bytes_path(tmpdir: py.path.local) -> None:
+    path = str(tmpdir / "test_json_dump_bytes_path.json")
+    json.dump_bytes(["File Test"], path)
+    with open(path, "rb") as f:
+        assert f.read() == b'["File Test"]'
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        b'["caf\xc3\xa9", {"bar": [null, 1.0, 2]}]',
+        bytearray(b'["caf\xc3\xa9", {"bar": [null, 1.0, 2]}]'),
+        memoryview(b'  ["caf\xc3\xa9", {"bar": [null, 1.0, 2]}]  ')[2:-2],
+    ],
+)
+def test_json_load_bytes_buffer(source: t.Union[bytes, bytearray, memoryview]) -> None:
+    assert json.load_bytes(source) == ["café", {"bar": [None, 1.0, 2]}]
+
+
+def test_json_load_bytes_bytesio() -> None:
+    from io import BytesIO
+
+    assert json.load_bytes(BytesIO(b'["streaming API"]')) == ["streaming API"]
+
+
+def test_json_load_bytes_path(tmpdir: py.path.local) -> None:
+    path = str(tmpdir / "test_json_load_bytes_path.json")
+    with open(path, "wb") as f:
+        f.write(b'["File Test"]')
+    assert json.load_bytes(path) == ["File Test"]
+
+
+def test_json_load_bytes_mmap(tmpdir: py.path.local) -> None:
+    import mmap
+
+    path = str(tmpdir / "test_json_load_bytes_mmap.json")
+    with open(path, "wb") as f:
+        f.write(b'["File Test"]')
+    with open(path, "rb") as fp, mmap.mmap(
+        fp.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mapped:
+        assert json.load_bytes(mapped) == ["File Test"]
+
+
+def test_json_load_bytes_empty_path_raises_expected_error(
+    tmpdir: py.path.local,
+) -> None:
+    path = str(tmpdir / "test_json_load_bytes_empty_path.json")
+    open(path, "wb").close()
+    with pytest.raises(ValueError, match=r"Expecting value"):
+        json.load_bytes(path)
+
+
+def test_json_round_trip_bytes_ndarrays(tmpdir: py.path.local) -> None:
+    import numpy as np
+
+    vertices = np.arange(12, dtype=np.float32).reshape(4, 3)
+    res = json.load_bytes(json.dumps_bytes({"vertices": vertices}))
+    np.testing.assert_equal(res["vertices"], vertices)
+
+    path = str(tmpdir / "test_json_round_trip_bytes_ndarrays.json")
+    json.dump_bytes({"vertices": vertices}, path, sidecar_threshold=0)
+    res = json.load_bytes(path)
+    assert isinstance(res["vertices"].base, np.memmap)
+    np.testing.assert_equal(res["vertices"], vertices)
+
+
+def test_json_dump_bytes_raises_expected_error_with_non_file_object() -> None:
+    with pytest.raises(
+        ValueError, match=r"Object does not appear to be a path or a file-like object"
+    ):
+        json.dump_bytes({"some": "data"}, dict())  # type: ignore[arg-type]
+
+
+def test_json_import_defers_pool_and_async_modules() -> None:
+    import subprocess
+    import sys
+
+    subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, missouri.json; "
+            "assert 'concurrent.futures' not in sys.modules; "
+            "assert 'asyncio' not in sys.modules",
+        ],
+        check=True,
+    )
@@ -0,0 +1,325 @@
+import typing as t
+from missouri import jsonl
+import py
+import pytest
+
+
+def test_jsonl_dump_iter_path(tmpdir: py.path.local) -> None:
+    path = str(tmpdir / "test_jsonl_dump_iter_path.jsonl")
+    jsonl.dump_iter(({"id": i} for i in range(3)), path)
+    with open(path, "r") as f:
+        assert f.read() == '{"id": 0}\n{"id": 1}\n{"id": 2}\n'
+
+
+def test_jsonl_dump_iter_stringio() -> None:
+    from io import StringIO
+
+    io = StringIO()
+    jsonl.dump_iter([["streaming", "API"], "again"], io, separators=(",", ":"))
+    assert io.getvalue() == '["streaming","API"]\n"again"\n'
+
+
+def test_jsonl_dump_iter_indent_raises_expected_error() -> None:
+    from io import StringIO
+
+    with pytest.raises(ValueError, match=r"JSON Lines records can't be indented"):
+        jsonl.dump_iter([{"foo": 1}], StringIO(), indent=2)
+
+
+def test_jsonl_iter_load_path(tmpdir: py.path.local) -> None:
+    path = str(tmpdir / "test_jsonl_iter_load_path.jsonl")
+    with open(path, "w") as f:
+        f.write('{"id": 0}\n\n{"id": 1}\n  \n[2]')
+    assert list(jsonl.iter_load(path)) == [{"id": 0}, {"id": 1}, [2]]
+
+
+def test_jsonl_iter_load_is_lazy() -> None:
+    from io import StringIO
+
+    records = jsonl.iter_load(StringIO('{"id": 0}\n{"id": \n'))
+    assert next(records) == {"id": 0}
+    with pytest.raises(ValueError):
+        next(records)
+
+
+def test_jsonl_dedupe_resolves_references_within_each_record(
+    tmpdir: py.path.local,
+) -> None:
+    path = str(tmpdir / "test_jsonl_dedupe.jsonl")
+    values = [1, 2]
+    jsonl.dump_indexed([[values, values], [values]], path, dedupe="identity")
+    for res in [
+        list(jsonl.iter_load(path, dedupe=True)),
+        list(jsonl.iter_load_parallel(path, executor="thread", dedupe=True)),
+    ]:
+        assert res == [[[1, 2], [1, 2]], [[1, 2]]]
+        assert res[0][0] is res[0][1]
+    with jsonl.IndexedReader(path, dedupe=True) as reader:
+        first, second = reader.get_many([0, 1])
+        assert first[0] is first[1]
+
+    # Each record is a document of its own.
+    with open(path, "w") as f:
+        f.write('{"__shared__": 0, "value": [1]}\n{"__ref__": 0}\n')
+    records = jsonl.iter_load(path, dedupe=True)
+    assert next(records) == [1]
+    with pytest.raises(ValueError, match=r"Reference to undefined shared object 0"):
+        next(records)
+
+
+def test_jsonl_round_trip_ndarrays(tmpdir: py.path.local) -> None:
+    import numpy as np
+
+    path = str(tmpdir / "test_jsonl_round_trip_ndarrays.jsonl")
+    records = [
+        {"id": i, "points": np.full((2, 3), i, dtype=np.float32)} for i in range(3)
+    ]
+    jsonl.dump_iter(records, path, ndarray_encoding="base64")
+
+    for original, res in zip(records, jsonl.iter_load(path)):
+        assert res["id"] == original["id"]
+        assert res["points"].dtype == np.float32
+        np.testing.assert_equal(res["points"], original["points"])
+
+
+def test_jsonl_custom_coders(tmpdir: py.path.local) -> None:
+    from missouri.coding import JSONDecoder, JSONEncoder
+
+    class Point:
+        def __init__(self, x: float):
+            self.x = x
+
+    encoder = JSONEncoder()
+    encoder.register_type(Point, lambda obj: {"__point__": obj.x})
+    decoder = JSONDecoder()
+    decoder.register_key("__point__", lambda obj: Point(obj["__point__"]))
+
+    path = str(tmpdir / "test_jsonl_custom_coders.jsonl")
+    jsonl.dump_iter([Point(1.0), Point(2.0)], path, encoder=encoder)
+    res: t.List[Point] = list(jsonl.iter_load(path, decoder=decoder))
+    assert [x.x for x in res] == [1.0, 2.0]
+
+
+def test_jsonl_dump_iter_precision() -> None:
+    import io
+
+    f = io.StringIO()
+    jsonl.dump_iter([{"a": 0.123456}, [1.98765]], f, precision=2)
+    assert f.getvalue() == '{"a": 0.12}\n[1.99]\n'
+
+
+def test_jsonl_indexed_round_trip(tmpdir: py.path.local) -> None:
+    path = str(tmpdir / "records.jsonl")
+    records = [{"id": f"record-{i}", "values": [i] * i} for i in range(100)]
+    jsonl.dump_indexed(iter(records), path, key="id")
+    assert list(jsonl.iter_load(path)) == records
+    assert (tmpdir / "records.idx").exists()
+
+    with jsonl.IndexedReader(path) as reader:
+        assert len(reader) == 100
+        assert reader[0] == records[0]
+        assert reader[42] == records[42]
+        assert reader[-1] == records[99]
+        with pytest.raises(IndexError, match=r"^record index out of range$"):
+            reader[100]
+        with pytest.raises(IndexError):
+            reader[-101]
+
+        assert reader.get_many([7, 3, -1, 3]) == [
+            records[7],
+            records[3],
+            records[99],
+            records[3],
+        ]
+        assert reader.get_many([]) == []
+
+        assert reader.lookup("record-17") == records[17]
+        with pytest.raises(KeyError):
+            reader.lookup("record-100")
+        with pytest.raises(ValueError, match=r"^Keys must be str or int, not float$"):
+            reader.lookup(1.0)  # type: ignore[arg-type]
+
+
+@pytest.mark.parametrize("backend", ["simplejson", "orjson"])
+def test_jsonl_indexed_int_keys_and_arrays(tmpdir: py.path.local, backend: str) -> None:
+    import numpy as np
+
+    if backend == "orjson":
+        pytest.importorskip("orjson")
+    path = str(tmpdir / "arrays.jsonl")
+    records: t.List[t.Dict[str, t.Any]] = [
+        {"id": i * 10, "points": np.full((2, 3), i)} for i in range(5)
+    ]
+    jsonl.dump_indexed(records, path, key="id", sidecar_threshold=0, backend=backend)
+
+    with jsonl.IndexedReader(path, backend=backend) as reader:
+        res = reader.lookup(30)
+        np.testing.assert_array_equal(res["points"], records[3]["points"])
+        np.testing.assert_array_equal(reader[1]["points"], records[1]["points"])
+        assert [record["id"] for record in reader.get_many([4, 0])] == [40, 0]
+
+
+def test_jsonl_indexed_hash_collisions(
+    tmpdir: py.path.local, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from missouri import indexlib
+
+    monkeypatch.setattr(indexlib, "key_hash", lambda key: 0)
+    monkeypatch.setattr(jsonl, "key_hash", lambda key: 0)
+    path = str(tmpdir / "collisions.jsonl")
+    jsonl.dump_indexed([{"id": "a"}, {"id": "b"}, {"id": "b", "n": 2}], path, key="id")
+    with jsonl.IndexedReader(path) as reader:
+        assert reader.lookup("b") == {"id": "b"}
+        assert reader.lookup("a") == {"id": "a"}
+        with pytest.raises(KeyError):
+            reader.lookup("c")
+
+
+def test_jsonl_indexed_without_key(tmpdir: py.path.local) -> None:
+    path = str(tmpdir / "records.jsonl")
+    jsonl.dump_indexed([[1], [2]], path, atomic=True)
+    with jsonl.IndexedReader(path, decoder=None) as reader:
+        assert reader[1] == [2]
+        with pytest.raises(ValueError, match=r"^The index has no key field$"):
+            reader.lookup("a")
+
+    jsonl.dump_indexed([], path)
+    with jsonl.IndexedReader(path) as reader:
+        assert len(reader) == 0
+        assert reader.get_many([]) == []
+
+
+def test_jsonl_indexed_invalid_index(tmpdir: py.path.local) -> None:
+    path = str(tmpdir / "records.jsonl")
+    jsonl.dump_indexed([{"id": 1}], path)
+    with open(path, "a") as f:
+        f.write('{"id": 2}\n')
+    with pytest.raises(
+        ValueError,
+        match=r"^The index of .*records.jsonl is out of date; write it again$",
+    ):
+        jsonl.IndexedReader(path)
+
+    (tmpdir / "records.idx").write_binary(b"MSRI")
+    with pytest.raises(ValueError, match=r"records.idx is not a JSON Lines index$"):
+        jsonl.IndexedReader(path)
+
+
+def test_jsonl_indexed_invalid_arguments(tmpdir: py.path.local) -> None:
+    with pytest.raises(ValueError, match=r"^JSON Lines records can't be indented$"):
+        jsonl.dump_indexed([1], str(tmpdir / "records.jsonl"), indent=2)
+    with pytest.raises(
+        ValueError, match=r"^Indexed JSON Lines files can't be compressed$"
+    ):
+        jsonl.dump_indexed([1], str(tmpdir / "records.jsonl.gz"))
+    with pytest.raises(
+        ValueError, match=r"^Indexed JSON Lines files can't be compressed$"
+    ):
+        jsonl.dump_indexed([1], str(tmpdir / "records.jsonl"), compression="gzip")
+
+
+def record_id(record: t.Dict[str, t.Any]) -> int:
+    return record["id"]
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_jsonl_parallel_round_trip(tmpdir: py.path.local, executor: str) -> None:
+    path = str(tmpdir / "records.jsonl")
+    records = [{"id": i, "text": "line\u2028separator" * (i % 3)} for i in range(500)]
+    jsonl.dump_iter_parallel(
+        records,
+        path,
+        workers=2,
+        executor=t.cast(t.Any, executor),
+        batch_size=64,
+        ensure_ascii=False,
+    )
+    assert list(jsonl.iter_load(path)) == records
+
+    with open(path, "a") as f:
+        f.write("\n  \n")
+    res = jsonl.iter_load_parallel(
+        path, workers=2, executor=t.cast(t.Any, executor), chunk_size=1000
+    )
+    assert list(res) == records
+
+    res = jsonl.iter_load_parallel(
+        path,
+        workers=2,
+        executor=t.cast(t.Any, executor),
+        ordered=False,
+        chunk_size=1000,
+    )
+    assert sorted(res, key=lambda record: record["id"]) == records
+
+    res = jsonl.iter_load_parallel(
+        path, record_id, executor=t.cast(t.Any, executor), chunk_size=1000
+    )
+    assert list(res) == list(range(500))
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_jsonl_parallel_ndarrays(tmpdir: py.path.local, executor: str) -> None:
+    import numpy as np
+
+    path = str(tmpdir / "arrays.jsonl")
+    records: t.List[t.Dict[str, t.Any]] = [
+        {"id": i, "points": np.full((100, 3), i)} for i in range(20)
+    ]
+    jsonl.dump_iter(records, path, sidecar_threshold=0)
+
+    res = list(
+        jsonl.iter_load_parallel(
+            path, workers=2, executor=t.cast(t.Any, executor), chunk_size=100
+        )
+    )
+    assert [record["id"] for record in res] == list(range(20))
+    for original, record in zip(records, res):
+        assert type(record["points"]) is np.ndarray or executor == "thread"
+        np.testing.assert_array_equal(record["points"], original["points"])
+
+
+def test_jsonl_parallel_discards_unconsumed_arrays(tmpdir: py.path.local) -> None:
+    import numpy as np
+    from missouri.test_poollib import shared_memory_blocks
+
+    path = str(tmpdir / "arrays.jsonl")
+    jsonl.dump_iter(({"points": np.arange(20000.0)} for _ in range(8)), path)
+    blocks = shared_memory_blocks()
+    res = jsonl.iter_load_parallel(path, workers=2, chunk_size=1)
+    np.testing.assert_array_equal(next(res)["points"], np.arange(20000.0))
+    res.close()
+    assert shared_memory_blocks() == blocks
+
+
+def test_jsonl_parallel_compressed(tmpdir: py.path.local) -> None:
+    path = str(tmpdir / "records.jsonl.gz")
+    jsonl.dump_iter_parallel([[1], [2]], path, executor="thread")
+    assert list(jsonl.iter_load(path)) == [[1], [2]]
+    with pytest.raises(
+        ValueError, match=r"^JSON Lines files read in parallel can't be compressed$"
+    ):
+        next(jsonl.iter_load_parallel(path))
+
+
+def test_jsonl_parallel_errors(tmpdir: py.path.local) -> None:
+    import io
+    from missouri.json import FileError
+
+    path = str(tmpdir / "records.jsonl")
+    with open(path, "w") as f:
+        f.write('{"id": 0}\n{"id": \n')
+    with pytest.raises(FileError, match=r"records.jsonl: JSONDecodeError"):
+        list(jsonl.iter_load_parallel(path, executor="thread"))
+
+    with pytest.raises(ValueError, match=r"^JSON Lines records can't be indented$"):
+        jsonl.dump_iter_parallel([1], io.StringIO(), indent=2)
+    with pytest.raises(
+        ValueError,
+        match=r"^sidecar_threshold isn't supported when writing in parallel$",
+    ):
+        jsonl.dump_iter_parallel([1], path, sidecar_threshold=0)
+
+    stream = io.StringIO()
+    jsonl.dump_iter_parallel(range(5), stream, executor="thread", batch_size=2)
+    assert stream.getvalue() == "0\n1\n2\n3\n4\n"
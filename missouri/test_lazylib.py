@@ -0,0 +1,179 @@
+import contextlib
+import io
+import typing as t
+from missouri import json, lazylib
+from missouri.coding import JSONDecoder
+from missouri.lazylib import LazyArray, LazyObject
+import numpy as np
+import py
+import pytest
+
+DOCUMENT: t.Dict[str, t.Any] = {
+    "name": "mesh",
+    "vertices": np.arange(12, dtype=np.float32).reshape(4, 3),
+    "faces": [[0, 1, 2], [1, 2, 3]],
+    "metadata": {'escaped "key"': "tab\t", "units": None, "scale": 1.5e-3},
+    "groups": [{"name": "a", "faces": [0]}, {"name": "b", "faces": []}],
+    "empty": {},
+    "flag": True,
+}
+
+
+def write_document(tmpdir: py.path.local, **kwargs: t.Any) -> str:
+    path = str(tmpdir.join("document.json"))
+    json.dump(DOCUMENT, path, **kwargs)
+    return path
+
+
+@pytest.mark.parametrize("backend", ["simplejson", "json", "orjson"])
+def test_load_lazy(tmpdir: py.path.local, backend: str) -> None:
+    if backend == "orjson":
+        pytest.importorskip("orjson")
+    path = write_document(tmpdir)
+
+    res = json.load_lazy(path, backend=backend)
+    assert isinstance(res, LazyObject)
+    assert list(res) == list(DOCUMENT)
+    assert len(res) == len(DOCUMENT)
+    assert repr(res) == "<LazyObject with 7 keys>"
+    assert res["name"] == "mesh"
+    assert res["flag"] is True
+
+    vertices = res["vertices"]
+    assert isinstance(vertices, np.ndarray)
+    assert vertices.dtype == np.float32
+    np.testing.assert_array_equal(vertices, DOCUMENT["vertices"])
+    assert res["vertices"] is vertices
+
+    faces = res["faces"]
+    assert isinstance(faces, LazyArray)
+    assert repr(faces) == "<LazyArray with 2 items>"
+    assert faces[1][2] == 3
+    assert faces[-1] is faces[1]
+    assert faces[:1] == [[0, 1, 2]]
+    assert faces == DOCUMENT["faces"]
+    assert faces != "faces"
+    assert faces.decode() == DOCUMENT["faces"]
+
+    metadata = res["metadata"]
+    assert isinstance(metadata, LazyObject)
+    assert dict(metadata) == DOCUMENT["metadata"]
+    assert res["groups"][1]["name"] == "b"
+    assert res["empty"] == {}
+
+    decoded = res.decode()
+    assert decoded.keys() == DOCUMENT.keys()
+    np.testing.assert_array_equal(decoded["vertices"], DOCUMENT["vertices"])
+
+    with pytest.raises(KeyError):
+        res["missing"]
+    with pytest.raises(IndexError):
+        faces[2]
+
+
+def test_load_lazy_sources(tmpdir: py.path.local) -> None:
+    path = write_document(tmpdir, compression="gzip")
+    assert json.load_lazy(path)["groups"][0]["faces"] == [0]
+    with open(write_document(tmpdir), "rb") as f:
+        assert json.load_lazy(f)["name"] == "mesh"
+
+    assert json.load_lazy(b' [1, "a", [2.5e3, false]] ') == [1, "a", [2500.0, False]]
+    assert json.load_lazy(io.BytesIO(b"{}")) == {}
+    assert json.load_lazy(b"[]") == []
+    assert json.load_lazy(b" -12.5\n") == -12.5
+    assert json.load_lazy(b'"\\u00e9"') == "é"
+
+
+def test_load_lazy_decoders(tmpdir: py.path.local) -> None:
+    path = write_document(tmpdir, ndarray_encoding="base64")
+
+    res = json.load_lazy(path, decoder=None)
+    assert isinstance(res["vertices"], LazyObject)
+    assert res["vertices"]["encoding"] == "base64"
+
+    class ScalingDecoder(JSONDecoder):
+        def decode(self, obj: t.Any) -> t.Any:
+            return {**obj, "scale": 1.0} if "scale" in obj else None
+
+    data = json.dumps_bytes([DOCUMENT["metadata"], DOCUMENT["groups"]])
+    res = json.load_lazy(data, decoder=ScalingDecoder())
+    assert isinstance(res, LazyArray)
+    # Objects are decoded in full, since the decoder may change any of them.
+    assert res[0] == {**DOCUMENT["metadata"], "scale": 1.0}
+    assert isinstance(res[1], LazyArray)
+    assert type(res[1][0]) is dict
+
+
+def test_load_lazy_sidecar(tmpdir: py.path.local) -> None:
+    path = write_document(tmpdir, sidecar_threshold=0)
+    res = json.load_lazy(path)
+    np.testing.assert_array_equal(res["vertices"], DOCUMENT["vertices"])
+
+
+def test_load_lazy_sidecar_after_returning(tmpdir: py.path.local) -> None:
+    class ReleasingDecoder(JSONDecoder):
+        @contextlib.contextmanager
+        def reading_sidecar(self, json_path: str) -> t.Iterator[JSONDecoder]:
+            with super().reading_sidecar(json_path) as decoder:
+                yield decoder
+            # Like a decoder which releases the sidecar once the document is
+            # read.
+            decoder.sidecar = None
+
+    path = write_document(tmpdir, sidecar_threshold=0)
+    res = json.load_lazy(path, decoder=ReleasingDecoder())
+    np.testing.assert_array_equal(res["vertices"], DOCUMENT["vertices"])
+
+
+def test_load_lazy_shared_objects() -> None:
+    shared = {"value": [1, 2]}
+    data = json.dumps_bytes({"a": shared, "b": shared}, dedupe="identity")
+
+    res = json.load_lazy(data, dedupe=True)
+    assert res["a"] == shared
+    assert res["b"] == shared
+
+    with pytest.raises(ValueError, match=r"^Reference to undefined shared object 0$"):
+        json.load_lazy(data, dedupe=True)["b"]
+
+
+@pytest.mark.parametrize("block_size", [4, 16, 64])
+def test_load_lazy_scans_blocks(
+    monkeypatch: pytest.MonkeyPatch, block_size: int
+) -> None:
+    monkeypatch.setattr(lazylib, "SCAN_BLOCK_SIZE", block_size)
+    document = {
+        "a": [[1, [2, 3]], "]]", {"b": [[4]]}],
+        "deep": [[[[[[[[1, 2], [3]]]]]]], {"c": [[[[[[{}]]]]]]}],
+        "grid": np.arange(60).reshape(3, 4, 5).tolist(),
+        "d": [5, 6],
+    }
+    for separators in [(",", ":"), (", ", ": ")]:
+        res = json.load_lazy(json.dumps_bytes(document, separators=separators))
+        assert res["a"][1] == "]]"
+        assert res["a"][2]["b"] == [[4]]
+        assert res == document
+        assert res["d"] == [5, 6]
+
+
+@pytest.mark.parametrize(
+    "data,message",
+    [
+        (b"", "Expecting value at offset 0"),
+        (b"[1, 2] 3", "Extra data at offset 7"),
+        (b'{"a": "b', "Unterminated string at offset 6"),
+        (b'[1, "a", [2, 3]', "Expecting ',' or ']' delimiter at offset 15"),
+        (b'{"a": [1, "b", [2]', "Unterminated array or object at offset 6"),
+        (b'{"a": [1, "b', "Unterminated string at offset 10"),
+        (b"{1: 2}", "Expecting property name enclosed in double quotes at offset 1"),
+        (b'{"a" 2}', "Expecting ':' delimiter at offset 5"),
+        (b'{"a": 1 "b": 2}', "Expecting ',' or '}' delimiter at offset 8"),
+        (b"[1 2]", "Expecting ',' or ']' delimiter at offset 3"),
+        (b"[1, ]", "Expecting value at offset 4"),
+    ],
+)
+def test_load_lazy_invalid(data: bytes, message: str) -> None:
+    with pytest.raises(ValueError, match=message):
+        res = json.load_lazy(data)
+        len(res)
+        res[-1]
@@ -0,0 +1,163 @@
+import typing as t
+from missouri.numpylib import decode_numpy, encode_numpy, extract_ndarray_lists
+import pytest
+
+
+def test_decode_numpy_ignores_dict_without_marker() -> None:
+    assert decode_numpy({"foo": [1, 2, 3]}) is None
+
+
+def test_encode_numpy_scalar_types() -> None:
+    import numpy as np
+
+    for scalar_type in set(np.sctypeDict.values()):
+        if issubclass(scalar_type, np.bool_):
+            assert encode_numpy(scalar_type(1), as_primitives=False) is True
+        elif issubclass(scalar_type, np.integer):
+            encoded = encode_numpy(scalar_type(3), as_primitives=False)
+            assert type(encoded) is int and encoded == 3
+        elif issubclass(scalar_type, np.floating):
+            encoded = encode_numpy(scalar_type(0.5), as_primitives=False)
+            assert type(encoded) is float and encoded == 0.5
+
+
+def test_encode_numpy_other_generic_uses_item() -> None:
+    import numpy as np
+
+    for _ in range(2):
+        assert encode_numpy(np.complex64(1 + 2j), as_primitives=False) == 1 + 2j
+
+
+def test_encode_numpy_other_types(monkeypatch: pytest.MonkeyPatch) -> None:
+    import sys
+
+    class Other:
+        pass
+
+    with monkeypatch.context() as m:
+        m.setitem(sys.modules, "numpy", None)
+        assert encode_numpy(Other(), as_primitives=False) is None
+    for _ in range(2):
+        assert encode_numpy(Other(), as_primitives=False) is None
+
+
+def test_encode_numpy_doesnt_keep_other_types_alive() -> None:
+    import gc
+    import weakref
+
+    cls = type("Dynamic", (), {})
+    assert encode_numpy(cls(), as_primitives=False) is None
+    cls_ref = weakref.ref(cls)
+    del cls
+    gc.collect()
+    assert cls_ref() is None
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+@pytest.mark.parametrize(
+    "dtype,shape",
+    [
+        ("float32", (4, 3)),
+        ("float64", (5,)),
+        ("int64", (2, 3, 2)),
+        ("uint8", (0, 3)),
+        ("float64", (3, 0)),
+        ("int16", (2, 0, 3)),
+    ],
+)
+def test_extract_ndarray_lists(
+    dtype: str, shape: t.Tuple[int, ...], indent: t.Optional[int]
+) -> None:
+    import numpy as np
+    from missouri import json
+
+    original = (np.arange(int(np.prod(shape))).reshape(shape) * 3 - 5).astype(dtype)
+    text = json.dumps({"a": original, "b": [original], "c": "d"}, indent=indent)
+
+    remaining, arrays = extract_ndarray_lists(text)
+    assert json.loads(remaining, decoder=None) == {
+        "a": {"__ndarray_parsed__": 0},
+        "b": [{"__ndarray_parsed__": 1}],
+        "c": "d",
+    }
+    assert len(arrays) == 2
+    for array in arrays:
+        assert array.dtype == original.dtype
+        assert array.shape == original.shape
+        np.testing.assert_array_equal(array, original)
+
+
+def test_extract_ndarray_lists_in_chunks(monkeypatch: pytest.MonkeyPatch) -> None:
+    import numpy as np
+    from missouri import json, numpylib
+
+    monkeypatch.setattr(numpylib, "DIRECT_PARSE_CHUNK_SIZE", 64)
+    original = np.random.default_rng(0).random((100, 3))
+    _, arrays = extract_ndarray_lists(json.dumps(original))
+    np.testing.assert_array_equal(arrays[0], original)
+
+    # A number longer than a chunk can't be split at a comma.
+    long_number = "0." + "1" * 100
+    _, arrays = extract_ndarray_lists(
+        f'{{"__ndarray__": [{long_number}, 2], "dtype": "float64", "shape": [2]}}'
+    )
+    np.testing.assert_array_equal(arrays[0], [float(long_number), 2])
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        # Not plain numbers.
+        '{"__ndarray__": [1, NaN], "dtype": "float64", "shape": [2]}',
+        '{"__ndarray__": [1, null], "dtype": "float64", "shape": [2]}',
+        '{"__ndarray__": [true, false], "dtype": "bool", "shape": [2]}',
+        '{"__ndarray__": ["a", "b"], "dtype": "object", "shape": [2]}',
+        '{"__ndarray__": [1, 2], "dtype": "complex128", "shape": [2]}',
+        '{"__ndarray__": 1, "dtype": "float64", "shape": []}',
+        '{"__ndarray__": [1, 1.2.3], "dtype": "float64", "shape": [2]}',
+        # Not JSON numbers, or missing.
+        '{"__ndarray__": [+1, 2], "dtype": "float64", "shape": [2]}',
+        '{"__ndarray__": [01, 2], "dtype": "float64", "shape": [2]}',
+        '{"__ndarray__": [.5, 2], "dtype": "float64", "shape": [2]}',
+        '{"__ndarray__": [1, -.5], "dtype": "float64", "shape": [2]}',
+        '{"__ndarray__": [5., 2], "dtype": "float64", "shape": [2]}',
+        '{"__ndarray__": [1, , 3], "dtype": "float64", "shape": [3]}',
+        '{"__ndarray__": [1, 2, ], "dtype": "float64", "shape": [3]}',
+        # Integers out of range, which np.fromstring clamps or wraps.
+        '{"__ndarray__": [99999999999999999999, 1], "dtype": "int64", "shape": [2]}',
+        '{"__ndarray__": [9223372036854775808, 1], "dtype": "int64", "shape": [2]}',
+        '{"__ndarray__": [1, -1], "dtype": "uint64", "shape": [2]}',
+        '{"__ndarray__": [200, -1], "dtype": "int8", "shape": [2]}',
+        '{"__ndarray__": [1, 256], "dtype": "uint8", "shape": [2]}',
+        '{"__ndarray__": [3000000000], "dtype": "int32", "shape": [1]}',
+        # Not the shape.
+        '{"__ndarray__": [[1, 2], [3]], "dtype": "float64", "shape": [2, 2]}',
+        '{"__ndarray__": [[1, 2, 3], [4]], "dtype": "float64", "shape": [2, 2]}',
+        '{"__ndarray__": [], "dtype": "float64", "shape": [1]}',
+        '{"__ndarray__": [5], "dtype": "float64", "shape": [0]}',
+        # Keys in another order, or other keys.
+        '{"dtype": "float64", "__ndarray__": [1, 2], "shape": [2]}',
+        '{"__ndarray__": [1, 2], "shape": [2], "dtype": "float64"}',
+        '{"__ndarray__": [1, 2], "dtype": "float64", "shape": [2], "x": 1}',
+        '{"__ndarray__": [1, 2]}',
+        # Not a key.
+        '["__ndarray__", [1, 2]]',
+        '{"x": "\\"__ndarray__\\": [1]"}',
+        '{"x": 1, "__ndarray__": [1, 2], "dtype": "float64", "shape": [2]}',
+        # Already holds the placeholder key.
+        '[{"__ndarray_parsed__": 0}, {"__ndarray__": [1], "dtype": "int64", "shape": [1]}]',
+    ],
+)
+def test_extract_ndarray_lists_leaves_others_to_the_decoder(text: str) -> None:
+    assert extract_ndarray_lists(text) == (text, [])
+
+
+def test_extract_ndarray_lists_raises_expected_error_when_numpy_is_not_installed(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    import sys
+
+    monkeypatch.setitem(sys.modules, "numpy", None)
+
+    with pytest.raises(ImportError, match=r"Install numpy to parse arrays directly"):
+        extract_ndarray_lists("[]")
@@ -0,0 +1,297 @@
+import typing as t
+from missouri import json, jsonl
+from missouri.openlib import Compression, detect_compression, open_compressed
+import py
+import pytest
+
+DOCUMENT = {"frames": [{"index": i, "label": f"frame {i}"} for i in range(100)]}
+
+EXTENSIONS: t.Dict[str, Compression] = {
+    "gz": "gzip",
+    "bz2": "bz2",
+    "xz": "xz",
+    "zst": "zstd",
+    "lz4": "lz4",
+}
+
+
+def skip_unless_installed(compression: Compression) -> None:
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    elif compression == "lz4":
+        pytest.importorskip("lz4.frame")
+
+
+@pytest.fixture(params=list(EXTENSIONS))
+def extension(request: pytest.FixtureRequest) -> str:
+    skip_unless_installed(EXTENSIONS[request.param])
+    return request.param
+
+
+def decompressed(path: str, compression: Compression) -> bytes:
+    with open_compressed(path, "rb", compression) as f:
+        return f.read()
+
+
+def test_compressed_round_trip_by_extension(
+    extension: str, tmpdir: py.path.local
+) -> None:
+    path = str(tmpdir / f"test_compressed_round_trip.json.{extension}")
+    json.dump(DOCUMENT, path)
+    assert detect_compression(path, "r") == EXTENSIONS[extension]
+    assert decompressed(path, EXTENSIONS[extension]) == json.dumps(DOCUMENT).encode()
+    assert json.load(path) == DOCUMENT
+
+
+def test_compressed_round_trip_bytes(extension: str, tmpdir: py.path.local) -> None:
+    path = str(tmpdir / f"test_compressed_round_trip_bytes.json.{extension}")
+    json.dump_bytes(DOCUMENT, path)
+    assert decompressed(path, EXTENSIONS[extension]) == json.dumps(DOCUMENT).encode()
+    assert json.load_bytes(path) == DOCUMENT
+
+
+def test_compressed_jsonl_and_iter_items(extension: str, tmpdir: py.path.local) -> None:
+    path = str(tmpdir / f"test_compressed.jsonl.{extension}")
+    jsonl.dump_iter(DOCUMENT["frames"], path)
+    assert list(jsonl.iter_load(path)) == DOCUMENT["frames"]
+
+    path = str(tmpdir / f"test_compressed.json.{extension}")
+    json.dump(DOCUMENT, path)
+    assert (
+        list(json.iter_items(path, "frames.item", chunk_size=64)) == DOCUMENT["frames"]
+    )
+
+
+def test_compressed_file_is_detected_by_signature(
+    extension: str, tmpdir: py.path.local
+) -> None:
+    path = str(tmpdir / "test_compressed_file_is_detected_by_signature.json")
+    json.dump(DOCUMENT, path, compression=EXTENSIONS[extension])
+    assert detect_compression(path, "r") == EXTENSIONS[extension]
+    assert detect_compression(path, "w") is None
+    assert json.load(path) == DOCUMENT
+    assert json.load_bytes(path) == DOCUMENT
+
+
+def test_compresslevel(extension: str, tmpdir: py.path.local) -> None:
+    import random
+
+    rng = random.Random(0)
+    words = ["alpha", "beta", "gamma", "delta"]
+    document = {
+        "values": [f"{rng.choice(words)}{rng.randrange(100)}" for _ in range(20000)]
+    }
+    sizes = []
+    for level in (1, 9):
+        path = tmpdir / f"test_compresslevel_{level}.json.{extension}"
+        json.dump(document, str(path), compresslevel=level)
+        assert json.load(str(path)) == document
+        sizes.append(path.size())
+    assert sizes[1] < sizes[0]
+
+
+def test_uncompressed_file_is_not_detected(tmpdir: py.path.local) -> None:
+    path = str(tmpdir / "test_uncompressed_file_is_not_detected.json")
+    json.dump(DOCUMENT, path)
+    assert detect_compression(path, "r") is None
+
+
+def test_unknown_compression_raises_expected_error(tmpdir: py.path.local) -> None:
+    path = str(tmpdir / "test_unknown_compression.json")
+    with pytest.raises(ValueError, match=r"Unknown compression 'rar'; expected one of"):
+        json.dump(DOCUMENT, path, compression="rar")
+
+
+def test_compression_with_file_object_raises_expected_error() -> None:
+    from io import BytesIO, StringIO
+
+    with pytest.raises(
+        ValueError,
+        match=r"compression is only supported when reading or writing a path",
+    ):
+        json.dump(DOCUMENT, StringIO(), compression="gzip")
+    with pytest.raises(
+        ValueError,
+        match=r"compresslevel is only supported when reading or writing a path",
+    ):
+        json.dump_bytes(DOCUMENT, BytesIO(), compresslevel=1)
+    with pytest.raises(
+        ValueError,
+        match=r"compression is only supported when reading or writing a path",
+    ):
+        json.load_bytes(b"{}", compression="gzip")
+
+
+def test_missing_codec_raises_expected_error(
+    monkeypatch: pytest.MonkeyPatch, tmpdir: py.path.local
+) -> None:
+    import sys
+
+    monkeypatch.setitem(sys.modules, "zstandard", None)
+    path = str(tmpdir / "test_missing_codec.json.zst")
+    with pytest.raises(
+        ImportError, match=r"Install zstandard to read and write zstd files"
+    ):
+        json.dump(DOCUMENT, path)
+
+
+class Unencodable:
+    pass
+
+
+@pytest.mark.parametrize("dump", [json.dump, json.dump_bytes])
+def test_atomic_write_replaces_file(
+    dump: t.Callable[..., None], tmpdir: py.path.local
+) -> None:
+    path = tmpdir / "test_atomic_write_replaces_file.json"
+    path.write("old")
+    path.chmod(0o640)
+    dump(DOCUMENT, str(path), atomic=True)
+    assert json.load(str(path)) == DOCUMENT
+    assert path.stat().mode & 0o777 == 0o640
+    assert tmpdir.listdir() == [path]
+
+
+@pytest.mark.parametrize("atomic", [False, True])
+def test_failed_write_leaves_file_untouched_only_when_atomic(
+    atomic: bool, tmpdir: py.path.local
+) -> None:
+    path = tmpdir / "test_failed_write.json"
+    json.dump(DOCUMENT, str(path))
+    with pytest.raises(ValueError, match=r"is not JSON-serializable"):
+        json.dump(
+            {"frames": DOCUMENT["frames"] + [Unencodable()]}, str(path), atomic=atomic
+        )
+    assert tmpdir.listdir() == [path]
+    if atomic:
+        assert json.load(str(path)) == DOCUMENT
+    else:
+        with pytest.raises(ValueError):
+            json.load(str(path))
+
+
+def test_atomic_compressed_write(tmpdir: py.path.local) -> None:
+    path = tmpdir / "test_atomic_compressed_write.json.gz"
+    json.dump(DOCUMENT, str(path), atomic=True)
+    assert detect_compression(str(path), "r") == "gzip"
+    assert json.load(str(path)) == DOCUMENT
+    assert tmpdir.listdir() == [path]
+
+
+def test_atomic_jsonl_write(tmpdir: py.path.local) -> None:
+    path = tmpdir / "test_atomic_jsonl_write.jsonl"
+    jsonl.dump_iter(DOCUMENT["frames"], str(path), atomic=True)
+    assert list(jsonl.iter_load(str(path))) == DOCUMENT["frames"]
+    assert tmpdir.listdir() == [path]
+
+
+@pytest.mark.parametrize("atomic", [False, True])
+def test_fsync(
+    atomic: bool, monkeypatch: pytest.MonkeyPatch, tmpdir: py.path.local
+) -> None:
+    import os
+
+    fsyncs: t.List[int] = []
+    monkeypatch.setattr(os, "fsync", fsyncs.append)
+    path = str(tmpdir / "test_fsync.json")
+    json.dump(DOCUMENT, path)
+    assert len(fsyncs) == 0
+    json.dump(DOCUMENT, path, atomic=atomic, fsync=True)
+    # With atomic, the directory is flushed too.
+    assert len(fsyncs) == (2 if atomic else 1)
+    assert json.load(path) == DOCUMENT
+
+
+@pytest.mark.parametrize("buffer_size", [1, 1 << 20])
+@pytest.mark.parametrize("extension", ["json", "json.gz"])
+def test_buffer_size(buffer_size: int, extension: str, tmpdir: py.path.local) -> None:
+    path = str(tmpdir / f"test_buffer_size.{extension}")
+    json.dump(DOCUMENT, path, buffer_size=buffer_size)
+    assert json.load(path, buffer_size=buffer_size) == DOCUMENT
+    assert json.load_bytes(path, buffer_size=buffer_size) == DOCUMENT
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_single_write(indent: t.Optional[int], tmpdir: py.path.local) -> None:
+    from io import BytesIO, StringIO
+
+    expected = json.dumps(DOCUMENT, indent=indent)
+
+    text = StringIO()
+    json.dump(DOCUMENT, text, single_write=True, indent=indent)
+    assert text.getvalue() == expected
+
+    binary = BytesIO()
+    json.dump_bytes(DOCUMENT, binary, single_write=True, indent=indent)
+    assert binary.getvalue() == expected.encode("utf-8")
+
+    path = str(tmpdir / "test_single_write.json")
+    json.dump(DOCUMENT, path, False, single_write=True)
+    assert json.load(path) == DOCUMENT
+
+
+def test_write_options_when_reading_raise_expected_error(
+    tmpdir: py.path.local,
+) -> None:
+    path = str(tmpdir / "test_write_options_when_reading.json")
+    json.dump(DOCUMENT, path)
+    with pytest.raises(ValueError, match=r"atomic and fsync only apply when writing"):
+        json.load(path, atomic=True)
+    with pytest.raises(ValueError, match=r"atomic and fsync only apply when writing"):
+        list(jsonl.iter_load(path, fsync=True))
+
+
+def test_write_options_with_file_object_raise_expected_error() -> None:
+    from io import StringIO
+
+    with pytest.raises(
+        ValueError, match=r"atomic is only supported when reading or writing a path"
+    ):
+        json.dump(DOCUMENT, StringIO(), atomic=True)
+    with pytest.raises(
+        ValueError,
+        match=r"buffer_size is only supported when reading or writing a path",
+    ):
+        json.load_bytes(b"{}", buffer_size=1024)
+
+
+def test_uncompressed_file_is_opened_once(
+    monkeypatch: pytest.MonkeyPatch, tmpdir: py.path.local
+) -> None:
+    import builtins
+    from missouri import openlib
+    from missouri.openlib import ensure_binary_file_open
+
+    path = str(tmpdir / "test_uncompressed_file_is_opened_once.json")
+    json.dump(DOCUMENT, path)
+    opened = []
+
+    def recording_open(file: t.Any, *args: t.Any, **kwargs: t.Any) -> t.Any:
+        opened.append(file)
+        return builtins.open(file, *args, **kwargs)
+
+    monkeypatch.setattr(openlib, "open", recording_open, raising=False)
+    loads: t.List[t.Callable[[str], t.Any]] = [
+        json.load,
+        json.load_bytes,
+        json.load_lazy,
+    ]
+    for load in loads:
+        opened.clear()
+        assert load(path) == DOCUMENT
+        assert opened == [path]
+
+    opened.clear()
+    with ensure_binary_file_open(path, "rb") as f:
+        assert f.read() == json.dumps(DOCUMENT).encode()
+    assert opened == [path]
+
+
+def test_empty_file_is_read(tmpdir: py.path.local) -> None:
+    from missouri.openlib import ensure_buffer, read_buffer
+
+    path = tmpdir / "test_empty_file_is_read.json"
+    path.write("")
+    assert read_buffer(str(path)) == b""
+    with ensure_buffer(str(path)) as data:
+        assert data == b""
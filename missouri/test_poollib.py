@@ -0,0 +1,212 @@
+import os
+import typing as t
+from missouri import json
+from missouri.coding import JSONDecoder, JSONEncoder
+from missouri.poollib import (
+    Executor,
+    SharedArray,
+    discard_shared_arrays,
+    share_arrays,
+    unshare_arrays,
+)
+import py
+import pytest
+
+
+class Vector:
+    def __init__(self, x: float):
+        self.x = x
+
+
+class VectorEncoder(JSONEncoder):
+    def __init__(self) -> None:
+        super().__init__()
+        self.register_type(Vector, self.encode_vector)
+
+    def encode_vector(self, obj: Vector) -> t.Dict[str, float]:
+        return {"__vector__": obj.x}
+
+
+class VectorDecoder(JSONDecoder):
+    def __init__(self) -> None:
+        super().__init__()
+        self.register_key("__vector__", self.decode_vector)
+
+    def decode_vector(self, obj: t.Dict[str, float]) -> Vector:
+        return Vector(obj["__vector__"])
+
+
+def shared_memory_blocks() -> t.Set[str]:
+    return set(os.listdir("/dev/shm")) if os.path.isdir("/dev/shm") else set()
+
+
+def write_files(tmpdir: py.path.local, count: int) -> t.List[str]:
+    paths = [str(tmpdir / f"{i}.json") for i in range(count)]
+    json.dump_many({path: {"index": i} for i, path in enumerate(paths)})
+    return paths
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_load_many_preserves_order(executor: Executor, tmpdir: py.path.local) -> None:
+    paths = write_files(tmpdir, 20)
+    assert json.load_many(paths, workers=3, executor=executor) == [
+        {"index": i} for i in range(20)
+    ]
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_iter_load_many_as_completed(executor: Executor, tmpdir: py.path.local) -> None:
+    paths = write_files(tmpdir, 20)
+    res = dict(json.iter_load_many(paths, workers=3, executor=executor, ordered=False))
+    assert res == {path: {"index": i} for i, path in enumerate(paths)}
+
+
+def test_load_many_with_existing_executor(tmpdir: py.path.local) -> None:
+    from concurrent.futures import ThreadPoolExecutor
+
+    paths = write_files(tmpdir, 5)
+    with ThreadPoolExecutor(2) as executor:
+        assert json.load_many(paths, executor=executor) == [
+            {"index": i} for i in range(5)
+        ]
+        # The executor is left running.
+        assert executor.submit(lambda: 1).result() == 1
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_many_with_custom_coders(executor: Executor, tmpdir: py.path.local) -> None:
+    paths = [str(tmpdir / f"{i}.json") for i in range(6)]
+    json.dump_many(
+        [(path, [Vector(i)]) for i, path in enumerate(paths)],
+        executor=executor,
+        encoder=VectorEncoder(),
+    )
+    res = json.load_many(paths, executor=executor, decoder=VectorDecoder())
+    assert [value[0].x for value in res] == list(range(6))
+
+
+def test_load_many_with_cache(tmpdir: py.path.local) -> None:
+    from missouri.cachelib import MemoryCache
+
+    paths = write_files(tmpdir, 5)
+    cache = MemoryCache()
+    for _ in range(2):
+        assert json.load_many(paths, workers=2, cache=cache) == [
+            {"index": i} for i in range(5)
+        ]
+    assert (cache.misses, cache.hits) == (5, 5)
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_many_ndarrays(executor: Executor, tmpdir: py.path.local) -> None:
+    import numpy as np
+
+    paths = [str(tmpdir / f"{i}.json") for i in range(4)]
+    arrays: t.List[t.Dict[str, t.Any]] = [
+        {
+            "large": np.full((100, 100), i, dtype=np.float32),
+            "small": np.arange(i + 1),
+            "nested": [{"large": np.arange(20000) * i}],
+        }
+        for i in range(4)
+    ]
+    blocks = shared_memory_blocks()
+    json.dump_many(dict(zip(paths, arrays)), executor=executor, sidecar_threshold=0)
+    res = json.load_many(paths, workers=2, executor=executor)
+    for original, loaded in zip(arrays, res):
+        for key in ("large", "small"):
+            assert type(loaded[key]) is np.ndarray or executor == "thread"
+            assert loaded[key].dtype == original[key].dtype
+            np.testing.assert_array_equal(loaded[key], original[key])
+        np.testing.assert_array_equal(
+            loaded["nested"][0]["large"], original["nested"][0]["large"]
+        )
+    assert shared_memory_blocks() == blocks
+
+
+def test_share_arrays_round_trip() -> None:
+    import numpy as np
+
+    structured = np.zeros(10000, dtype=[("x", "<f4"), ("label", "S4")])
+    structured["x"] = np.arange(10000)
+    value = {
+        "structured": structured,
+        "small": np.arange(3),
+        "objects": np.array([None] * 10000, dtype=object),
+        "items": [np.arange(10000.0), "text"],
+    }
+    blocks = shared_memory_blocks()
+    shared = share_arrays(value)
+    assert isinstance(shared["structured"], SharedArray)
+    assert isinstance(shared["items"][0], SharedArray)
+    assert isinstance(shared["small"], np.ndarray)
+    assert isinstance(shared["objects"], np.ndarray)
+
+    res = unshare_arrays(shared)
+    assert res["structured"].dtype == structured.dtype
+    np.testing.assert_array_equal(res["structured"], structured)
+    np.testing.assert_array_equal(res["items"][0], np.arange(10000.0))
+    assert res["items"][1] == "text"
+    assert shared_memory_blocks() == blocks
+
+    discard_shared_arrays(share_arrays({"array": np.arange(10000.0)}))
+    assert shared_memory_blocks() == blocks
+
+
+def test_share_arrays_does_not_import_numpy(monkeypatch: pytest.MonkeyPatch) -> None:
+    import sys
+
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    assert share_arrays({"a": [1]}) == {"a": [1]}
+
+
+def test_iter_load_many_discards_unconsumed_results(tmpdir: py.path.local) -> None:
+    import numpy as np
+
+    paths = [str(tmpdir / f"{i}.json") for i in range(8)]
+    json.dump_many({path: np.arange(20000.0) for path in paths})
+    blocks = shared_memory_blocks()
+    results = json.iter_load_many(paths, workers=2, executor="process")
+    path, value = next(results)
+    assert path == paths[0]
+    np.testing.assert_array_equal(value, np.arange(20000.0))
+    results.close()
+    assert shared_memory_blocks() == blocks
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_load_many_raises_error_with_path(
+    executor: Executor, tmpdir: py.path.local
+) -> None:
+    paths = write_files(tmpdir, 5)
+    missing = str(tmpdir / "missing.json")
+    with pytest.raises(json.FileError, match=r"missing\.json: FileNotFoundError") as e:
+        json.load_many(paths[:2] + [missing] + paths[2:], executor=executor)
+    assert e.value.path == missing
+    assert isinstance(e.value.__cause__, FileNotFoundError)
+
+
+def test_iter_load_many_discards_results_after_error(tmpdir: py.path.local) -> None:
+    import numpy as np
+
+    paths = [str(tmpdir / f"{i}.json") for i in range(6)]
+    json.dump_many({path: np.arange(20000.0) for path in paths})
+    blocks = shared_memory_blocks()
+    with pytest.raises(json.FileError):
+        json.load_many(
+            [str(tmpdir / "missing.json")] + paths, workers=2, executor="process"
+        )
+    assert shared_memory_blocks() == blocks
+
+
+def test_dump_many_raises_error_with_path(tmpdir: py.path.local) -> None:
+    path = str(tmpdir / "unencodable.json")
+    with pytest.raises(json.FileError, match=r"unencodable\.json: ValueError") as e:
+        json.dump_many({path: complex(1, 2)})
+    assert e.value.path == path
+    assert isinstance(e.value.__cause__, ValueError)
+
+
+def test_unknown_executor_raises_expected_error(tmpdir: py.path.local) -> None:
+    with pytest.raises(ValueError, match=r"Unknown executor 'fibers'"):
+        json.load_many([], executor="fibers")  # type: ignore[arg-type]
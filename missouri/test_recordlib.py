@@ -0,0 +1,239 @@
+import dataclasses
+import enum
+import sys
+import typing as t
+from missouri import json
+from missouri.coding import JSONEncoder
+from missouri.recordlib import record_decoder, record_encoder, tag
+import numpy as np
+import pytest
+
+
+class Color(enum.Enum):
+    RED = "red"
+    GREEN = "green"
+
+
+class Size(int, enum.Enum):
+    SMALL = 1
+    LARGE = 2
+
+
+@dataclasses.dataclass(frozen=True)
+class Point:
+    x: float
+    y: float
+
+
+@dataclasses.dataclass(slots=True)
+class Circle:
+    center: Point
+    radius: float
+    color: Color = Color.RED
+    area: float = dataclasses.field(init=False, default=0.0)
+
+
+@dataclasses.dataclass
+class Layer:
+    name: str
+    shapes: t.List[Circle]
+    mask: t.Optional[np.ndarray] = None
+
+
+class Scene(t.NamedTuple):
+    layer: Layer
+    size: Size
+
+
+def scene() -> Scene:
+    circle = Circle(Point(1.0, 2.0), 3.0)
+    circle.area = 28.0
+    return Scene(
+        Layer("shapes", [circle, circle], mask=np.array([True, False])), Size.LARGE
+    )
+
+
+def test_record_encoder() -> None:
+    extract = record_encoder(Circle)
+    assert extract is not None
+    assert record_encoder(Circle) is extract
+    assert extract(Circle(Point(1.0, 2.0), 3.0)) == {
+        "center": Point(1.0, 2.0),
+        "radius": 3.0,
+        "color": Color.RED,
+        "area": 0.0,
+    }
+    assert record_encoder(dict) is None
+    assert record_encoder(dict) is None
+
+
+def test_dumps_records() -> None:
+    assert json.dumps(scene()) == json.dumps(
+        {
+            "layer": {
+                "name": "shapes",
+                "shapes": [
+                    {
+                        "center": {"x": 1.0, "y": 2.0},
+                        "radius": 3.0,
+                        "color": "red",
+                        "area": 28.0,
+                    }
+                ]
+                * 2,
+                "mask": np.array([True, False]),
+            },
+            "size": 2,
+        }
+    )
+
+
+def test_dumps_records_registered_encoder_takes_priority() -> None:
+    encoder = JSONEncoder()
+    encoder.register_type(Point, lambda point: [point.x, point.y])
+    encoder.register_type(Color, lambda color: color.name)
+    assert (
+        json.dumps([Circle(Point(1.0, 2.0), 3.0)], encoder=encoder)
+        == '[{"center": [1.0, 2.0], "radius": 3.0, "color": "RED", "area": 0.0}]'
+    )
+
+
+def test_tagged_round_trip() -> None:
+    text = json.dumps(scene(), tagged=True)
+    assert '{"__enum__": "missouri.test_recordlib:Color", "name": "RED"}' in text
+    assert '"__record__": "missouri.test_recordlib:Circle"' in text
+
+    assert json.loads(text)["size"] == {
+        "__enum__": "missouri.test_recordlib:Size",
+        "name": "LARGE",
+    }
+    res = json.loads(text, tagged=True)
+    assert isinstance(res, Scene)
+    assert res.size is Size.LARGE
+    assert res.layer.name == "shapes"
+    assert res.layer.mask is not None
+    np.testing.assert_array_equal(res.layer.mask, [True, False])
+    assert res.layer.shapes[0] == scene().layer.shapes[0]
+    assert res.layer.shapes[0].area == 28.0
+    assert res.layer.shapes[0].color is Color.RED
+
+
+def test_tagged_round_trip_with_dedupe() -> None:
+    text = json.dumps(scene(), tagged=True, dedupe="identity")
+    assert text.count("__record__") == 4
+    res = json.loads(text, tagged=True, dedupe=True)
+    assert res.layer.shapes[0] is res.layer.shapes[1]
+
+
+@dataclasses.dataclass
+class Temperature:
+    celsius: float
+
+    def for_json(self) -> str:
+        return f"{self.celsius} C"
+
+
+def test_records_with_for_json() -> None:
+    assert record_encoder(Temperature) is None
+    for tagged in [False, True]:
+        assert json.dumps([Temperature(20.0)], tagged=tagged) == '["20.0 C"]'
+
+
+def test_tag_leaves_other_objects() -> None:
+    document = {"a": [1, "b", None, (2.0, True)], "c": np.zeros(2)}
+    assert tag(document) is document
+
+    circle = Circle(Point(1.0, 2.0), 3.0)
+    res = tag({"a": [circle], "b": (Color.GREEN,), "c": [circle]})
+    assert res["a"][0] is res["c"][0]
+    assert res["b"] == ({"__enum__": "missouri.test_recordlib:Color", "name": "GREEN"},)
+
+
+def test_decode_record_unknown_class(monkeypatch: pytest.MonkeyPatch) -> None:
+    with pytest.raises(
+        ValueError,
+        match=r"^Can't find class missouri.test_recordlib:Missing; import its module before loading the document$",
+    ):
+        json.loads('{"__record__": "missouri.test_recordlib:Missing"}', tagged=True)
+
+    monkeypatch.delitem(sys.modules, "missouri.test_recordlib")
+    with pytest.raises(
+        ValueError, match=r"^Can't find class missouri.test_recordlib:Point"
+    ):
+        json.loads(
+            '{"__record__": "missouri.test_recordlib:Point", "x": 1, "y": 2}',
+            tagged=True,
+        )
+
+
+def test_decode_record_not_a_record() -> None:
+    with pytest.raises(
+        ValueError,
+        match=r"^missouri.test_recordlib:Color is not a dataclass, attrs class or named tuple$",
+    ):
+        json.loads('{"__record__": "missouri.test_recordlib:Color"}', tagged=True)
+    with pytest.raises(ValueError, match=r"^builtins:dict is not a dataclass"):
+        record_decoder(dict)
+
+
+def test_decode_enum_not_an_enum() -> None:
+    with pytest.raises(
+        ValueError, match=r"^missouri.test_recordlib:Point is not an enum$"
+    ):
+        json.loads(
+            '{"__enum__": "missouri.test_recordlib:Point", "name": "x"}', tagged=True
+        )
+
+
+@pytest.mark.parametrize(
+    "obj,message",
+    [
+        ({"__record__": 5}, r"^Records must be written as"),
+        (
+            {"__record__": "missouri.test_recordlib:Point", "z": 1},
+            r"^Can't decode missouri.test_recordlib:Point from its fields: ",
+        ),
+        ({"__enum__": "enum:Enum"}, r"^Enum members must be written as"),
+        ({"__enum__": 5, "name": "RED"}, r"^Enum members must be written as"),
+        (
+            {"__enum__": "missouri.test_recordlib:Color", "name": "RED", "x": 1},
+            r"^Enum members must be written as",
+        ),
+        (
+            {"__enum__": "missouri.test_recordlib:Color", "name": "PINK"},
+            r"^missouri.test_recordlib:Color has no member PINK$",
+        ),
+    ],
+)
+def test_decode_invalid_records_raises_expected_error(
+    obj: t.Dict[str, t.Any], message: str
+) -> None:
+    assert json.loads(json.dumps(obj)) == obj
+    with pytest.raises(ValueError, match=message):
+        json.loads(json.dumps(obj), tagged=True)
+
+
+def test_attrs_round_trip(monkeypatch: pytest.MonkeyPatch) -> None:
+    attr = pytest.importorskip("attr")
+
+    @attr.s(auto_attribs=True, slots=True)
+    class Label:
+        text: str
+        _position: Point = Point(0.0, 0.0)
+
+    # Make it importable, as it would be at the top level of a module.
+    Label.__qualname__ = "Label"
+    monkeypatch.setattr(sys.modules[__name__], "Label", Label, raising=False)
+
+    label = t.cast(t.Any, Label)("a", Point(1.0, 2.0))
+    assert json.dumps(label) == '{"text": "a", "_position": {"x": 1.0, "y": 2.0}}'
+    assert json.loads(json.dumps(label, tagged=True), tagged=True) == label
+
+
+def test_records_without_attrs(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(sys.modules, "attr", None)
+
+    class Plain:
+        pass
+
+    assert record_encoder(Plain) is None
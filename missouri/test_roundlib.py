@@ -0,0 +1,147 @@
+import math
+import typing as t
+from missouri.roundlib import Rounding
+import pytest
+
+VALUES = [
+    0.0,
+    -0.0,
+    1234567.0,
+    0.000123456,
+    -12.3449999,
+    0.1 + 0.2,
+    1e-300,
+    5e-324,
+    1e308,
+    1.7976931348623157e308,
+    math.inf,
+    -math.inf,
+]
+
+
+@pytest.mark.parametrize(
+    "kwargs,expected",
+    [
+        (
+            {"precision": 2},
+            [
+                0.0,
+                -0.0,
+                1234567.0,
+                0.0,
+                -12.34,
+                0.3,
+                0.0,
+                0.0,
+                1e308,
+                1.7976931348623157e308,
+                math.inf,
+                -math.inf,
+            ],
+        ),
+        (
+            {"precision": -2},
+            [
+                0.0,
+                -0.0,
+                1234600.0,
+                0.0,
+                -0.0,
+                0.0,
+                0.0,
+                0.0,
+                1e308,
+                1.7976931348623157e308,
+                math.inf,
+                -math.inf,
+            ],
+        ),
+        (
+            {"significant_digits": 3},
+            [
+                0.0,
+                -0.0,
+                1230000.0,
+                0.000123,
+                -12.3,
+                0.3,
+                1e-300,
+                5e-324,
+                1e308,
+                1.7976931348623157e308,
+                math.inf,
+                -math.inf,
+            ],
+        ),
+    ],
+)
+def test_rounding(kwargs: dict, expected: list) -> None:
+    import numpy as np
+
+    rounding = Rounding(**kwargs)
+    assert [rounding.round_float(value) for value in VALUES] == expected
+
+    rounded = rounding.round_array(np.array(VALUES))
+    assert rounded.dtype == np.float64
+    assert rounded.tolist() == expected
+    assert math.isnan(rounding.round_float(math.nan))
+    assert np.isnan(rounding.round_array(np.array([math.nan]))).all()
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{"precision": 3}, {"significant_digits": 4}, {"precision": -1}]
+)
+def test_rounding_array_matches_float(kwargs: dict) -> None:
+    import numpy as np
+
+    rounding = Rounding(**kwargs)
+    values = np.random.default_rng(0).standard_normal(10000) * 1000
+    np.testing.assert_array_equal(
+        rounding.round_array(values),
+        [rounding.round_float(value) for value in values],
+    )
+
+
+def test_rounding_float32_array_to_short_decimals() -> None:
+    import numpy as np
+
+    rounded = Rounding(precision=3).round_array(np.array([0.1234567], np.float32))
+    assert rounded.tolist() == [0.123]
+
+
+def test_round_nested() -> None:
+    import numpy as np
+
+    class Point(t.NamedTuple):
+        x: float
+
+    rounding = Rounding(precision=1)
+    array = np.array([0.123])
+    point = Point(0.123)
+    original: t.Dict[str, t.Any] = {
+        "a": [0.123, (0.456, "b", 1, True, None)],
+        "c": array,
+        "d": point,
+    }
+
+    rounded = rounding.round_nested(original)
+    assert rounded == {"a": [0.1, (0.5, "b", 1, True, None)], "c": array, "d": point}
+    assert type(rounded["a"][1]) is tuple
+    assert rounded["c"] is array
+    assert original["a"][0] == 0.123
+
+
+@pytest.mark.parametrize(
+    "kwargs,message",
+    [
+        ({}, r"Pass either precision or significant_digits"),
+        (
+            {"precision": 1, "significant_digits": 1},
+            r"Pass either precision or significant_digits",
+        ),
+        ({"significant_digits": 0}, r"significant_digits must be at least 1"),
+    ],
+)
+def test_rounding_raises_expected_error(kwargs: dict, message: str) -> None:
+    with pytest.raises(ValueError, match=message):
+        Rounding(**kwargs)
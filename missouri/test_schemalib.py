@@ -0,0 +1,283 @@
+import dataclasses
+import sys
+import typing as t
+from missouri import json
+from missouri.coding import JSONEncoder, compile_schema
+import numpy as np
+import numpy.typing as npt
+import pytest
+
+
+@dataclasses.dataclass
+class Detection:
+    label: str
+    score: np.float32
+    count: np.int64
+    visible: np.bool_
+    box: npt.NDArray[np.float64]
+    extra: np.generic
+    history: t.List[np.float32] = dataclasses.field(default_factory=list)
+    masks: t.Optional[t.Dict[str, np.ndarray]] = None
+    parent: t.Optional["Detection"] = None
+    tags: t.Tuple[str, ...] = ()
+    anything: t.Any = None
+
+
+def detection(**kwargs: t.Any) -> Detection:
+    return Detection(
+        **{
+            "label": "cat",
+            "score": np.float32(0.5),
+            "count": np.int64(3),
+            "visible": np.bool_(True),
+            "box": np.array([1.0, 2.0, 3.0, 4.0]),
+            "extra": np.str_("x"),
+            **kwargs,
+        }
+    )
+
+
+def assert_detections_equal(actual: Detection, expected: Detection) -> None:
+    for field in dataclasses.fields(Detection):
+        actual_value = getattr(actual, field.name)
+        expected_value = getattr(expected, field.name)
+        if field.name == "box":
+            np.testing.assert_array_equal(actual_value, expected_value)
+        elif field.name == "masks" and expected_value is not None:
+            assert actual_value.keys() == expected_value.keys()
+            for key, value in expected_value.items():
+                np.testing.assert_array_equal(actual_value[key], value)
+        elif field.name == "parent" and expected_value is not None:
+            assert_detections_equal(actual_value, expected_value)
+        elif field.name != "extra":
+            assert actual_value == expected_value
+            assert type(actual_value) is type(expected_value)
+
+
+def test_compile_schema_dataclass() -> None:
+    schema = compile_schema(Detection)
+    assert schema.cls is Detection
+    assert schema.fields[:2] == [("label", True), ("score", True)]
+    assert schema.fields[-1] == ("anything", False)
+    assert compile_schema(Detection) is schema
+
+    record = detection(
+        history=[np.float32(0.25)],
+        masks={"a": np.zeros((2, 2), dtype=np.uint8)},
+        parent=detection(label="animal"),
+        tags=("x",),
+        anything={"y": 1},
+    )
+    encoded = schema.encode(record)
+    assert list(encoded) == [field.name for field in dataclasses.fields(Detection)]
+    assert encoded["score"] == 0.5 and type(encoded["score"]) is float
+    assert encoded["count"] == 3 and type(encoded["count"]) is int
+    assert encoded["visible"] is True
+    assert encoded["extra"] == record.extra.item()
+    assert encoded["history"] == [0.25]
+    assert encoded["parent"]["label"] == "animal"
+
+    text = json.dumps(encoded)
+    assert text == json.dumps(schema.encode(record), encoder=None)
+    for decoder in [None, json.JSONDecoder()]:
+        assert_detections_equal(
+            schema.decode(json.loads(text, decoder=decoder)), record
+        )
+
+
+def test_compile_schema_dataclass_defaults() -> None:
+    schema = compile_schema(Detection)
+    obj = json.loads(json.dumps(schema.encode(detection())), decoder=None)
+    for name in ["history", "masks", "parent", "tags", "anything"]:
+        del obj[name]
+    assert_detections_equal(schema.decode(obj), detection())
+
+
+def test_compile_schema_base64() -> None:
+    schema = compile_schema(Detection, ndarray_encoding="base64")
+    record = detection(masks={"a": np.ones((2, 2))})
+    encoded = schema.encode(record)
+    assert encoded["box"]["encoding"] == "base64"
+    assert encoded["masks"]["a"]["encoding"] == "base64"
+    assert encoded["parent"] is None
+    assert_detections_equal(
+        schema.decode(json.loads(json.dumps(encoded), decoder=None)), record
+    )
+
+
+def test_compile_schema_with_json_encoder() -> None:
+    schema = compile_schema(Detection)
+    encoder = JSONEncoder()
+    encoder.register_type(Detection, schema.encode)
+    record = detection()
+    assert json.dumps([record], encoder=encoder) == json.dumps([schema.encode(record)])
+
+
+@pytest.mark.parametrize(
+    "box",
+    [
+        {"__ndarray__": [[1.0, 2.0], [3.0, 4.0]], "dtype": "float64", "shape": [2, 2]},
+        {"__ndarray__": [1, 2, 3, 4], "dtype": "int32", "shape": [4]},
+        {"__ndarray__": [1.0, 2.0, 3.0, 4.0]},
+    ],
+)
+def test_compile_schema_decodes_arrays(box: t.Dict[str, t.Any]) -> None:
+    schema = compile_schema(Detection)
+    obj = schema.encode(detection())
+    obj["box"] = box
+    res = schema.decode(obj).box
+    np.testing.assert_array_equal(res, np.array(box["__ndarray__"]))
+    assert res.dtype == np.dtype(box.get("dtype", "float64"))
+
+
+@pytest.mark.parametrize(
+    "data", [[1.0, 2.0, 3.0], [1.0, [2.0], 3.0, 4.0], [[1.0], [2.0], [3.0], [4.0]]]
+)
+def test_compile_schema_array_doesnt_match_shape(data: t.List[t.Any]) -> None:
+    schema = compile_schema(Detection)
+    obj = schema.encode(detection())
+    obj["box"] = {"__ndarray__": data, "dtype": "float64", "shape": [4]}
+    with pytest.raises(ValueError, match=r"^Array data doesn't match its shape \[4\]$"):
+        schema.decode(obj)
+
+
+def test_compile_schema_missing_fields() -> None:
+    schema = compile_schema(Detection)
+    with pytest.raises(
+        ValueError, match=r"^Detection record is missing 'box', 'count', 'extra'"
+    ):
+        schema.decode({"label": "cat", "score": 1.0})
+
+
+@dataclasses.dataclass(frozen=True)
+class Track:
+    name: str
+    scores: npt.NDArray[np.float32]
+    best: np.float32 = dataclasses.field(init=False)
+    seen: int = dataclasses.field(init=False, default=0)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "best", self.scores.max())
+
+
+def test_compile_schema_dataclass_fields_without_init() -> None:
+    schema = compile_schema(Track)
+    assert schema.fields == [
+        ("name", True),
+        ("scores", True),
+        ("best", False),
+        ("seen", False),
+    ]
+    track = Track("a", np.array([0.25, 0.5], dtype=np.float32))
+    object.__setattr__(track, "seen", 3)
+    encoded = schema.encode(track)
+    assert list(encoded) == ["name", "scores", "best", "seen"]
+    assert (encoded["best"], encoded["seen"]) == (0.5, 3)
+
+    res = schema.decode(json.loads(json.dumps(encoded)))
+    assert (res.name, res.best, res.seen) == ("a", 0.5, 3)
+    assert type(res.best) is np.float32
+    np.testing.assert_array_equal(res.scores, track.scores)
+
+    # Without them, __init__ sets them.
+    res = schema.decode({"name": "b", "scores": np.ones(1, dtype=np.float32)})
+    assert (res.best, res.seen) == (1.0, 0)
+
+
+class Point(t.NamedTuple):
+    x: np.float32
+    y: float
+    z: float = 0.0
+
+
+def test_compile_schema_named_tuple() -> None:
+    schema = compile_schema(Point)
+    assert schema.fields == [("x", True), ("y", True), ("z", False)]
+    encoded = schema.encode(Point(np.float32(1.0), 2.0))
+    assert encoded == {"x": 1.0, "y": 2.0, "z": 0.0}
+    assert json.dumps(encoded) == json.dumps(Point(np.float32(1.0), 2.0))
+
+    res = schema.decode({"x": 1.0, "y": 2.0})
+    assert res == Point(np.float32(1.0), 2.0)
+    assert type(res.x) is np.float32
+
+
+class Mesh(t.TypedDict, total=False):
+    name: str
+    vertices: np.ndarray
+    points: t.List[Point]
+
+
+class LabeledMesh(Mesh):
+    label: str
+    weights: t.Dict[str, float]
+    corners: t.Tuple[Point, ...]
+
+
+def test_compile_schema_typed_dict() -> None:
+    schema = compile_schema(LabeledMesh)
+    assert sorted(schema.fields) == [
+        ("corners", True),
+        ("label", True),
+        ("name", False),
+        ("points", False),
+        ("vertices", False),
+        ("weights", True),
+    ]
+
+    mesh: LabeledMesh = {
+        "label": "a",
+        "weights": {"b": 1.0},
+        "vertices": np.zeros((2, 3)),
+        "points": [Point(np.float32(1.0), 2.0, 3.0)],
+        "corners": (Point(np.float32(4.0), 5.0),),
+    }
+    encoded = schema.encode(mesh)
+    assert encoded["vertices"]["shape"] == (2, 3)
+    assert encoded["points"] == [{"x": 1.0, "y": 2.0, "z": 3.0}]
+
+    obj = json.loads(json.dumps(encoded), decoder=None)
+    res = schema.decode(obj)
+    # Decoded in place.
+    assert res is obj
+    assert res.keys() == mesh.keys()
+    np.testing.assert_array_equal(res["vertices"], mesh["vertices"])
+    assert res["points"] == mesh["points"]
+    assert res["corners"] == mesh["corners"]
+
+    minimal = {"label": "a", "weights": {}, "corners": ()}
+    assert schema.decode(dict(minimal)) == minimal
+    with pytest.raises(ValueError, match=r"^LabeledMesh record is missing 'weights'$"):
+        schema.decode({"label": "a", "corners": []})
+
+
+def test_compile_schema_passes_through_other_annotations() -> None:
+    @dataclasses.dataclass
+    class Other:
+        either: t.Union[int, str]
+        pair: t.Tuple[int, int]
+        mapping: t.Dict[str, int]
+        optional: t.Optional[int]
+
+    schema = compile_schema(Other)
+    record = Other(1, (2, 3), {"a": 4}, None)
+    assert schema.encode(record) == dataclasses.asdict(record)
+    assert schema.decode(dataclasses.asdict(record)) == record
+
+
+def test_compile_schema_without_numpy(monkeypatch: pytest.MonkeyPatch) -> None:
+    @dataclasses.dataclass
+    class Plain:
+        value: float
+
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    schema = compile_schema(Plain)
+    assert schema.encode(Plain(1.0)) == {"value": 1.0}
+
+
+def test_compile_schema_not_a_record() -> None:
+    with pytest.raises(
+        ValueError,
+        match=r"^Can't compile a schema for <class 'dict'>; expected a dataclass, NamedTuple or TypedDict$",
+    ):
+        compile_schema(dict)
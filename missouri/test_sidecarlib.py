@@ -0,0 +1,298 @@
+import os
+import typing as t
+from missouri import json, jsonl
+from missouri.coding import JSONDecoder, JSONEncoder
+import py
+import pytest
+
+
+class RawDecoder(JSONDecoder):
+    def __init__(self) -> None:
+        self.clear()
+
+
+def test_json_dump_sidecar_round_trip(tmpdir: py.path.local) -> None:
+    import numpy as np
+
+    path = str(tmpdir / "test_json_dump_sidecar.json")
+    big = np.arange(24, dtype=">f8").reshape(2, 3, 4)
+    other = np.arange(5, dtype=np.uint8)
+    small = np.arange(3, dtype=np.int32)
+    json.dump(
+        {"big": big, "other": other, "small": small, "also_big": big.T},
+        path,
+        sidecar_threshold=20,
+    )
+
+    assert os.path.exists(str(tmpdir / "test_json_dump_sidecar.arrays"))
+    with open(path, "r") as f:
+        raw = json.loads(f.read(), decoder=RawDecoder())
+    assert "__ndarray_ref__" in raw["big"]
+    assert "__ndarray_ref__" in raw["also_big"]
+    assert "__ndarray__" in raw["small"]
+    assert "__ndarray__" in raw["other"]
+
+    res = json.load(path)
+    for key, original in (("big", big), ("also_big", big.T)):
+        assert res[key].shape == original.shape
+        assert res[key].dtype.newbyteorder("=") == original.dtype.newbyteorder("=")
+        assert not res[key].flags.writeable
+        np.testing.assert_equal(res[key], original)
+    np.testing.assert_equal(res["small"], small)
+    np.testing.assert_equal(res["other"], other)
+
+
+def test_json_dump_sidecar_offsets_are_aligned(tmpdir: py.path.local) -> None:
+    import numpy as np
+
+    path = str(tmpdir / "test_json_dump_sidecar_offsets_are_aligned.json")
+    json.dump([np.ones(3, dtype=np.uint8), np.ones(3)], path, sidecar_threshold=1)
+    with open(path, "r") as f:
+        refs = [
+            x["__ndarray_ref__"] for x in json.loads(f.read(), decoder=RawDecoder())
+        ]
+    assert refs == [
+        "test_json_dump_sidecar_offsets_are_aligned.arrays#0",
+        "test_json_dump_sidecar_offsets_are_aligned.arrays#64",
+    ]
+
+
+def test_json_load_sidecar_from_file_object(tmpdir: py.path.local) -> None:
+    import numpy as np
+
+    path = str(tmpdir / "test_json_load_sidecar_from_file_object.json")
+    with open(path, "w") as f:
+        json.dump({"foo": np.arange(10.0)}, f, sidecar_threshold=0)
+    with open(path, "r") as f:
+        np.testing.assert_equal(json.load(f)["foo"], np.arange(10.0))
+
+
+def test_json_load_sidecar_explicit_directory(tmpdir: py.path.local) -> None:
+    import numpy as np
+
+    path = str(tmpdir / "test_json_load_sidecar_explicit_directory.json")
+    json.dump({"foo": np.arange(10.0)}, path, sidecar_threshold=0)
+    with open(path, "r") as f:
+        text = f.read()
+    np.testing.assert_equal(
+        json.loads(text, sidecar_directory=str(tmpdir))["foo"], np.arange(10.0)
+    )
+
+
+def test_json_load_sidecar_explicit_directory_takes_priority(
+    tmpdir: py.path.local,
+) -> None:
+    import numpy as np
+
+    tmpdir.mkdir("elsewhere")
+    path = str(tmpdir / "test_json_load_sidecar_explicit_directory.json")
+    json.dump({"foo": np.arange(10.0)}, path, sidecar_threshold=0)
+    os.rename(
+        str(tmpdir / "test_json_load_sidecar_explicit_directory.arrays"),
+        str(tmpdir / "elsewhere" / "test_json_load_sidecar_explicit_directory.arrays"),
+    )
+    np.testing.assert_equal(
+        json.load(path, sidecar_directory=str(tmpdir / "elsewhere"))["foo"],
+        np.arange(10.0),
+    )
+
+
+def test_json_dump_sidecar_without_large_arrays(tmpdir: py.path.local) -> None:
+    import numpy as np
+
+    path = str(tmpdir / "test_json_dump_sidecar_without_large_arrays.json")
+    json.dump(
+        {"empty": np.zeros((0, 3)), "objects": np.array([{}], dtype=object)},
+        path,
+        sidecar_threshold=0,
+    )
+    assert os.listdir(str(tmpdir)) == [
+        "test_json_dump_sidecar_without_large_arrays.json"
+    ]
+    assert json.load(path)["empty"].size == 0
+
+
+def test_json_load_sidecar_without_directory_leaves_refs(
+    tmpdir: py.path.local,
+) -> None:
+    import numpy as np
+
+    path = str(tmpdir / "test_json_load_sidecar_without_directory.json")
+    json.dump({"foo": np.arange(10.0)}, path, sidecar_threshold=0)
+    with open(path, "r") as f:
+        text = f.read()
+    assert json.loads(text)["foo"]["__ndarray_ref__"].endswith(".arrays#0")
+
+
+def test_json_load_without_sidecar_file_leaves_refs(tmpdir: py.path.local) -> None:
+    path = str(tmpdir / "test_json_load_without_sidecar_file.json")
+    document = {"__ndarray_ref__": "a#0", "note": "not an array"}
+    json.dump(document, path)
+    assert json.load(path) == document
+
+
+@pytest.mark.parametrize(
+    "ref",
+    [
+        {"__ndarray_ref__": "../secret.arrays#0", "dtype": "<f8", "shape": [1]},
+        {"__ndarray_ref__": "#0", "dtype": "<f8", "shape": [1]},
+        {"__ndarray_ref__": "foo.arrays", "dtype": "<f8", "shape": [1]},
+        {"__ndarray_ref__": "foo.arrays#-1", "dtype": "<f8", "shape": [1]},
+        {"__ndarray_ref__": 5, "dtype": "<f8", "shape": [1]},
+        {"__ndarray_ref__": "foo.arrays#0", "shape": [1]},
+        {"__ndarray_ref__": "foo.arrays#0", "dtype": "<f8", "shape": 1},
+    ],
+)
+def test_json_load_invalid_sidecar_ref_raises_expected_error(
+    ref: t.Dict[str, t.Any],
+) -> None:
+    with pytest.raises(ValueError, match=r"Invalid array reference"):
+        json.loads(json.dumps(ref), sidecar_directory=".")
+
+
+def test_json_dumps_sidecar_raises_expected_error() -> None:
+    import numpy as np
+
+    with pytest.raises(
+        ValueError, match=r"Writing arrays to a sidecar file requires a path"
+    ):
+        json.dumps(np.arange(3), sidecar_threshold=0)
+
+
+def test_json_dump_sidecar_failure_keeps_existing_sidecar(
+    tmpdir: py.path.local,
+) -> None:
+    import numpy as np
+
+    path = str(tmpdir / "test_json_dump_sidecar_failure.json")
+    json.dump({"foo": np.arange(10.0)}, path, sidecar_threshold=0)
+    existing = json.load(path)
+
+    with pytest.raises(ValueError, match=r"is not JSON-serializable"):
+        json.dump([np.zeros(10), complex(1, 2)], path, sidecar_threshold=0)
+
+    np.testing.assert_equal(existing["foo"], np.arange(10.0))
+    assert sorted(os.listdir(str(tmpdir))) == [
+        "test_json_dump_sidecar_failure.arrays",
+        "test_json_dump_sidecar_failure.json",
+    ]
+
+
+def test_json_dump_sidecar_permissions(tmpdir: py.path.local) -> None:
+    import numpy as np
+
+    path = tmpdir / "test_json_dump_sidecar_permissions.json"
+    sidecar = tmpdir / "test_json_dump_sidecar_permissions.arrays"
+    umask = os.umask(0o022)
+    try:
+        json.dump(np.arange(10.0), str(path), sidecar_threshold=0)
+    finally:
+        os.umask(umask)
+    assert sidecar.stat().mode & 0o777 == path.stat().mode & 0o777 == 0o644
+
+    sidecar.chmod(0o640)
+    json.dump(np.arange(5.0), str(path), sidecar_threshold=0)
+    assert sidecar.stat().mode & 0o777 == 0o640
+
+
+def test_json_dump_sidecar_removes_stale_sidecar(tmpdir: py.path.local) -> None:
+    import numpy as np
+
+    path = str(tmpdir / "test_json_dump_sidecar_removes_stale_sidecar.json")
+    json.dump({"foo": np.arange(10.0)}, path, sidecar_threshold=0)
+    json.dump({"foo": np.arange(10.0)}, path, sidecar_threshold=1000)
+    assert os.listdir(str(tmpdir)) == [
+        "test_json_dump_sidecar_removes_stale_sidecar.json"
+    ]
+    np.testing.assert_equal(json.load(path)["foo"], np.arange(10.0))
+
+
+def test_jsonl_sidecar_round_trip(tmpdir: py.path.local) -> None:
+    import numpy as np
+
+    path = str(tmpdir / "test_jsonl_sidecar_round_trip.jsonl")
+    jsonl.dump_iter(
+        ({"points": np.full(100, i)} for i in range(3)), path, sidecar_threshold=0
+    )
+    for i, record in enumerate(jsonl.iter_load(path)):
+        np.testing.assert_equal(record["points"], np.full(100, i))
+
+
+def test_json_iter_items_sidecar(tmpdir: py.path.local) -> None:
+    import numpy as np
+
+    path = str(tmpdir / "test_json_iter_items_sidecar.json")
+    json.dump(
+        {"frames": [np.full(100, i) for i in range(3)]}, path, sidecar_threshold=0
+    )
+    for i, frame in enumerate(json.iter_items(path, "frames.item")):
+        np.testing.assert_equal(frame, np.full(100, i))
+
+
+def test_json_load_sidecar_with_shared_decoder_in_nested_calls(
+    tmpdir: py.path.local,
+) -> None:
+    import numpy as np
+
+    for name in ("a", "b"):
+        tmpdir.mkdir(name)
+        json.dump(
+            {"name": name, "array": np.full(10, ord(name))},
+            str(tmpdir / name / "document.json"),
+            sidecar_threshold=0,
+        )
+
+    class NestedDecoder(JSONDecoder):
+        def __init__(self) -> None:
+            super().__init__()
+            self.register_key("name", self.decode_named)
+
+        def decode_named(self, obj: t.Any) -> t.Any:
+            # Load the other document while decoding this one, like another
+            # thread sharing the decoder would.
+            if obj["name"] == "a":
+                obj["other"] = json.load(
+                    str(tmpdir / "b" / "document.json"), decoder=self
+                )
+            return obj
+
+    decoder = NestedDecoder()
+    res = json.load(str(tmpdir / "a" / "document.json"), decoder=decoder)
+    np.testing.assert_array_equal(res["array"], np.full(10, ord("a")))
+    np.testing.assert_array_equal(res["other"]["array"], np.full(10, ord("b")))
+    assert decoder.sidecar is None
+
+
+def test_json_dump_sidecar_with_shared_encoder_in_nested_calls(
+    tmpdir: py.path.local,
+) -> None:
+    import numpy as np
+
+    class Nested:
+        pass
+
+    class NestedEncoder(JSONEncoder):
+        def __init__(self) -> None:
+            super().__init__(sidecar_threshold=0)
+            self.register_type(Nested, self.encode_nested)
+
+        def encode_nested(self, obj: Nested) -> t.Any:
+            # Dump another document while encoding this one, like another
+            # thread sharing the encoder would.
+            json.dump(np.full(10, 2), str(tmpdir / "b.json"), encoder=self)
+            return "b.json"
+
+    encoder = NestedEncoder()
+    json.dump(
+        [np.full(10, 1), Nested(), np.full(10, 3)],
+        str(tmpdir / "a.json"),
+        encoder=encoder,
+    )
+    raw = json.load(str(tmpdir / "a.json"), decoder=RawDecoder())
+    assert raw[0]["__ndarray_ref__"] == "a.arrays#0"
+    assert raw[2]["__ndarray_ref__"] == "a.arrays#128"
+    first, other, last = json.load(str(tmpdir / "a.json"))
+    np.testing.assert_array_equal(first, np.full(10, 1))
+    np.testing.assert_array_equal(last, np.full(10, 3))
+    np.testing.assert_array_equal(json.load(str(tmpdir / other)), np.full(10, 2))
+    assert encoder.sidecar is None
@@ -0,0 +1,106 @@
+import typing as t
+from missouri import json
+from missouri.streamlib import parse_prefix
+import pytest
+
+DOCUMENT = r"""
+{
+    "name": "café \"quoted\" [not] {structure}",
+    "frames": [
+        {"id": 0, "tags": ["a", "b\\"], "weight": -1.5e3},
+        {"id": 1, "tags": [], "weight": null, "nested": {"x": [true, false]}},
+        [1, [2, [3]]],
+        "string",
+        42
+    ],
+    "empty": {},
+    "kéy": {"frames": [99]},
+    "last": 12
+}
+"""
+
+
+def reference(value: t.Any, prefix: t.Tuple[str, ...]) -> t.List[t.Any]:
+    if not prefix:
+        return [value]
+    head, rest = prefix[0], prefix[1:]
+    if head == "item" and isinstance(value, list):
+        return [x for item in value for x in reference(item, rest)]
+    elif isinstance(value, dict) and head in value:
+        return reference(value[head], rest)
+    else:
+        return []
+
+
+@pytest.mark.parametrize(
+    "prefix",
+    [
+        "",
+        "name",
+        "frames",
+        "frames.item",
+        "frames.item.tags.item",
+        "frames.item.item.item",
+        "frames.item.nested.x.item",
+        "empty",
+        "empty.item",
+        "kéy.frames.item",
+        "last",
+        "missing",
+    ],
+)
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1 << 20])
+def test_iter_items_matches_load(prefix: str, chunk_size: int) -> None:
+    from io import StringIO
+
+    expected = reference(json.loads(DOCUMENT), parse_prefix(prefix))
+    assert (
+        list(json.iter_items(StringIO(DOCUMENT), prefix, chunk_size=chunk_size))
+        == expected
+    )
+
+
+@pytest.mark.parametrize("backend", ["simplejson", "json"])
+def test_iter_items_numbers_split_across_chunks(backend: str) -> None:
+    from io import StringIO
+
+    document = '{"frames": [1.5, 2.5e10, -3.25E-2, 12345, 0.125, 6e+2, 7]}'
+    expected = json.loads(document)["frames"]
+    for chunk_size in range(1, len(document) + 1):
+        assert (
+            list(
+                json.iter_items(
+                    StringIO(document),
+                    "frames.item",
+                    chunk_size=chunk_size,
+                    backend=backend,
+                )
+            )
+            == expected
+        ), chunk_size
+
+
+@pytest.mark.parametrize(
+    "document,message",
+    [
+        ('{"frames": [1, ', r"Expecting value at offset 15"),
+        ('{"frames": [1, 2', r"Expecting ',' or ']' delimiter at offset 16"),
+        ('{"frames": [1 2]}', r"Expecting ',' or ']' delimiter at offset 14"),
+        ('{"frames": [1], "other": [1}', r"Unexpected '}' at offset 27"),
+        ('{"frames": [1], "other": [1', r"Unterminated array or object at offset 27"),
+        ('{"frames": [1], "other": "abc', r"Unterminated string at offset 29"),
+        (
+            '{"frames": [1], 12: 3}',
+            r"Expecting property name enclosed in double quotes",
+        ),
+        ('{"frames" [1]}', r"Expecting ':' at offset 10"),
+        ('{"frames": [1]} []', r"Extra data at offset 16"),
+    ],
+)
+def test_iter_items_malformed_raises_expected_error(
+    document: str, message: str
+) -> None:
+    from io import StringIO
+
+    with pytest.raises(ValueError, match=message):
+        list(json.iter_items(StringIO(document), "frames.item", chunk_size=3))